@@ -1,366 +1,1368 @@
-import requests
+import argparse
+import asyncio
+import base64
+import collections
+import concurrent.futures
+import contextlib
+import cProfile
+import datetime
+import functools
+import hashlib
+import hmac
+import io
+import itertools
 import json
-import time
+import math
+import mmap
+import multiprocessing
+import os
+import pstats
 import random
+import shutil
+import sqlite3
+import string
+import struct
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+import zlib
+
+import aiohttp
+from aiohttp import web
+import numpy as np
 
 # Base URL for API endpoints
 BASE_URL = "http://localhost:8000/api"
 
-# Test data for users
-users = [
-    {
-        "email": "john.doe@example.com",
-        "password": "Password123!",
-        "name": "John Doe"
-    },
-    {
-        "email": "jane.smith@example.com",
-        "password": "SecurePass456!",
-        "name": "Jane Smith"
-    },
-    {
-        "email": "michael.johnson@example.com",
-        "password": "MJohnson789!",
-        "name": "Michael Johnson"
-    },
-    {
-        "email": "sarah.williams@example.com",
-        "password": "Williams2024!",
-        "name": "Sarah Williams"
-    }
-]
+# Endpoints written to while seeding, keyed by the name used for concurrency limits
+ENDPOINTS = {
+    "signup": "/auth/signup",
+    "login": "/auth/login",
+    "add_post": "/posts/add_post",
+    "add_query": "/query/add_query",
+    "send_message": "/messages/send",
+}
+
+# Read endpoints driven by the benchmark command
+READ_ENDPOINTS = {
+    "search": "/posts/search",
+    "get_posts": "/posts/get_posts",
+    "get_messages": "/messages/get",
+    "db_data": "/agent/getDBData",
+}
+
+# Relative weight of each read endpoint in the default benchmark mix
+DEFAULT_BENCH_MIX = {"search": 4, "get_posts": 2, "get_messages": 2, "db_data": 1}
+
+# Seconds a benchmark runs when neither a duration nor a request count is given
+DEFAULT_BENCH_DURATION = 30
+
+# Mock API server: SSE heartbeat interval, matching getLiveMessage.js, and the
+# link tables its getDBData stand-in can join from User
+MOCK_HEARTBEAT_INTERVAL = 15
+MOCK_LINK_TABLES = ("post-user", "message-user", "query-user")
+
+# Live message soak test: streams held open, messages sent per second and
+# seconds of sending by default, seconds to wait for late deliveries, and the
+# multiple of the heartbeat interval after which a silent stream counts as a gap
+DEFAULT_SOAK_STREAMS = 100
+DEFAULT_SOAK_RATE = 10.0
+DEFAULT_SOAK_DURATION = 60
+SOAK_DRAIN_TIMEOUT = 10
+SOAK_HEARTBEAT_TOLERANCE = 1.5
+
+# Continuous traffic: the endpoint each kind of arrival writes to, arrivals per
+# second at the daily mean, the UTC hour traffic peaks at, and requests in
+# flight beyond which new arrivals are dropped rather than queued
+TRAFFIC_ENDPOINTS = {"post": "add_post", "query": "add_query", "message": "send_message"}
+DEFAULT_TRAFFIC_RATES = {"post": 1.0, "query": 0.2, "message": 5.0}
+DEFAULT_DIURNAL_PEAK_HOUR = 14
+TRAFFIC_MAX_IN_FLIGHT = 10000
+
+# Relative width of a latency histogram bucket (2%)
+HISTOGRAM_LOG_GROWTH = math.log(1.02)
+
+# Metrics: seconds between progress line redraws on a terminal and between
+# logged progress lines otherwise, failures printed per row kind before they
+# are only counted, failed row indexes listed at the end, and the Prometheus
+# metric prefix and histogram bounds
+PROGRESS_INTERVAL = 0.5
+PROGRESS_LOG_INTERVAL = 10
+FAILURE_LOG_LIMIT = 5
+FAILED_ROWS_PRINTED = 20
+METRICS_PREFIX = "webpilot_seed"
+PROMETHEUS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Requests in flight per endpoint unless overridden on the command line
+DEFAULT_CONCURRENCY = 8
+
+# Adaptive concurrency (AIMD): an endpoint's limit grows by one per window of
+# healthy responses, up to DEFAULT_CONCURRENCY_HEADROOM times its starting
+# value, and is cut by AIMD_DECREASE on a 429, 5xx or timeout. While smoothed
+# latency is over AIMD_LATENCY_TOLERANCE times the fastest response seen, the
+# limit holds steady instead of growing.
+DEFAULT_CONCURRENCY_HEADROOM = 4
+AIMD_DECREASE = 0.5
+AIMD_LATENCY_TOLERANCE = 2.0
+AIMD_LATENCY_SMOOTHING = 0.1
+
+# Retries of a 429, 5xx or timeout, with full-jitter exponential backoff
+DEFAULT_RETRIES = 4
+RETRY_BASE_DELAY = 0.25
+RETRY_MAX_DELAY = 10
+
+# Seconds before a single request is abandoned
+REQUEST_TIMEOUT = 30
+
+# Seconds an idle pooled connection is kept open for reuse
+KEEPALIVE_TIMEOUT = 60
+
+# Cached JWTs are refreshed once they are this many seconds from expiry
+TOKEN_EXPIRY_MARGIN = 3600
+
+# Where user IDs and JWTs are cached between runs
+DEFAULT_TOKEN_CACHE = ".seed_tokens.json"
+
+# Tagged runs: where each run's registry and run.json are kept unless
+# --registry says otherwise, the longest run ID, and the marker ending the
+# text of every post, query and message the run creates. Users get the run ID
+# as a subdomain of their email domain.
+DEFAULT_RUNS_DIR = "seed_runs"
+MAX_RUN_ID_LENGTH = 40
+RUN_MARKER = " [seed run {run_id}]"
+
+# Teardown: tables deleted from, children first, with their UUID column and
+# the text column carrying the run's tag; the link table foreign keys indexed
+# so each cascade is an index lookup instead of a sequential scan; and UUIDs
+# or id values covered by one DELETE
+TEARDOWN_TABLES = {
+    "Message": ("message_id", "message"),
+    "Posts": ("post_id", "content"),
+    "Query": ("query_id", "text"),
+    "User": ("user_id", "mail"),
+}
+TEARDOWN_FK_INDEXES = {
+    "post-user": ("post", "user"),
+    "query-user": ("user", "query"),
+    "message-user": ("sender", "receiver", "message"),
+}
+DEFAULT_TEARDOWN_CONCURRENCY = 8
+TEARDOWN_BATCH_SIZE = 5000
+TEARDOWN_RANGE_SIZE = 50000
+
+# Entity registry: packed columns kept per created entity. `owner` is the index
+# of the owning or sending user, `peer` a message's receiver and `link` the ID
+# of the post-user or message-user row. Past REGISTRY_MEMORY_ROWS rows, a
+# kind's array moves to a memory-mapped file.
+REGISTRY_COLUMNS = {
+    "user": (("id", "V16"), ("owner", "<i4")),
+    "post": (("id", "V16"), ("owner", "<i4"), ("link", "<i8")),
+    "message": (("id", "V16"), ("owner", "<i4"), ("peer", "<i4"), ("link", "<i8")),
+}
+REGISTRY_MEMORY_ROWS = 1 << 20
+
+# Read-back verification: the getDBData select for each registry kind, as (link
+# table, entity table, link column pointing at the user, entity ID column),
+# and the outcomes counted per kind
+VERIFY_SELECTS = {
+    "post": ("post-user", "Posts", "user", "post_id"),
+    "message": ("message-user", "Message", "sender", "message_id"),
+}
+VERIFY_OUTCOMES = ("users", "matched", "missing", "duplicated", "orphaned", "unexpected", "unreadable")
+
+# Profiling: seconds between the stack samples of the collapsed-stack file,
+# frames kept per allocation traceback, the functions and allocation sites
+# listed in each phase's report, and the warning printed when profiling has
+# serialized phases that normally overlap
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILE_TRACEBACK_FRAMES = 1
+PROFILE_TOP_FUNCTIONS = 30
+PROFILE_TOP_ALLOCATIONS = 15
+PROFILE_SERIALIZED_WARNING = (
+    "Profiling: posts, queries and messages run one after another instead of overlapping, so their "
+    "timings are not comparable with an unprofiled run"
+)
+
+# Longest reply chain generated, whatever a scenario's mean conversation length
+MAX_CONVERSATION_LENGTH = 16
 
-# Post topics and templates
-post_topics = [
-    "AI Technology Trends",
-    "Web Development Best Practices",
-    "Data Privacy in Modern Applications",
-    "User Experience Design"
+# Search corpus: vocabulary size, Zipf exponent of word frequencies, syllables
+# words are built from (one more per SEARCH_SYLLABLE_GROWTH-fold rank), and
+# the log-normal (mu, sigma) of title and content lengths in words, giving a
+# median of about 6 and 80 words
+POST_CORPORA = ("templates", "search")
+SEARCH_VOCABULARY_SIZE = 50000
+SEARCH_ZIPF_EXPONENT = 1.07
+SEARCH_SYLLABLES = [consonant + vowel for consonant in "bdfghklmnprstvz" for vowel in "aeiou"]
+SEARCH_SYLLABLE_GROWTH = 20
+SEARCH_TITLE_WORDS = (1.8, 0.35)
+SEARCH_CONTENT_WORDS = (4.4, 0.6)
+SEARCH_CORPUS_TOPIC = "Search corpus"
+
+# Search workload: upper bound on the fraction of posts a term in each
+# selectivity bucket matches, terms kept per bucket, vocabulary words tried as
+# candidates, and requests per bucket when benchmarking
+SEARCH_BUCKETS = {
+    "absent": 0.0,
+    "very_rare": 1e-4,
+    "rare": 1e-3,
+    "uncommon": 1e-2,
+    "common": 1e-1,
+    "very_common": 1.0,
+}
+SEARCH_TERMS_PER_BUCKET = 8
+SEARCH_CANDIDATE_TERMS = 400
+SEARCH_BENCH_REQUESTS = 100
+
+# Rows PostgREST returns for one request at most, Supabase's default max-rows,
+# which also caps /posts/search results
+SEARCH_MAX_ROWS = 1000
+
+# Identifies dataset snapshot files and their layout version
+SNAPSHOT_MAGIC = b"WPSNAP\0\0"
+SNAPSHOT_VERSION = 2
+
+# Columns stored for each snapshot section
+SNAPSHOT_SECTIONS = {
+    "users": {"email": "str", "password": "str", "name": "str"},
+    "posts": {"title": "str", "content": "str", "topic": "str", "owner": "int"},
+    "queries": {"text": "str", "department": "str", "owner": "int"},
+    # `messages` holds every message of every conversation, grouped by `length`
+    "conversations": {"sender": "int", "receiver": "int", "length": "int", "messages": "str"},
+}
+
+# Dataset scenarios: the built-in profiles live in SCENARIO_DIR as JSON or
+# TOML, and every other scenario inherits the DEFAULT_SCENARIO unless it
+# names another one in `extends`
+SCENARIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios")
+SCENARIO_SUFFIXES = (".json", ".toml")
+DEFAULT_SCENARIO = "default"
+SCENARIO_COUNTS = ("users", "posts", "queries", "conversations")
+
+# Minutes in the day a scenario's time spread distributes created_at over
+TIME_SPREAD_BINS = 1440
+
+# Nested selects for /agent/getDBData, as tables plus foreign key hint and columns
+db_data_selects = [
+    {"tables": ["post-user", "Posts"], "columns": [["user", "post"], ["post_id", "Title", "Content"]]},
+    {"tables": ["message-user", "Message"], "columns": [["sender", "message"], ["message_id", "message", "seen"]]},
+    {"tables": ["query-user", "Query"], "columns": [["user", "query"], ["query_id", "text", "department"]]}
 ]
 
-post_templates = [
-    {
-        "title": "Understanding {topic} in 2025",
-        "content": "In this comprehensive guide to {topic}, we explore the latest advancements and how they're reshaping our digital landscape. From recent innovations to practical applications, this post covers everything you need to know about {content_detail}."
-    },
-    {
-        "title": "10 Ways {topic} Is Changing Business",
-        "content": "Businesses around the world are adapting to new realities brought by {topic}. This post examines ten significant ways these changes are impacting operations, customer engagement, and future growth. Particularly interesting is how {content_detail}."
-    },
-    {
-        "title": "Beginner's Guide to {topic}",
-        "content": "New to {topic}? This introductory guide breaks down complex concepts into easy-to-understand explanations. We'll walk through fundamental principles and provide practical starting points for implementing {content_detail} in your projects."
-    },
-    {
-        "title": "The Future of {topic}: Predictions for 2026",
-        "content": "What does the future hold for {topic}? Based on current trends and expert insights, we predict major developments in this space over the next year. Pay special attention to our analysis of {content_detail} and its potential impact."
+# --- Helper functions ---
+
+# Rows sampled per batch; seeded output is reproducible for a given batch size
+GENERATION_BATCH_SIZE = 4096
+
+def make_rng(seed, stream):
+    """Return a random generator for one named stream of a seeded run.
+
+    Each generator draws from its own stream, so changing the post count does
+    not change which queries or messages a seed produces.
+    """
+    return random.Random(f"{seed}:{stream}")
+
+def make_np_rng(seed, stream, *keys):
+    """Return a NumPy generator for one named stream, optionally per batch"""
+    return np.random.default_rng([seed, zlib.crc32(stream.encode()), *keys])
+
+class TemplateSet:
+    """str.format templates parsed once into positional formats and field lists.
+
+    Rendering takes a batch of template indexes plus one column of values per
+    field and formats every row of a template in a single map() call, instead
+    of probing each template for placeholders row by row.
+    """
+
+    def __init__(self, templates):
+        self.formats = []
+        self.fields = []
+        for template in templates:
+            fields = []
+            parts = []
+            for literal, field, spec, conversion in string.Formatter().parse(template):
+                parts.append(literal.replace("{", "{{").replace("}", "}}"))
+                if field is not None:
+                    if field not in fields:
+                        fields.append(field)
+                    parts.append("{%d%s%s}" % (
+                        fields.index(field),
+                        f"!{conversion}" if conversion else "",
+                        f":{spec}" if spec else ""
+                    ))
+            self.formats.append("".join(parts))
+            self.fields.append(fields)
+
+    def __len__(self):
+        return len(self.formats)
+
+    @property
+    def field_names(self):
+        """Every field used by at least one template"""
+        return {field for fields in self.fields for field in fields}
+
+    def render(self, template_indexes, columns):
+        """Render one string per row from template indexes and field columns"""
+        out = np.empty(len(template_indexes), dtype=object)
+        for index, (fmt, fields) in enumerate(zip(self.formats, self.fields)):
+            rows = np.flatnonzero(template_indexes == index)
+            if not rows.size:
+                continue
+            if fields:
+                out[rows] = list(map(fmt.format, *(columns[field][rows] for field in fields)))
+            else:
+                out[rows] = fmt
+        return out
+
+def vocabulary(values):
+    """Return a list of strings as an object array for batched fancy indexing"""
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+def sample_columns(rng, vocabularies, fields, size):
+    """Draw one column of values per field from its vocabulary"""
+    return {
+        field: vocabularies[field][rng.integers(0, len(vocabularies[field]), size)]
+        for field in sorted(fields)
     }
-]
 
-# Content details for each topic
-topic_content_details = {
-    "AI Technology Trends": [
-        "large language models and their enterprise applications",
-        "computer vision advancements in healthcare diagnostics",
-        "autonomous systems for manufacturing optimization",
-        "AI ethics and governance frameworks",
-        "multimodal AI interfaces for everyday users",
-        "edge AI implementations in IoT environments",
-        "generative design in architectural planning",
-        "AI-powered predictive maintenance solutions",
-        "natural language processing for customer service automation",
-        "reinforcement learning in complex decision making"
-    ],
-    "Web Development Best Practices": [
-        "modern state management approaches in React applications",
-        "server components and their performance implications",
-        "accessibility implementation for diverse user needs",
-        "full-stack TypeScript architectures",
-        "microfrontend strategies for enterprise applications",
-        "headless CMS integration patterns",
-        "responsive design principles for multi-device experiences",
-        "API design and versioning strategies",
-        "performance optimization techniques for complex web apps",
-        "authentication and authorization best practices"
-    ],
-    "Data Privacy in Modern Applications": [
-        "GDPR compliance strategies for global companies",
-        "privacy-by-design implementation approaches",
-        "data anonymization techniques for analytics",
-        "cookie consent management in contemporary websites",
-        "data portability implementation models",
-        "user data rights management systems",
-        "privacy impact assessment frameworks",
-        "data retention policies and automation",
-        "cross-border data transfer compliance",
-        "privacy training programs for development teams"
-    ],
-    "User Experience Design": [
-        "usability testing methodologies for diverse user groups",
-        "information architecture for complex web applications",
-        "motion design principles for enhanced engagement",
-        "dark mode implementation considerations",
-        "internationalization and localization best practices",
-        "voice user interface design approaches",
-        "microinteractions for improved user feedback",
-        "inclusive design beyond accessibility minimums",
-        "design systems management for distributed teams",
-        "measuring and optimizing for user satisfaction metrics"
+def batches(count, batch_size):
+    """Yield (batch index, first row, rows) covering `count` rows"""
+    for batch, start in enumerate(range(0, count, batch_size)):
+        yield batch, start, min(batch_size, count - start)
+
+def shard_rows(owners, shard):
+    """Return the positions of rows whose owning user belongs to `shard`.
+
+    A shard is (index, count); user u belongs to shard u % count, and every
+    row goes with the user that owns or sends it.
+    """
+    return np.flatnonzero(owners % shard[1] == shard[0])
+
+def generate_users(count=None, scenario=None):
+    """Yield the scenario's fixed users followed by synthetic ones up to `count`"""
+    scenario = load_scenario(scenario)
+    count = scenario.count("users") if count is None else count
+    for index in range(count):
+        if index < len(scenario.users):
+            yield scenario.users[index]
+        else:
+            yield {key: value.format(index=index) for key, value in scenario.synthetic_user.items()}
+
+def owner_sampler(user_count, seed, scenario):
+    """Return a function drawing the owners of posts and queries.
+
+    Owners are uniform unless the scenario skews them, in which case they
+    follow the same popularity ranks as conversations, so the hot posters
+    are also the hot talkers.
+    """
+    if not scenario.owner_zipf_exponent:
+        return lambda rng, size: rng.integers(0, user_count, size)
+    return user_popularity(max(user_count, 1), scenario.owner_zipf_exponent, seed).sample
+
+def generate_post_batches(count=None, user_count=None, seed=None, batch_size=GENERATION_BATCH_SIZE, shard=None,
+                          scenario=None):
+    """Yield batches of post columns: title, content, topic, owner and index arrays.
+
+    The first posts cover every topic and template combination in order, like
+    the original fixed seed; the rest pick both at random, templates by their
+    scenario weights. With a shard, only the posts its users own are
+    rendered, identical to the unsharded rows.
+    """
+    scenario = load_scenario(scenario)
+    user_count = scenario.count("users") if user_count is None else user_count
+    count = scenario.count("posts", user_count) if count is None else count
+    titles, contents = scenario.post_titles, scenario.post_contents
+    topics = vocabulary(scenario.post_topics)
+    vocabularies = scenario.field_vocabularies(scenario.post_fields)
+    draw_owners = owner_sampler(user_count, seed, scenario)
+
+    # Details depend on the topic, so keep them flat with per-topic offsets
+    topic_details = [scenario.vocabulary(scenario.topic_details[topic]) for topic in scenario.post_topics]
+    details = np.concatenate(topic_details)
+    detail_counts = np.array([len(values) for values in topic_details])
+    detail_offsets = np.concatenate(([0], np.cumsum(detail_counts)[:-1]))
+    combinations = len(topics) * len(titles)
+
+    for batch, start, size in batches(count, batch_size):
+        rng = make_np_rng(seed, "posts", batch)
+        # Always draw a full batch so extending the count keeps earlier rows
+        topic_indexes = rng.integers(0, len(topics), batch_size)[:size]
+        template_indexes = scenario.post_templates.sample(rng, batch_size)[:size]
+        detail_draws = rng.random(batch_size)[:size]
+        owners = draw_owners(rng, batch_size)[:size]
+        columns = {
+            field: column[:size]
+            for field, column in sample_columns(rng, vocabularies, vocabularies, batch_size).items()
+        }
+
+        rows = np.arange(start, start + size)
+        first = rows < combinations
+        topic_indexes[first] = rows[first] // len(titles)
+        template_indexes[first] = rows[first] % len(titles)
+
+        detail_indexes = detail_offsets[topic_indexes] + (detail_draws * detail_counts[topic_indexes]).astype(int)
+        if shard:
+            keep = shard_rows(owners, shard)
+            rows, owners, topic_indexes, template_indexes, detail_indexes = (
+                column[keep] for column in (rows, owners, topic_indexes, template_indexes, detail_indexes)
+            )
+            columns = {field: column[keep] for field, column in columns.items()}
+        columns.update(topic=topics[topic_indexes], content_detail=details[detail_indexes])
+        yield {
+            "title": titles.render(template_indexes, columns),
+            "content": contents.render(template_indexes, columns),
+            "topic": columns["topic"],
+            "owner": owners,
+            "index": rows
+        }
+
+def generate_posts(count=None, user_count=None, seed=None, shard=None, corpus="templates", scenario=None):
+    """Lazily generate meaningful post data, each owned by a user index"""
+    generate = generate_search_post_batches if corpus == "search" else generate_post_batches
+    for batch in generate(count, user_count, seed, shard=shard, scenario=scenario):
+        for title, content, topic, owner, index in zip(batch["title"], batch["content"], batch["topic"],
+                                                       batch["owner"].tolist(), batch["index"].tolist()):
+            yield {"title": title, "content": content, "topic": topic, "owner": owner, "index": index}
+
+class SearchCorpus:
+    """Synthetic post text with natural-language-like statistics.
+
+    Words are built from syllables, short at the common ranks and longer in
+    the tail, and drawn with Zipf frequencies, so short words also occur
+    inside longer ones as they do for an ilike substring search. Title and
+    content lengths in words are log-normal.
+    """
+
+    def __init__(self, seed):
+        rng = make_np_rng(seed, "search_vocabulary")
+        words, seen = [], set()
+        drawn = 0
+        while len(words) < SEARCH_VOCABULARY_SIZE:
+            # Draw candidates a vocabulary at a time; duplicates are dropped
+            positions = np.arange(drawn, drawn + SEARCH_VOCABULARY_SIZE)
+            counts = 1 + (np.log(positions + 2) / math.log(SEARCH_SYLLABLE_GROWTH)).astype(int)
+            counts += rng.integers(0, 2, len(positions))
+            draws = rng.integers(0, len(SEARCH_SYLLABLES), (len(positions), int(counts.max())))
+            for count, row in zip(counts.tolist(), draws.tolist()):
+                word = "".join([SEARCH_SYLLABLES[index] for index in row[:count]])
+                if word not in seen and len(words) < SEARCH_VOCABULARY_SIZE:
+                    seen.add(word)
+                    words.append(word)
+            drawn += len(positions)
+        self.words = vocabulary(words)
+        self.probability = (np.arange(1, len(words) + 1) ** -SEARCH_ZIPF_EXPONENT).astype(float)
+        self.probability /= self.probability.sum()
+        self.frequency = AliasTable(self.probability)
+
+    def draw(self, rng, size):
+        """Draw title lengths, content lengths and the flat word ids of `size` posts"""
+        title_lengths = np.clip(np.rint(rng.lognormal(*SEARCH_TITLE_WORDS, size)), 1, None).astype(int)
+        content_lengths = np.clip(np.rint(rng.lognormal(*SEARCH_CONTENT_WORDS, size)), 1, None).astype(int)
+        words = self.frequency.sample(rng, int(title_lengths.sum() + content_lengths.sum()))
+        return title_lengths, content_lengths, words
+
+    def batches(self, count, user_count, seed, batch_size=GENERATION_BATCH_SIZE):
+        """Yield (first row, rows, title lengths, content lengths, word ids, owners) per batch"""
+        for batch, start, size in batches(count, batch_size):
+            rng = make_np_rng(seed, "search_posts", batch)
+            # Always draw a full batch so extending the count keeps earlier rows
+            title_lengths, content_lengths, words = self.draw(rng, batch_size)
+            owners = rng.integers(0, user_count, batch_size)[:size]
+            yield start, size, title_lengths[:size], content_lengths[:size], words, owners
+
+def generate_search_post_batches(count=None, user_count=None, seed=None, batch_size=GENERATION_BATCH_SIZE,
+                                 shard=None, scenario=None):
+    """Yield batches of search corpus posts with the same columns as generate_post_batches.
+
+    Only the scenario's counts apply; the text comes from the search corpus.
+    """
+    scenario = load_scenario(scenario)
+    user_count = scenario.count("users") if user_count is None else user_count
+    count = scenario.count("posts", user_count) if count is None else count
+    corpus = SearchCorpus(seed)
+    for start, size, title_lengths, content_lengths, words, owners in corpus.batches(
+            count, user_count, seed, batch_size):
+        ends = np.cumsum(title_lengths + content_lengths)
+        starts = ends - title_lengths - content_lengths
+        keep = shard_rows(owners, shard) if shard else np.arange(size)
+        tokens = corpus.words[words[:ends[-1] if size else 0]].tolist()
+        titles, contents = [], []
+        for first, split, end in zip(starts[keep].tolist(), (starts + title_lengths)[keep].tolist(),
+                                     ends[keep].tolist()):
+            titles.append(" ".join(tokens[first:split]).capitalize())
+            contents.append(" ".join(tokens[split:end]).capitalize() + ".")
+        yield {
+            "title": vocabulary(titles),
+            "content": vocabulary(contents),
+            "topic": vocabulary([SEARCH_CORPUS_TOPIC] * len(keep)),
+            "owner": owners[keep],
+            "index": start + keep
+        }
+
+def search_selectivity_bucket(hits, count):
+    """Name the SEARCH_BUCKETS entry for a term matching `hits` of `count` posts"""
+    for bucket, bound in SEARCH_BUCKETS.items():
+        if hits <= bound * count:
+            return bucket
+    return bucket
+
+def build_search_workload(post_count=None, user_count=None, seed=None, terms_per_bucket=SEARCH_TERMS_PER_BUCKET,
+                          scenario=None):
+    """Pick search terms per selectivity bucket with their exact expected hit counts.
+
+    A term matches a post when it is a substring of its title or content, as
+    with the backend's ilike filter, so it matches every post holding any
+    vocabulary word that contains it. Candidates are bucketed by their
+    predicted hit rate first. One pass over the corpus then builds the
+    inverted index from posts to the words they contain, mapped onto the
+    candidate terms, and counts each term's posts exactly. Terms that occur
+    in the scenario's post templates are skipped so template posts cannot
+    inflate the counts.
+    """
+    scenario = load_scenario(scenario)
+    user_count = scenario.count("users") if user_count is None else user_count
+    post_count = scenario.count("posts", user_count) if post_count is None else post_count
+    corpus = SearchCorpus(seed)
+    rng = make_np_rng(seed, "search_terms")
+    builtin = " ".join(
+        scenario.post_titles.formats + scenario.post_contents.formats + scenario.post_topics
+        + [detail for name in scenario.topic_details.values() for detail in scenario.vocabulary(name)]
+    ).lower()
+
+    # Predict each candidate's hit rate from the chance of one of its words
+    # appearing in a post of typical length
+    words = corpus.words.astype(str)
+    ranks = np.unique(np.geomspace(1, len(words), SEARCH_CANDIDATE_TERMS).astype(int) - 1)
+    lengths = np.concatenate(corpus.draw(rng, 1000)[:2]).reshape(2, -1).sum(axis=0)
+    candidates = {bucket: [] for bucket in SEARCH_BUCKETS}
+    for rank in rng.permutation(ranks).tolist():
+        term = words[rank]
+        if term in builtin:
+            continue
+        containing = np.flatnonzero(np.char.find(words, term) >= 0)
+        predicted = 1 - np.mean((1 - corpus.probability[containing].sum()) ** lengths)
+        bucket = search_selectivity_bucket(predicted * post_count, post_count)
+        if len(candidates[bucket]) < 2 * terms_per_bucket:
+            candidates[bucket].append((term, containing))
+    # No vocabulary word contains a "q", so these match nothing
+    candidates["absent"] = [
+        (term, np.empty(0, dtype=int))
+        for term in ("q" + word for word in words[rng.integers(0, len(words), terms_per_bucket)])
+        if term not in builtin
     ]
-}
 
-# Query templates
-query_templates = [
-    "I need help understanding how to implement {topic} in my project. Can you provide some guidance?",
-    "What are the best resources to learn about {topic} for a beginner?",
-    "I'm experiencing an issue with {topic} where {issue_detail}. Any suggestions?",
-    "How does {topic} compare to {alternative} in terms of performance and usability?",
-    "Can you explain the technical details behind {topic} and how it works?",
-    "I'm looking for examples of {topic} implementation in real-world scenarios.",
-    "What are the security implications of using {topic} in a production environment?",
-    "Is {topic} suitable for my use case where I need to {use_case_detail}?",
-    "What's the future outlook for {topic} in the next 2-3 years?",
-    "Can you recommend a testing strategy for applications that use {topic}?"
-]
+    terms = [term for bucket in candidates.values() for term, _ in bucket]
+    # Sparse word -> candidate term map, as CSR arrays
+    pairs = sorted(
+        (word, index)
+        for index, (_, containing) in enumerate(item for bucket in candidates.values() for item in bucket)
+        for word in containing.tolist()
+    )
+    pair_words = np.array([word for word, _ in pairs], dtype=np.int64)
+    word_terms = np.array([term for _, term in pairs], dtype=np.int64)
+    indptr = np.searchsorted(pair_words, np.arange(len(words) + 1))
 
-# Query topics
-query_topics = [
-    "Supabase authentication",
-    "Next.js server components",
-    "Tailwind CSS customization",
-    "AI integration with web applications",
-    "GraphQL API design",
-    "PostgreSQL performance tuning",
-    "React state management",
-    "Serverless architecture",
-    "TypeScript configuration",
-    "WebSockets for real-time features"
-]
+    hits = np.zeros(len(terms), dtype=np.int64)
+    for _, size, title_lengths, content_lengths, post_words, _ in corpus.batches(post_count, user_count, seed):
+        lengths = title_lengths + content_lengths
+        posts = np.repeat(np.arange(size), lengths)
+        present = np.unique(posts * len(words) + post_words[:len(posts)])
+        post_ids, word_ids = np.divmod(present, len(words))
+        fanout = indptr[word_ids + 1] - indptr[word_ids]
+        offsets = np.repeat(indptr[word_ids] - np.cumsum(fanout) + fanout, fanout) + np.arange(fanout.sum())
+        matched = np.unique(np.repeat(post_ids, fanout) * len(terms) + word_terms[offsets])
+        hits += np.bincount(matched % len(terms), minlength=len(terms))
 
-# Issue details for queries
-issue_details = [
-    "the authentication flow fails intermittently",
-    "data fetching is slower than expected",
-    "the UI doesn't adapt properly to mobile devices",
-    "memory usage increases unexpectedly over time",
-    "API requests are randomly rejected with 403 errors",
-    "CSS styling is inconsistent across browsers",
-    "user sessions expire too quickly",
-    "database queries time out for large datasets",
-    "the application crashes when processing certain inputs",
-    "file uploads fail for files larger than 5MB"
-]
+    workload = {bucket: [] for bucket in SEARCH_BUCKETS}
+    for term, count in zip(terms, hits.tolist()):
+        bucket = workload[search_selectivity_bucket(count, post_count)]
+        if len(bucket) < terms_per_bucket:
+            bucket.append({"term": term, "expected": count})
+    return {
+        "seed": seed,
+        "user_count": user_count,
+        "post_count": post_count,
+        "corpus": "search",
+        "buckets": {bucket: terms for bucket, terms in workload.items() if terms},
+    }
 
-# Use case details
-use_case_details = [
-    "process large amounts of user-generated content",
-    "support thousands of concurrent users",
-    "maintain sub-second response times",
-    "ensure compliance with financial regulations",
-    "provide offline functionality",
-    "handle sensitive personal information",
-    "integrate with legacy enterprise systems",
-    "support multi-language content",
-    "operate in low-bandwidth environments",
-    "scale dynamically based on demand"
-]
+def generate_query_batches(count=None, user_count=None, seed=None, batch_size=GENERATION_BATCH_SIZE, shard=None,
+                           scenario=None):
+    """Yield batches of query columns: text, department, owner and index arrays.
 
-# Alternatives for comparison queries
-alternatives = [
-    "traditional REST APIs",
-    "custom CSS",
-    "server-side rendering",
-    "manual data processing",
-    "relational databases",
-    "monolithic architecture",
-    "vanilla JavaScript",
-    "on-premises solutions",
-    "client-side processing",
-    "third-party frameworks"
-]
+    Templates and departments are drawn with the scenario's weights.
+    """
+    scenario = load_scenario(scenario)
+    user_count = scenario.count("users") if user_count is None else user_count
+    count = scenario.count("queries", user_count) if count is None else count
+    templates = scenario.query_texts
+    vocabularies = scenario.field_vocabularies(scenario.query_fields)
+    department_names = vocabulary(scenario.departments)
+    draw_owners = owner_sampler(user_count, seed, scenario)
 
-# Message templates for conversations
-message_templates = [
-    "Hi, I have a question about {topic}. {question_detail}",
-    "Thanks for your response. Can you elaborate more on {topic_detail}?",
-    "I'm trying to understand how {topic} works in the context of {context}.",
-    "That makes sense. So if I want to implement {topic}, I should start with {approach}?",
-    "I appreciate the help! One more question - what about {follow_up_topic}?",
-    "Perfect, this clears things up. I'll try implementing your suggestions.",
-    "I'm running into an issue with {topic} where {issue_detail}. Any thoughts?",
-    "I see, so the problem is related to {root_cause}. How can I fix that?",
-    "Great explanation. Do you have any resources you'd recommend for learning more about {topic}?",
-    "Thanks again for all your help with {topic}. This has been very insightful."
-]
+    for batch, start, size in batches(count, batch_size):
+        rng = make_np_rng(seed, "queries", batch)
+        template_indexes = scenario.query_templates.sample(rng, batch_size)[:size]
+        columns = {
+            field: column[:size]
+            for field, column in sample_columns(rng, vocabularies, templates.field_names, batch_size).items()
+        }
+        department_column = department_names[scenario.department_mix.sample(rng, batch_size)[:size]]
+        owners = draw_owners(rng, batch_size)[:size]
+        rows = np.arange(start, start + size)
+        if shard:
+            keep = shard_rows(owners, shard)
+            template_indexes, department_column, owners, rows = (
+                column[keep] for column in (template_indexes, department_column, owners, rows)
+            )
+            columns = {field: column[keep] for field, column in columns.items()}
+        yield {
+            "text": templates.render(template_indexes, columns),
+            "department": department_column,
+            "owner": owners,
+            "index": rows
+        }
 
-# Topic details for messages
-topic_details = [
-    "specifically the authentication flow for social logins",
-    "the performance implications of this approach",
-    "how to implement proper error handling",
-    "the security considerations to keep in mind",
-    "best practices for testing this functionality",
-    "how to ensure it's accessible to all users",
-    "ways to optimize it for mobile devices",
-    "how to handle edge cases gracefully",
-    "the scalability aspects of this solution",
-    "maintenance considerations for long-term projects"
-]
+def generate_queries(count=None, user_count=None, seed=None, shard=None, scenario=None):
+    """Lazily generate meaningful query data, each filed by a user index"""
+    for batch in generate_query_batches(count, user_count, seed, shard=shard, scenario=scenario):
+        for text, department, owner, index in zip(batch["text"], batch["department"], batch["owner"].tolist(),
+                                                  batch["index"].tolist()):
+            yield {"text": text, "department": department, "owner": owner, "index": index}
 
-# Contexts for messages
-contexts = [
-    "a high-traffic e-commerce application",
-    "a financial services platform",
-    "an educational technology solution",
-    "a healthcare management system",
-    "a content management platform",
-    "a real-time collaboration tool",
-    "a mobile-first progressive web app",
-    "an enterprise resource planning system",
-    "a social media platform",
-    "an IoT device management dashboard"
-]
+class AliasTable:
+    """Walker/Vose alias table for O(1) sampling from a discrete distribution"""
 
-# Implementation approaches
-approaches = [
-    "setting up the proper data models and relationships",
-    "implementing the authentication and authorization flows",
-    "designing a responsive and accessible user interface",
-    "establishing proper API contracts between components",
-    "setting up a comprehensive testing strategy",
-    "implementing proper error handling and logging",
-    "optimizing database queries and indexing",
-    "setting up a CI/CD pipeline for reliable deployments",
-    "implementing proper caching strategies",
-    "establishing monitoring and alerting"
-]
+    def __init__(self, weights):
+        count = len(weights)
+        scaled = np.asarray(weights, dtype=float) * count / np.sum(weights)
+        self.probability = np.ones(count)
+        self.alias = np.arange(count)
 
-# Follow-up topics
-follow_up_topics = [
-    "handling error states and edge cases",
-    "performance optimization for scale",
-    "security best practices for this approach",
-    "accessibility considerations",
-    "internationalization and localization",
-    "mobile responsiveness",
-    "offline functionality",
-    "analytics and user behavior tracking",
-    "A/B testing implementation",
-    "compliance with relevant regulations"
-]
+        small = [index for index in range(count) if scaled[index] < 1.0]
+        large = [index for index in range(count) if scaled[index] >= 1.0]
+        scaled = scaled.tolist()
+        probability = self.probability.tolist()
+        alias = self.alias.tolist()
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probability[less] = scaled[less]
+            alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        self.probability = np.array(probability)
+        self.alias = np.array(alias)
 
-# Root causes for issues
-root_causes = [
-    "incorrect configuration settings",
-    "missing dependencies or version conflicts",
-    "incorrect data model relationships",
-    "insufficient error handling",
-    "browser compatibility issues",
-    "performance bottlenecks in the database",
-    "network latency or timeout settings",
-    "insufficient input validation",
-    "memory leaks in the client application",
-    "incompatible API contract versions"
-]
+    def sample(self, rng, size):
+        """Draw `size` indexes in constant time each"""
+        columns = rng.integers(0, len(self.alias), size)
+        return np.where(rng.random(size) < self.probability[columns], columns, self.alias[columns])
 
-# Departments for queries
-departments = ["Technical Support", "Development", "Customer Success", "Product Management"]
+def user_popularity(user_count, zipf_exponent, seed):
+    """Return an alias table over users with Zipf-distributed popularity.
 
-# --- Helper functions ---
+    Popularity ranks are shuffled with the seed, so the hot users are spread
+    across the user list rather than always being the first ones created.
+    """
+    ranks = make_np_rng(seed, "user_ranks").permutation(user_count) + 1
+    return AliasTable(ranks.astype(float) ** -zipf_exponent)
 
-def generate_posts():
-    """Generate meaningful post data"""
-    posts = []
-    
-    for topic in post_topics:
-        for template in post_templates:
-            content_detail = random.choice(topic_content_details[topic])
-            title = template["title"].format(topic=topic)
-            content = template["content"].format(topic=topic, content_detail=content_detail)
-            
-            posts.append({
-                "title": title,
-                "content": content,
-                "topic": topic
-            })
-    
-    # Add a few more random posts to reach desired count
-    while len(posts) < 35:
-        topic = random.choice(post_topics)
-        template = random.choice(post_templates)
-        content_detail = random.choice(topic_content_details[topic])
-        title = template["title"].format(topic=topic)
-        content = template["content"].format(topic=topic, content_detail=content_detail)
-        
-        posts.append({
-            "title": title,
-            "content": content,
-            "topic": topic
-        })
-    
-    return posts
-
-def generate_queries():
-    """Generate meaningful query data"""
-    queries = []
-    
-    for i in range(12):
-        topic = random.choice(query_topics)
-        template = random.choice(query_templates)
-        
-        if "{issue_detail}" in template:
-            text = template.format(topic=topic, issue_detail=random.choice(issue_details))
-        elif "{use_case_detail}" in template:
-            text = template.format(topic=topic, use_case_detail=random.choice(use_case_details))
-        elif "{alternative}" in template:
-            text = template.format(topic=topic, alternative=random.choice(alternatives))
+def generate_message_batches(count=None, user_count=None, seed=None, zipf_exponent=None, mean_length=None,
+                             batch_size=GENERATION_BATCH_SIZE, shard=None, messages=True, scenario=None):
+    """Yield batches of conversations between Zipf-popular users.
+
+    Each batch has sender, receiver, length and index arrays per conversation,
+    plus the flat `messages` array holding every conversation's messages in
+    order. Senders and receivers are drawn from the same power-law popularity,
+    so a few hot users take part in most conversations, and reply chains have
+    a geometric length between 2 and MAX_CONVERSATION_LENGTH. The exponent and
+    mean length default to the scenario's.
+
+    With a shard, only conversations sent by its users are rendered. With
+    messages=False the text is skipped entirely, to find the participants.
+    """
+    scenario = load_scenario(scenario)
+    user_count = scenario.count("users") if user_count is None else user_count
+    count = scenario.count("conversations", user_count) if count is None else count
+    zipf_exponent = scenario.zipf_exponent if zipf_exponent is None else zipf_exponent
+    mean_length = scenario.mean_conversation_length if mean_length is None else mean_length
+    templates = scenario.message_texts
+    vocabularies = scenario.field_vocabularies(scenario.message_fields) if messages else {}
+    popularity = user_popularity(max(user_count, 1), zipf_exponent, seed)
+    # Lengths are 1 + Geometric(p), whose mean is 1 + 1/p
+    continue_probability = 1.0 / max(mean_length - 1.0, 1.0)
+
+    for batch, start, size in batches(count, batch_size):
+        rng = make_np_rng(seed, "messages", batch)
+        # Always draw a full batch so extending the count keeps earlier rows
+        lengths = np.clip(1 + rng.geometric(continue_probability, batch_size), 2, MAX_CONVERSATION_LENGTH)
+        senders = popularity.sample(rng, batch_size)
+        receivers = popularity.sample(rng, batch_size)
+        if user_count > 1:
+            # Redraw self-conversations; each retry only touches the collisions
+            collisions = np.flatnonzero(receivers == senders)
+            while collisions.size:
+                receivers[collisions] = popularity.sample(rng, collisions.size)
+                collisions = collisions[receivers[collisions] == senders[collisions]]
+
+        conversations = np.arange(size)
+        if shard:
+            conversations = shard_rows(senders[:size], shard)
+        if not messages:
+            yield {
+                "sender": senders[conversations],
+                "receiver": receivers[conversations],
+                "length": lengths[conversations],
+                "index": start + conversations
+            }
+            continue
+
+        # Every message of a conversation shares its topic; the first one opens
+        # the conversation and the rest are replies
+        message_count = int(lengths.sum())
+        owners = np.repeat(np.arange(batch_size), lengths)
+        positions = np.arange(message_count) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        replies = scenario.reply_mix.sample(rng, message_count) + scenario.openings
+        columns = sample_columns(rng, vocabularies, templates.field_names - {"topic"}, message_count)
+        topics = vocabularies["topic"]
+        columns["topic"] = topics[rng.integers(0, len(topics), batch_size)][owners]
+        # Drawn last, so scenarios with a single opening keep the original draws
+        openings = scenario.opening_mix.sample(rng, message_count) if scenario.openings > 1 else 0
+        template_indexes = np.where(positions == 0, openings, replies)
+
+        selected = np.zeros(batch_size, dtype=bool)
+        selected[conversations] = True
+        used = np.flatnonzero(selected[owners])
+        columns = {field: column[used] for field, column in columns.items()}
+        yield {
+            "sender": senders[conversations],
+            "receiver": receivers[conversations],
+            "length": lengths[conversations],
+            "index": start + conversations,
+            "messages": templates.render(template_indexes[used], columns)
+        }
+
+def generate_message_pairs(count=None, user_count=None, seed=None, zipf_exponent=None, mean_length=None,
+                           shard=None, scenario=None):
+    """Lazily generate conversations between two user indexes.
+
+    Messages alternate between the sender and the receiver, starting with the
+    sender; a conversation always has at least an initial message and a reply.
+    """
+    for batch in generate_message_batches(count, user_count, seed, zipf_exponent, mean_length, shard=shard,
+                                          scenario=scenario):
+        messages = batch["messages"].tolist()
+        offset = 0
+        for sender, receiver, length, index in zip(batch["sender"].tolist(), batch["receiver"].tolist(),
+                                                   batch["length"].tolist(), batch["index"].tolist()):
+            yield {
+                "sender": sender, "receiver": receiver, "messages": tuple(messages[offset:offset + length]),
+                "index": index
+            }
+            offset += length
+
+# --- Scenarios ---
+
+class WeightedChoice:
+    """Draws indexes by weight, or with integers() when every weight is equal.
+
+    Equal weights keep the draws of plain uniform sampling, so a scenario that
+    sets no weights reproduces the rows earlier seeds produced.
+    """
+
+    def __init__(self, weights):
+        self.count = len(weights)
+        self.table = AliasTable(weights) if len(set(weights)) > 1 else None
+
+    def __len__(self):
+        return self.count
+
+    def sample(self, rng, size):
+        if self.table is None:
+            return rng.integers(0, self.count, size)
+        return self.table.sample(rng, size)
+
+class TimeSpread:
+    """created_at timestamps spread over the `days` before `end`.
+
+    The time of day follows a cosine swinging by `diurnal_amplitude` around
+    its mean and peaking at `peak_hour` UTC, like the traffic curve. Without
+    an `end` the spread ends at the start of the current UTC day.
+    """
+
+    def __init__(self, days, end=None, diurnal_amplitude=0.0, peak_hour=DEFAULT_DIURNAL_PEAK_HOUR,
+                 reply_minutes=10.0):
+        if end:
+            end = datetime.datetime.fromisoformat(end)
+            end = end if end.tzinfo else end.replace(tzinfo=datetime.timezone.utc)
         else:
-            text = template.format(topic=topic)
-        
-        queries.append({
-            "text": text,
-            "department": random.choice(departments),
-            "user_mail": ""  # Will be set during execution
-        })
-    
-    return queries
-
-def generate_message_pairs():
-    """Generate pairs of messages (conversations)"""
-    message_pairs = []
-    
-    for i in range(12):
-        topic = random.choice(query_topics)
-        
-        # First message in conversation
-        initial_template = message_templates[0]
-        question_detail = f"I'm wondering about {random.choice(topic_details).replace('specifically', '')}"
-        initial_message = initial_template.format(topic=topic, question_detail=question_detail)
-        
-        # Response message
-        response_idx = random.randint(1, len(message_templates) - 1)
-        response_template = message_templates[response_idx]
-        
-        if "{topic_detail}" in response_template:
-            response = response_template.format(topic_detail=random.choice(topic_details))
-        elif "{context}" in response_template:
-            response = response_template.format(topic=topic, context=random.choice(contexts))
-        elif "{approach}" in response_template:
-            response = response_template.format(topic=topic, approach=random.choice(approaches))
-        elif "{follow_up_topic}" in response_template:
-            response = response_template.format(follow_up_topic=random.choice(follow_up_topics))
-        elif "{issue_detail}" in response_template:
-            response = response_template.format(topic=topic, issue_detail=random.choice(issue_details))
-        elif "{root_cause}" in response_template:
-            response = response_template.format(root_cause=random.choice(root_causes))
+            end = datetime.datetime.now(datetime.timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.days = int(days)
+        self.end = end.timestamp()
+        self.start = self.end - self.days * 86400
+        self.diurnal_amplitude = float(diurnal_amplitude)
+        self.peak_hour = float(peak_hour)
+        self.reply_gap = float(reply_minutes) * 60
+        hours = np.arange(TIME_SPREAD_BINS) * 24 / TIME_SPREAD_BINS
+        self.minutes = AliasTable(1 + self.diurnal_amplitude * np.cos(2 * np.pi * (hours - self.peak_hour) / 24))
+
+    def sample(self, rng, size):
+        """Draw `size` timestamps in seconds since the epoch"""
+        days = rng.integers(0, self.days, size)
+        minutes = self.minutes.sample(rng, size) + rng.random(size)
+        return self.start + days * 86400 + minutes * (86400 / TIME_SPREAD_BINS)
+
+    def after(self, seconds, floor):
+        """Move a timestamp before `floor` to the same relative place between `floor` and the end"""
+        if seconds >= floor:
+            return seconds
+        return floor + (seconds - self.start) / (self.end - self.start) * max(self.end - floor, 0.0)
+
+    def gaps(self, rng, size):
+        """Draw `size` exponential gaps between consecutive replies, in seconds"""
+        return rng.exponential(self.reply_gap, size)
+
+def format_timestamp(seconds):
+    """Format seconds since the epoch as an ISO 8601 UTC timestamp"""
+    return datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc).isoformat(timespec="milliseconds")
+
+class Scenario:
+    """A dataset profile: entity counts, vocabularies, weighted templates and mixes.
+
+    Built from a scenario file merged over the one it extends. Templates and
+    weights are compiled once here, and every template field is checked to
+    have a vocabulary. A vocabulary given as {"file": PATH} is only read the
+    first time a generator needs it.
+    """
+
+    def __init__(self, spec, name=DEFAULT_SCENARIO):
+        self.name = name
+        self.spec = spec
+        self.vocabularies = spec.get("vocabularies", {})
+        self.loaded = {}
+        try:
+            self.counts = {kind: int(spec["counts"][kind]) for kind in SCENARIO_COUNTS}
+            self.per_user = {kind: float(ratio) for kind, ratio in spec.get("per_user", {}).items()}
+            social = spec["social"]
+            self.zipf_exponent = float(social["zipf_exponent"])
+            self.owner_zipf_exponent = float(social.get("owner_zipf_exponent", 0.0))
+            self.mean_conversation_length = float(social["mean_conversation_length"])
+            self.users = spec["users"]
+            self.synthetic_user = spec["synthetic_user"]
+
+            posts = spec["posts"]
+            texts, weights = self.templates("posts", ("title", "content"))
+            self.post_titles, self.post_contents = TemplateSet(texts["title"]), TemplateSet(texts["content"])
+            self.post_templates = self.choice("posts", weights)
+            self.topic_details = {
+                topic: self.vocabulary_name("posts", f"topic {topic!r}", details)
+                for topic, details in posts["topics"].items()
+            }
+            self.post_topics = list(self.topic_details)
+            self.post_fields = self.fields("posts", self.post_titles.field_names | self.post_contents.field_names,
+                                           {"topic", "content_detail"})
+
+            texts, weights = self.templates("queries", ("text",))
+            self.query_texts = TemplateSet(texts["text"])
+            self.query_templates = self.choice("queries", weights)
+            self.query_fields = self.fields("queries", self.query_texts.field_names)
+            departments = spec["queries"]["departments"]
+            self.departments = list(departments)
+            self.department_mix = self.choice("queries", list(departments.values()), "departments")
+
+            messages = spec["messages"]
+            self.openings = len(messages["openings"])
+            texts, weights = self.templates("messages", ("text",), "replies")
+            self.message_texts = TemplateSet(messages["openings"] + texts["text"])
+            self.opening_mix = WeightedChoice([1.0] * self.openings)
+            self.reply_mix = self.choice("messages", weights)
+            self.message_fields = self.fields("messages", self.message_texts.field_names | {"topic"})
+
+            self.search_terms = spec.get("search_terms") or self.post_topics
+            self.time_spread = TimeSpread(**spec["time_spread"]) if spec.get("time_spread") else None
+        except KeyError as e:
+            raise SystemExit(f"Scenario {name} has no {e}")
+        except (TypeError, ValueError) as e:
+            raise SystemExit(f"Scenario {name} is invalid: {e}")
+
+        if min(self.counts.values()) < 0 or min(self.per_user.values(), default=0) < 0:
+            raise SystemExit(f"Scenario {name} has a negative count")
+        if set(self.per_user) - set(SCENARIO_COUNTS[1:]):
+            raise SystemExit(f"Scenario {name} can only scale {', '.join(SCENARIO_COUNTS[1:])} per user")
+        if self.zipf_exponent < 0 or self.owner_zipf_exponent < 0 or self.mean_conversation_length < 2:
+            raise SystemExit(f"Scenario {name} needs non-negative Zipf exponents and conversations of 2 or more")
+        if not self.post_topics or not self.departments or not self.openings:
+            raise SystemExit(f"Scenario {name} needs at least one post topic, department and opening message")
+        if self.time_spread and self.time_spread.days < 1:
+            raise SystemExit(f"Scenario {name} has to spread created_at over at least one day")
+
+    def templates(self, section, parts, key="templates"):
+        """Return one list per template part and the weights of a section's templates.
+
+        A template is a plain string or a table of its parts and an optional
+        weight; a separate `weights` list reweights inherited templates.
+        """
+        entries = self.spec[section][key]
+        texts = {part: [] for part in parts}
+        weights = []
+        for entry in entries:
+            entry = {"text": entry} if isinstance(entry, str) else entry
+            for part in parts:
+                texts[part].append(entry[part])
+            weights.append(float(entry.get("weight", 1.0)))
+        weights = [float(weight) for weight in self.spec[section].get("weights", weights)]
+        if len(weights) != len(entries):
+            raise SystemExit(
+                f"Scenario {self.name} has {len(weights)} {section} weights for {len(entries)} templates"
+            )
+        return texts, weights
+
+    def choice(self, section, weights, what="templates"):
+        if not weights or min(weights) < 0 or not sum(weights):
+            raise SystemExit(f"Scenario {self.name} needs {section} {what} with non-negative weights summing above 0")
+        return WeightedChoice(weights)
+
+    def vocabulary_name(self, section, what, value):
+        """Name the vocabulary `value` refers to, registering inline lists and files under a new name"""
+        if isinstance(value, str):
+            if value not in self.vocabularies:
+                raise SystemExit(f"Scenario {self.name}: {section} {what} names no vocabulary {value!r}")
+            return value
+        name = f"{section} {what}"
+        self.vocabularies[name] = value
+        return name
+
+    def fields(self, section, fields, special=()):
+        """Map each template field to its vocabulary, by the section's `fields` table or by name"""
+        names = self.spec[section].get("fields", {})
+        return {
+            field: self.vocabulary_name(section, f"field {{{field}}}", names.get(field, field))
+            for field in sorted(set(fields) - set(special))
+        }
+
+    def vocabulary(self, name):
+        """Return a vocabulary as an object array, reading it from its file on first use"""
+        if name not in self.loaded:
+            values = self.vocabularies[name]
+            if isinstance(values, dict):
+                with open(values["file"], encoding="utf-8") as file:
+                    values = [line.strip() for line in file if line.strip()]
+            if not values:
+                raise SystemExit(f"Scenario {self.name}: vocabulary {name!r} is empty")
+            self.loaded[name] = vocabulary(values)
+        return self.loaded[name]
+
+    def field_vocabularies(self, fields):
+        """Return the vocabulary of each field in a `fields` mapping"""
+        return {field: self.vocabulary(name) for field, name in fields.items()}
+
+    def count(self, kind, user_count=None):
+        """Rows of one kind, scaled to `user_count` when the scenario gives a per-user ratio"""
+        if kind in self.per_user:
+            users = self.counts["users"] if user_count is None else user_count
+            return int(round(users * self.per_user[kind]))
+        return self.counts[kind]
+
+def scenario_path(source, directory=None):
+    """Resolve a built-in scenario name, or a scenario file path.
+
+    Paths are relative to `directory`, which is that of the scenario file
+    naming them in `extends`, or to the current directory when given on the
+    command line.
+    """
+    if os.path.splitext(source)[1] in SCENARIO_SUFFIXES or "/" in source or os.sep in source:
+        path = os.path.join(directory or os.getcwd(), os.path.expanduser(source))
+    else:
+        candidates = [os.path.join(SCENARIO_DIR, source + suffix) for suffix in SCENARIO_SUFFIXES]
+        path = next((candidate for candidate in candidates if os.path.isfile(candidate)), None)
+        if path is None:
+            raise SystemExit(f"No built-in scenario {source!r}; choose from {', '.join(builtin_scenarios())}")
+    if not os.path.isfile(path):
+        raise SystemExit(f"Scenario file {path} does not exist")
+    return os.path.abspath(path)
+
+def builtin_scenarios():
+    """Names of the scenarios shipped in SCENARIO_DIR"""
+    if not os.path.isdir(SCENARIO_DIR):
+        return []
+    return sorted(
+        name for name, suffix in map(os.path.splitext, os.listdir(SCENARIO_DIR)) if suffix in SCENARIO_SUFFIXES
+    )
+
+def scenario_source(source):
+    """Return a scenario as a run records it: a built-in name as is, a file as its absolute path"""
+    return source if source in builtin_scenarios() else scenario_path(source)
+
+def read_scenario(source, directory=None, extended=()):
+    """Read a scenario file merged over the one it extends, DEFAULT_SCENARIO unless it says otherwise.
+
+    Top-level tables merge key by key, so a profile only lists what it
+    changes; anything else, including lists and tables inside sections,
+    replaces the inherited value. Vocabulary files and `extends` paths are
+    resolved against the directory of the scenario naming them.
+    """
+    path = scenario_path(source, directory)
+    if path in extended:
+        raise SystemExit(f"Scenario {path} extends itself")
+    try:
+        if path.endswith(".toml"):
+            try:
+                import tomllib
+            except ImportError:
+                raise SystemExit("TOML scenarios need Python 3.11 or later; use JSON instead")
+            with open(path, "rb") as file:
+                spec = tomllib.load(file)
         else:
-            response = response_template.format(topic=topic)
-        
-        message_pairs.append((initial_message, response))
-    
-    return message_pairs
+            with open(path, encoding="utf-8") as file:
+                spec = json.load(file)
+    except ValueError as e:
+        raise SystemExit(f"Cannot parse scenario {path}: {e}")
 
-# --- Main execution function ---
+    here = os.path.dirname(path)
+    for values in spec.get("vocabularies", {}).values():
+        if isinstance(values, dict) and "file" in values:
+            values["file"] = os.path.join(here, os.path.expanduser(values["file"]))
+    default = path == scenario_path(DEFAULT_SCENARIO)
+    parent = spec.pop("extends", None if default else DEFAULT_SCENARIO)
+    if not parent:
+        return spec
+    merged = read_scenario(parent, here, extended + (path,))
+    for key, value in spec.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = {**merged[key], **value}
+        else:
+            merged[key] = value
+    return merged
+
+@functools.lru_cache(maxsize=None)
+def open_scenario(source):
+    return Scenario(read_scenario(source), source)
+
+def load_scenario(scenario=None):
+    """Return a Scenario as is, or load one by built-in name or path, DEFAULT_SCENARIO when None"""
+    if isinstance(scenario, Scenario):
+        return scenario
+    return open_scenario(scenario or DEFAULT_SCENARIO)
+
+# --- Datasets and snapshots ---
+
+class GeneratedDataset:
+    """A seeded dataset produced on the fly by the generate_* functions.
+
+    With a shard, posts, queries and conversations are limited to the rows
+    owned by that shard's users; users() still lists everyone. The post
+    corpus is either the topic templates or the synthetic search corpus.
+    Counts and social shape left as None come from the scenario, with
+    per-user ratios scaled to the user count.
+    """
+
+    def __init__(self, user_count=None, post_count=None, query_count=None, conversation_count=None, seed=None,
+                 zipf_exponent=None, mean_conversation_length=None, shard=None, corpus="templates", scenario=None):
+        self.scenario = load_scenario(scenario)
+        self.user_count = self.scenario.count("users") if user_count is None else user_count
+        self.post_count = self.scenario.count("posts", self.user_count) if post_count is None else post_count
+        self.query_count = self.scenario.count("queries", self.user_count) if query_count is None else query_count
+        self.conversation_count = (
+            self.scenario.count("conversations", self.user_count) if conversation_count is None
+            else conversation_count
+        )
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self.zipf_exponent = self.scenario.zipf_exponent if zipf_exponent is None else zipf_exponent
+        self.mean_conversation_length = (
+            self.scenario.mean_conversation_length if mean_conversation_length is None else mean_conversation_length
+        )
+        self.shard = shard
+        self.corpus = corpus
+
+    def users(self):
+        return generate_users(self.user_count, self.scenario)
+
+    def posts(self):
+        return generate_posts(self.post_count, self.user_count, self.seed, self.shard, self.corpus, self.scenario)
+
+    def queries(self):
+        return generate_queries(self.query_count, self.user_count, self.seed, self.shard, self.scenario)
+
+    def message_pairs(self):
+        return generate_message_pairs(
+            self.conversation_count, self.user_count, self.seed, self.zipf_exponent, self.mean_conversation_length,
+            self.shard, self.scenario
+        )
+
+    def participants(self):
+        """Yield sender and receiver arrays of the conversations, without their text"""
+        return generate_message_batches(
+            self.conversation_count, self.user_count, self.seed, self.zipf_exponent, self.mean_conversation_length,
+            shard=self.shard, messages=False, scenario=self.scenario
+        )
+
+    def batches(self, section):
+        """Yield column batches for one snapshot section"""
+        if section == "users":
+            chunk = []
+            for user in self.users():
+                chunk.append(user)
+                if len(chunk) == GENERATION_BATCH_SIZE:
+                    yield {column: [user.get(column, "") for user in chunk] for column in SNAPSHOT_SECTIONS[section]}
+                    chunk = []
+            if chunk:
+                yield {column: [user.get(column, "") for user in chunk] for column in SNAPSHOT_SECTIONS[section]}
+        elif section == "posts":
+            generate = generate_search_post_batches if self.corpus == "search" else generate_post_batches
+            yield from generate(self.post_count, self.user_count, self.seed, scenario=self.scenario)
+        elif section == "queries":
+            yield from generate_query_batches(self.query_count, self.user_count, self.seed, scenario=self.scenario)
+        elif section == "conversations":
+            yield from generate_message_batches(
+                self.conversation_count, self.user_count, self.seed, self.zipf_exponent,
+                self.mean_conversation_length, scenario=self.scenario
+            )
+
+class SnapshotDataset:
+    """A dataset replayed from a memory-mapped snapshot file.
+
+    Columns are NumPy views straight onto the mapping, so opening a snapshot of
+    any size is instant and rows are only decoded as they are sent. A shard
+    limits rows the same way as for GeneratedDataset.
+    """
+
+    def __init__(self, path, shard=None):
+        self.path = path
+        self.shard = shard
+        with open(path, "rb") as file:
+            try:
+                self.mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise SystemExit(f"{path} is not a dataset snapshot")
+        size = len(self.mapping)
+        trailer = len(SNAPSHOT_MAGIC) + 8
+        if (size < 2 * len(SNAPSHOT_MAGIC) + 8 or self.mapping[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC
+                or self.mapping[-len(SNAPSHOT_MAGIC):] != SNAPSHOT_MAGIC):
+            raise SystemExit(f"{path} is not a dataset snapshot")
+        (header_size,) = struct.unpack("<Q", self.mapping[size - trailer:size - len(SNAPSHOT_MAGIC)])
+        self.header = json.loads(self.mapping[size - trailer - header_size:size - trailer])
+        if self.header["version"] != SNAPSHOT_VERSION:
+            raise SystemExit(f"{path} has snapshot version {self.header['version']}, expected {SNAPSHOT_VERSION}")
+
+        self.seed = self.header["seed"]
+        sections = self.header["sections"]
+        self.user_count = sections["users"]["rows"]
+        self.post_count = sections["posts"]["rows"]
+        self.query_count = sections["queries"]["rows"]
+        self.conversation_count = sections["conversations"]["rows"]
+
+    def column(self, section, name):
+        """Return a column as a zero-copy array: offsets for strings, values for ints"""
+        meta = self.header["sections"][section]["columns"][name]
+        if meta["type"] == "str":
+            return np.frombuffer(self.mapping, dtype="<u8", count=meta["items"] + 1, offset=meta["offsets"])
+        return np.frombuffer(self.mapping, dtype="<i8", count=meta["items"], offset=meta["values"])
+
+    def strings(self, section, name, start, stop):
+        """Decode items start..stop of a string column"""
+        meta = self.header["sections"][section]["columns"][name]
+        offsets = (self.column(section, name)[start:stop + 1] + meta["data"]).tolist()
+        return [self.mapping[begin:end].decode() for begin, end in zip(offsets, offsets[1:])]
+
+    def rows(self, section, shard=None):
+        """Yield one dict per row with its index, decoding strings a batch at a time"""
+        columns = self.header["sections"][section]["columns"]
+        arrays = {name: self.column(section, name) for name in columns}
+        rows = self.header["sections"][section]["rows"]
+        for _, start, size in batches(rows, GENERATION_BATCH_SIZE):
+            values = {}
+            for name, meta in columns.items():
+                if meta["type"] == "str":
+                    values[name] = self.strings(section, name, start, start + size)
+                else:
+                    values[name] = arrays[name][start:start + size].tolist()
+            keep = shard_rows(arrays["owner"][start:start + size], shard).tolist() if shard else range(size)
+            for position in keep:
+                row = {name: column[position] for name, column in values.items()}
+                row["index"] = start + position
+                yield row
+
+    def users(self):
+        for row in self.rows("users"):
+            del row["index"]
+            yield row
+
+    def posts(self):
+        return self.rows("posts", self.shard)
+
+    def queries(self):
+        return self.rows("queries", self.shard)
+
+    def message_pairs(self):
+        senders = self.column("conversations", "sender")
+        receivers = self.column("conversations", "receiver")
+        lengths = self.column("conversations", "length")
+        first = 0
+        for _, start, size in batches(self.conversation_count, GENERATION_BATCH_SIZE):
+            chunk_lengths = lengths[start:start + size].tolist()
+            ends = np.cumsum(chunk_lengths).tolist()
+            keep = shard_rows(senders[start:start + size], self.shard).tolist() if self.shard else range(size)
+            if len(keep):
+                messages = self.strings("conversations", "messages", first, first + ends[-1])
+                for position in keep:
+                    yield {
+                        "sender": int(senders[start + position]),
+                        "receiver": int(receivers[start + position]),
+                        "messages": tuple(messages[ends[position] - chunk_lengths[position]:ends[position]]),
+                        "index": start + position
+                    }
+            first += sum(chunk_lengths)
+
+    def participants(self):
+        """Yield sender and receiver arrays of the conversations, without their text"""
+        senders = self.column("conversations", "sender")
+        receivers = self.column("conversations", "receiver")
+        keep = shard_rows(senders, self.shard) if self.shard else slice(None)
+        yield {"sender": senders[keep], "receiver": receivers[keep]}
+
+def write_snapshot(path, dataset):
+    """Write a dataset to a columnar snapshot file.
+
+    Layout: magic, then per column either little-endian int64 values or uint64
+    string offsets followed by the UTF-8 data, each 8-byte aligned, then a JSON
+    header describing where every column lives, its length and the magic again.
+    A string column may hold several items per row, like conversation messages.
+    Columns are spooled to temporary files while generating, so memory stays
+    flat at any row count.
+    """
+    header = {"version": SNAPSHOT_VERSION, "seed": dataset.seed, "scenario": dataset.scenario.name, "sections": {}}
+    directory = os.path.dirname(os.path.abspath(path))
+    started = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(dir=directory) as spool_dir, \
+            open(path + ".tmp", "wb") as out:
+        out.write(SNAPSHOT_MAGIC)
+
+        for section, column_types in SNAPSHOT_SECTIONS.items():
+            spools = {}
+            sizes = dict.fromkeys(column_types, 0)
+            items = dict.fromkeys(column_types, 0)
+            rows = 0
+            with contextlib.ExitStack() as stack:
+                for name, kind in column_types.items():
+                    parts = ("offsets", "data") if kind == "str" else ("values",)
+                    spools[name] = {
+                        part: stack.enter_context(open(os.path.join(spool_dir, f"{section}.{name}.{part}"), "w+b"))
+                        for part in parts
+                    }
+                    if kind == "str":
+                        spools[name]["offsets"].write(np.zeros(1, dtype="<u8").tobytes())
+
+                for batch in dataset.batches(section):
+                    for name, kind in column_types.items():
+                        if kind == "str":
+                            encoded = [value.encode() for value in batch[name]]
+                            ends = np.cumsum([len(value) for value in encoded], dtype="<u8") + sizes[name]
+                            spools[name]["offsets"].write(ends.tobytes())
+                            spools[name]["data"].write(b"".join(encoded))
+                            sizes[name] = int(ends[-1]) if len(ends) else sizes[name]
+                        else:
+                            spools[name]["values"].write(np.asarray(batch[name], dtype="<i8").tobytes())
+                        items[name] += len(batch[name])
+                    rows += len(batch[next(iter(column_types))])
+
+                columns = {}
+                for name, parts in spools.items():
+                    columns[name] = {"type": column_types[name], "items": items[name]}
+                    for part, spool in parts.items():
+                        out.write(b"\0" * (-out.tell() % 8))
+                        columns[name][part] = out.tell()
+                        spool.seek(0)
+                        shutil.copyfileobj(spool, out, 1 << 20)
+                header["sections"][section] = {"rows": rows, "columns": columns}
+            print(f"Wrote {rows} {section} to snapshot")
+
+        encoded_header = json.dumps(header).encode()
+        out.write(encoded_header)
+        out.write(struct.pack("<Q", len(encoded_header)))
+        out.write(SNAPSHOT_MAGIC)
+
+    os.replace(path + ".tmp", path)
+    size = os.path.getsize(path)
+    print(f"\nSnapshot {path} written in {time.perf_counter() - started:.2f}s ({size / 1e6:,.1f} MB)")
+
+def run_email(email, run_id):
+    """Move an email address to the run's subdomain, as in jane@<run ID>.example.com"""
+    local, _, domain = email.rpartition("@")
+    return f"{local}@{run_id}.{domain}"
+
+class TaggedDataset:
+    """Another dataset's rows tagged with a run ID, so teardown can find them.
+
+    Every user's email moves to the run's subdomain, and the text of every
+    post, query and message ends in the run marker. Everything else, such as
+    counts and the seed, is the wrapped dataset's.
+    """
+
+    def __init__(self, dataset, run_id):
+        self.dataset = dataset
+        self.run_id = run_id
+        self.marker = RUN_MARKER.format(run_id=run_id)
+
+    def __getattr__(self, name):
+        return getattr(self.dataset, name)
+
+    def users(self):
+        for user in self.dataset.users():
+            yield dict(user, email=run_email(user["email"], self.run_id))
+
+    def posts(self):
+        for post in self.dataset.posts():
+            yield dict(post, content=post["content"] + self.marker)
+
+    def queries(self):
+        for query in self.dataset.queries():
+            yield dict(query, text=query["text"] + self.marker)
+
+    def message_pairs(self):
+        for conversation in self.dataset.message_pairs():
+            yield dict(conversation, messages=tuple(message + self.marker for message in conversation["messages"]))
+
+def open_dataset(snapshot_path=None, user_count=None, post_count=None, query_count=None, conversation_count=None,
+                 seed=None, zipf_exponent=None, mean_conversation_length=None, shard=None, corpus="templates",
+                 scenario=None, run_id=None):
+    """Return the snapshot at `snapshot_path`, or a generated dataset of the given size.
+
+    With a run ID, the dataset's rows are tagged with it.
+    """
+    if snapshot_path:
+        dataset = SnapshotDataset(snapshot_path, shard)
+        if seed is not None and seed != dataset.seed:
+            raise SystemExit(f"Snapshot {snapshot_path} was generated with seed {dataset.seed}, not {seed}")
+    else:
+        dataset = GeneratedDataset(
+            user_count, post_count, query_count, conversation_count, seed, zipf_exponent, mean_conversation_length,
+            shard, corpus, scenario
+        )
+    return TaggedDataset(dataset, run_id) if run_id else dataset
+
+def shard_users(dataset):
+    """Return the (index, user) pairs a run has to authenticate.
+
+    That is every user without a shard. A shard needs its own users plus the
+    other side of each conversation it sends, since replies are sent as them;
+    those are logged in, or signed up if their own shard has not got to them.
+    """
+    if not dataset.shard:
+        return list(enumerate(dataset.users()))
+    index, count = dataset.shard
+    needed = np.zeros(dataset.user_count, dtype=bool)
+    needed[index::count] = True
+    for batch in dataset.participants():
+        needed[batch["receiver"]] = True
+    return [(position, user) for position, user in enumerate(dataset.users()) if needed[position]]
+
+# --- Response helpers ---
 
 def extract_user_id_from_response(response_text):
     """Extract user ID from various response formats"""
@@ -391,162 +1393,3764 @@ def extract_user_id_from_response(response_text):
         print(f"Could not parse JSON response: {response_text}")
         return None
 
-def populate_database():
-    """Populate the database with test data"""
-    print("Starting database population...")
-    
-    # --- Create users ---
-    user_ids = []
-    print("\nCreating users...")
-    
-    # Define endpoint URLs based on your API
-    signup_url = f"{BASE_URL}/auth/signup"
-    login_url = f"{BASE_URL}/auth/login"
-    
-    for user in users:
+def extract_token_from_response(response_text):
+    """Extract the JWT returned by /auth/signup or /auth/login"""
+    try:
+        data = json.loads(response_text)
+    except json.JSONDecodeError:
+        return None
+    token = data.get('token') if isinstance(data, dict) else None
+    if not token:
+        print(f"Could not find token in response: {data}")
+    return token
+
+def extract_entity_id_from_response(response_text, container, key):
+    """Extract a created row's ID, such as post.post_id, if the response has one"""
+    try:
+        data = json.loads(response_text)
+        return data[container][key]
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return None
+
+
+def is_success(status):
+    """Return True for any 2xx status code"""
+    return 200 <= status < 300
+
+# --- Progress journal ---
+
+class SeedJournal:
+    """SQLite record of every entity a seed run has created.
+
+    Each entity is keyed by its kind and its position in the seeded generator,
+    which is stable for a given seed, so a rerun with the same journal skips
+    work that already succeeded and resumes where the last run stopped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        # WAL with synchronous=NORMAL makes each commit survive a process crash cheaply
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS entities (
+                kind TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                entity_id TEXT,
+                PRIMARY KEY (kind, idx)
+            ) WITHOUT ROWID;
+        """)
+        self.done = {}
+
+    def resolve_seed(self, seed):
+        """Return the journal's seed, storing `seed` if the journal is new"""
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'seed'").fetchone()
+        if row is None:
+            seed = random.randrange(2**32) if seed is None else seed
+            self.connection.execute("INSERT INTO meta VALUES ('seed', ?)", (str(seed),))
+            self.connection.commit()
+            return seed
+        if seed is not None and seed != int(row[0]):
+            raise SystemExit(
+                f"Journal {self.path} was written with seed {row[0]}, not {seed}. "
+                "Use the same seed or a new journal."
+            )
+        return int(row[0])
+
+    def check_run_id(self, run_id):
+        """Store the journal's run ID if it is new, or fail if a resumed run would tag rows differently"""
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'run_id'").fetchone()
+        if row is None:
+            self.connection.execute("INSERT INTO meta VALUES ('run_id', ?)", (run_id or "",))
+            self.connection.commit()
+        elif row[0] != (run_id or ""):
+            tagged = f"with --run-id {row[0]}" if row[0] else "without --run-id"
+            raise SystemExit(f"Journal {self.path} was written {tagged}. Resume it the same way or use a new journal.")
+
+    def load(self, kind, count):
+        """Load which of the first `count` entities of a kind are already done"""
+        done = bytearray((count + 7) // 8)
+        for (index,) in self.connection.execute(
+            "SELECT idx FROM entities WHERE kind = ? AND idx < ?", (kind, count)
+        ):
+            done[index >> 3] |= 1 << (index & 7)
+        self.done[kind] = done
+        return sum(bin(byte).count("1") for byte in done)
+
+    def is_done(self, kind, index):
+        done = self.done.get(kind)
+        return bool(done) and index < len(done) * 8 and bool(done[index >> 3] & (1 << (index & 7)))
+
+    def record(self, kind, index, entity_id=None):
+        """Durably mark one entity as created"""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO entities VALUES (?, ?, ?)", (kind, index, entity_id)
+        )
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+# --- Credential cache ---
+
+def jwt_expiry(token):
+    """Return the `exp` claim of a JWT without verifying it, or None"""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))["exp"]
+    except (AttributeError, IndexError, KeyError, ValueError):
+        return None
+
+class TokenCache:
+    """On-disk cache of each user's user_id and JWT, keyed by API and email.
+
+    Entries are used until shortly before the token expires, so repeated runs
+    skip the bcrypt-heavy /auth/signup and /auth/login calls for known users.
+    """
+
+    def __init__(self, path, base_url):
+        self.path = path
+        self.base_url = base_url
+        self.entries = {}
+        self.changed = False
         try:
-            # Sign up user
-            print(f"Signing up user {user['email']}...")
-            
-            # This assumes your signup endpoint accepts email, password, and name
-            signup_response = requests.post(signup_url, json={
-                "email": user["email"],
-                "password": user["password"],
-                "name": user.get("name", "")
-            })
-            
-            user_id = None
-            
-            # Check if the response indicates success (could be 200, 201, etc.)
-            if signup_response.status_code >= 200 and signup_response.status_code < 300:
-                print(f"Successfully signed up user {user['email']}")
-                user_id = extract_user_id_from_response(signup_response.text)
-            else:
-                # If signup failed due to user already existing, try to login
-                print(f"Sign up failed or user exists, trying to login {user['email']}...")
-                login_response = requests.post(login_url, json={
-                    "email": user["email"],
-                    "password": user["password"]
-                })
-                
-                if login_response.status_code >= 200 and login_response.status_code < 300:
-                    print(f"Successfully logged in user {user['email']}")
-                    user_id = extract_user_id_from_response(login_response.text)
-                else:
-                    print(f"Failed to login user {user['email']}: {login_response.text}")
-            
-            # If we have a user_id, add it to our list
-            if user_id:
-                user_ids.append({
-                    "id": user_id,
-                    "email": user["email"]
-                })
-                print(f"User ID for {user['email']}: {user_id}")
-            
-        except Exception as e:
-            print(f"Error processing user {user['email']}: {str(e)}")
-    
-    if not user_ids:
-        print("No users created or found. Exiting...")
-        return
-    
-    print(f"Created/found {len(user_ids)} users")
-    
-    # --- Create posts ---
-    posts = generate_posts()
-    print(f"\nCreating {len(posts)} posts...")
-    
-    for post in posts:
+            with open(path, encoding="utf-8") as file:
+                self.entries = json.load(file)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable token cache {path}: {e}")
+        self.users = self.entries.setdefault(base_url, {})
+
+    def get(self, email):
+        """Return (user_id, token) for a user whose token is still valid"""
+        entry = self.users.get(email)
+        if entry and entry["expires_at"] > time.time() + TOKEN_EXPIRY_MARGIN:
+            return entry["user_id"], entry["token"]
+        return None
+
+    def put(self, email, user_id, token):
+        expires_at = jwt_expiry(token)
+        if expires_at:
+            self.users[email] = {"user_id": user_id, "token": token, "expires_at": expires_at}
+            self.changed = True
+
+    def forget(self, matches):
+        """Drop every cached user, under any API, whose email `matches`, and return how many were dropped"""
+        dropped = 0
+        for users in self.entries.values():
+            for email in [email for email in users if matches(email)]:
+                del users[email]
+                dropped += 1
+        self.changed = self.changed or bool(dropped)
+        return dropped
+
+    def save(self):
+        """Atomically write the cache if any entry changed"""
+        if not self.changed:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with tempfile.NamedTemporaryFile("w", dir=directory, delete=False, encoding="utf-8") as file:
+            json.dump(self.entries, file)
+        os.replace(file.name, self.path)
+        self.changed = False
+
+# --- Entity registry ---
+
+class EntityRegistry:
+    """IDs of created entities packed into one NumPy record array per kind.
+
+    A UUID takes 16 bytes and a user index 4, so ten million posts and
+    messages fit in a few hundred MB instead of gigabytes of dicts. Columns
+    not given are -1. Arrays double as they fill; past REGISTRY_MEMORY_ROWS
+    rows they spill to memory-mapped files under `spill_dir`, which the OS
+    can page out. Rows are addressed by position, so sampling one is O(1).
+    `details` records the dataset the IDs belong to, its scenario and user
+    count, so it can be regenerated to verify them.
+    """
+
+    def __init__(self, spill_dir=None):
+        self.spill_dir = spill_dir
+        self.spilled = None
+        self.files = {}
+        self.arrays = {kind: np.zeros(1024, dtype=list(columns)) for kind, columns in REGISTRY_COLUMNS.items()}
+        self.counts = dict.fromkeys(REGISTRY_COLUMNS, 0)
+        self.details = {}
+
+    @classmethod
+    def load(cls, directory):
+        """Open a saved registry with its arrays mapped read-only"""
+        registry = cls()
+        for kind in REGISTRY_COLUMNS:
+            path = os.path.join(directory, f"{kind}.npy")
+            if os.path.exists(path):
+                registry.arrays[kind] = np.load(path, mmap_mode="r")
+                registry.counts[kind] = len(registry.arrays[kind])
         try:
-            user = random.choice(user_ids)
-            
-            create_post_url = f"{BASE_URL}/posts/add_post"
-            post_data = {
-                "title": post["title"],
-                "content": post["content"],
-                "user_id": user["id"]
-            }
-            
-            response = requests.post(create_post_url, json=post_data)
-            
-            if response.status_code >= 200 and response.status_code < 300:
-                print(f"Created post: {post['title'][:30]}...")
+            with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as file:
+                registry.details = json.load(file).get("dataset", {})
+        except FileNotFoundError:
+            pass
+        return registry
+
+    def grow(self, kind, capacity):
+        old = self.arrays[kind]
+        if capacity <= REGISTRY_MEMORY_ROWS:
+            array = np.zeros(capacity, dtype=old.dtype)
+            array[:len(old)] = old
+        else:
+            if self.spilled is None:
+                self.spilled = tempfile.mkdtemp(prefix="seed-registry-", dir=self.spill_dir)
+            dtype = old.dtype
+            path = self.files.get(kind)
+            if path:
+                # Growing the file in place keeps the rows that already spilled
+                old.flush()
+                self.arrays[kind] = old = None
             else:
-                print(f"Failed to create post: {response.text}")
-            
-            # Add a small delay to prevent overwhelming the server
-            time.sleep(0.2)
-            
-        except Exception as e:
-            print(f"Error creating post: {str(e)}")
-    
-    # --- Create queries ---
-    queries = generate_queries()
-    print(f"\nCreating {len(queries)} queries...")
-    
-    for query in queries:
+                path = self.files[kind] = os.path.join(self.spilled, f"{kind}.bin")
+            with open(path, "ab") as file:
+                file.truncate(capacity * dtype.itemsize)
+            array = np.memmap(path, dtype=dtype, mode="r+", shape=(capacity,))
+            if old is not None:
+                array[:len(old)] = old
+        self.arrays[kind] = array
+
+    def add(self, kind, entity_id, **columns):
+        """Append one entity and return its position, or None if its ID is not a UUID"""
         try:
-            user = random.choice(user_ids)
-            query["user_mail"] = user["email"]
-            
-            response = requests.post(f"{BASE_URL}/query/add_query", json={
-                "text": query["text"],
-                "department": query["department"],
-                "email": query["user_mail"]
+            packed = uuid.UUID(str(entity_id)).bytes
+        except ValueError:
+            return None
+        position = self.counts[kind]
+        if position == len(self.arrays[kind]):
+            self.grow(kind, 2 * position)
+        names = self.arrays[kind].dtype.names
+        self.arrays[kind][position] = (packed, *(columns.get(name, -1) for name in names[1:]))
+        self.counts[kind] += 1
+        return position
+
+    def extend(self, other):
+        """Append every entity of another registry, such as a shard's or an earlier run's"""
+        self.details = {**other.details, **self.details}
+        for kind in REGISTRY_COLUMNS:
+            rows = other.rows(kind)
+            if kind == "user":
+                # Users are keyed by index, and shards also sign in the receivers of their messages
+                rows = rows[~np.isin(rows["owner"], self.rows(kind)["owner"])]
+                rows = rows[np.unique(rows["owner"], return_index=True)[1]]
+            needed = self.counts[kind] + len(rows)
+            if needed > len(self.arrays[kind]):
+                self.grow(kind, max(needed, 2 * len(self.arrays[kind])))
+            self.arrays[kind][self.counts[kind]:needed] = rows
+            self.counts[kind] = needed
+
+    def update_owners(self, kind, entities):
+        """Register (owner, entity ID) pairs, replacing the ID of an owner already registered.
+
+        Owners not given keep their rows, so a user who fails to sign in on a
+        rerun stays registered with the ID an earlier run saw.
+        """
+        positions = {owner: position for position, owner in enumerate(self.rows(kind)["owner"].tolist())}
+        for owner, entity_id in entities:
+            position = positions.get(owner)
+            if position is None:
+                position = self.add(kind, entity_id, owner=owner)
+                if position is not None:
+                    positions[owner] = position
+                continue
+            try:
+                self.arrays[kind]["id"][position] = uuid.UUID(str(entity_id)).bytes
+            except ValueError:
+                pass
+
+    def rows(self, kind):
+        return self.arrays[kind][:self.counts[kind]]
+
+    def entity_id(self, kind, position):
+        return str(uuid.UUID(bytes=self.arrays[kind][position]["id"].tobytes()))
+
+    def uuids(self, kind):
+        """Yield the IDs of one kind as strings, in the order they were added"""
+        rows = self.rows(kind)
+        for start in range(0, len(rows), GENERATION_BATCH_SIZE):
+            for packed in rows["id"][start:start + GENERATION_BATCH_SIZE].tolist():
+                yield str(uuid.UUID(bytes=packed))
+
+    def sample(self, kind, rng=random):
+        """Return a uniformly random entity of one kind as a dict, or None if there are none"""
+        if not self.counts[kind]:
+            return None
+        row = self.arrays[kind][rng.randrange(self.counts[kind])]
+        return {
+            name: str(uuid.UUID(bytes=row[name].tobytes())) if name == "id" else int(row[name])
+            for name in row.dtype.names
+        }
+
+    def nbytes(self):
+        return sum(count * self.arrays[kind].dtype.itemsize for kind, count in self.counts.items())
+
+    def describe(self):
+        counts = ", ".join(f"{count} {kind}s" for kind, count in self.counts.items())
+        return f"{counts} ({self.nbytes() / 2**20:.1f} MB)"
+
+    def save(self, directory):
+        """Write each kind's rows to DIRECTORY/<kind>.npy, and the details and per-user digests to manifest.json"""
+        os.makedirs(directory, exist_ok=True)
+        for kind in REGISTRY_COLUMNS:
+            path = os.path.join(directory, f"{kind}.npy")
+            with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+                np.save(file, self.rows(kind))
+            os.replace(file.name, path)
+
+        manifest = {"dataset": self.details}
+        manifest.update({
+            kind: {str(index): [count, f"{digest:016x}"] for index, (count, digest) in owner_manifest(self, kind).items()}
+            for kind in VERIFY_SELECTS
+        })
+        with tempfile.NamedTemporaryFile("w", dir=directory, delete=False, encoding="utf-8") as file:
+            json.dump(manifest, file)
+        os.replace(file.name, os.path.join(directory, "manifest.json"))
+
+    @staticmethod
+    def load_manifest(directory):
+        """Return the manifest saved with a registry as {kind: {user index: (count, digest)}}, or None"""
+        try:
+            with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as file:
+                manifest = json.load(file)
+        except FileNotFoundError:
+            return None
+        return {
+            kind: {int(index): (count, int(digest, 16)) for index, (count, digest) in users.items()}
+            for kind, users in manifest.items() if kind in VERIFY_SELECTS
+        }
+
+    def close(self):
+        """Drop the arrays and delete any spill files"""
+        self.arrays = {}
+        if self.spilled:
+            shutil.rmtree(self.spilled, ignore_errors=True)
+
+def write_run_info(directory, run_id, **details):
+    """Record a tagged run in DIRECTORY/run.json, keeping what an earlier attempt of the run recorded"""
+    info = read_run_info(directory)
+    if info and info["run_id"] != run_id:
+        raise SystemExit(f"{directory} belongs to run {info['run_id']}, not {run_id}")
+    if not info:
+        info = {
+            "run_id": run_id,
+            "marker": RUN_MARKER.format(run_id=run_id),
+            "email": run_email("*@*", run_id),
+            "started": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            **details,
+        }
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=directory, delete=False, encoding="utf-8") as file:
+            json.dump(info, file, indent=2)
+        os.replace(file.name, os.path.join(directory, "run.json"))
+    return info
+
+def read_run_info(directory):
+    """Return the run.json of a tagged run's directory, or None"""
+    try:
+        with open(os.path.join(directory, "run.json"), encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+# --- Metrics ---
+
+class LatencyHistogram:
+    """Constant-memory latency histogram with log-spaced buckets.
+
+    Each bucket is exp(HISTOGRAM_LOG_GROWTH), 2%, wider than the one before,
+    so any reported percentile is within 2% of the true value however many
+    samples are recorded.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        micros = max(seconds * 1e6, 1.0)
+        index = int(math.log(micros) / HISTOGRAM_LOG_GROWTH)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @staticmethod
+    def upper_bound(index):
+        """Upper bound of a bucket in seconds"""
+        return math.exp((index + 1) * HISTOGRAM_LOG_GROWTH) / 1e6
+
+    def percentile(self, q):
+        """Return the latency in seconds below which a fraction q of samples fall"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def count_below(self, seconds):
+        """Samples in buckets ending at or below `seconds`, for cumulative exports"""
+        return sum(count for index, count in self.buckets.items() if self.upper_bound(index) <= seconds)
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50) * 1000, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "buckets": [
+                [round(self.upper_bound(index) * 1000, 3), self.buckets[index]]
+                for index in sorted(self.buckets)
+            ],
+        }
+
+def status_class(status):
+    """Group a status code into 2xx/4xx/5xx, or "error" for a transport failure"""
+    return f"{status // 100}xx" if isinstance(status, int) else "error"
+
+class EndpointMetrics:
+    """Request counts by status, body bytes and latency for one endpoint"""
+
+    def __init__(self):
+        self.statuses = {}
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = LatencyHistogram()
+        self.limiter = None
+        self.concurrency = None
+
+    def record(self, status, seconds, sent, received, retry=False):
+        status = str(status)
+        self.retries += retry
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.bytes_sent += sent
+        self.bytes_received += received
+        self.latency.record(seconds)
+
+    def status_classes(self):
+        classes = {}
+        for status, count in self.statuses.items():
+            key = status_class(int(status)) if status.isdigit() else "error"
+            classes[key] = classes.get(key, 0) + count
+        return classes
+
+    def to_dict(self, elapsed):
+        return {
+            "requests": self.latency.count,
+            "throughput_rps": round(self.latency.count / elapsed, 2) if elapsed else 0.0,
+            "statuses": self.statuses,
+            "status_classes": self.status_classes(),
+            "retries": self.retries,
+            **({"concurrency": self.limiter.to_dict()} if self.limiter else {}),
+            **({"concurrency": self.concurrency} if self.concurrency else {}),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "latency": self.latency.to_dict(),
+        }
+
+class Metrics:
+    """Per-endpoint request metrics and per-kind row outcomes for one run.
+
+    Instead of a line per row, progress is a single status line redrawn at most
+    every PROGRESS_INTERVAL seconds (a new line every PROGRESS_LOG_INTERVAL
+    when output is not a terminal). Only the first FAILURE_LOG_LIMIT failures
+    of each kind are printed; the rest are counted in the summary.
+    """
+
+    def __init__(self, progress=True, stream=None, label=None, keep_failed_rows=True):
+        self.endpoints = {}
+        self.rows = {}
+        self.failed_rows = {}
+        self.checks = {}
+        self.failures_logged = {}
+        self.started = time.perf_counter()
+        self.stopped = None
+        self.stream = stream or sys.stdout
+        self.progress_enabled = progress
+        # Labelled runs share the terminal with other shards, so they log lines
+        self.label = label
+        self.tty = self.stream.isatty() and label is None
+        self.last_progress = self.started
+        self.line_width = 0
+        # A run that never ends would keep failed rows without bound
+        self.keep_failed_rows = keep_failed_rows
+
+    def endpoint(self, name):
+        if name not in self.endpoints:
+            self.endpoints[name] = EndpointMetrics()
+        return self.endpoints[name]
+
+    def record_request(self, endpoint, status, seconds, sent=0, received=0, retry=False):
+        self.endpoint(endpoint).record(status, seconds, sent, received, retry)
+
+    def watch_limiters(self, limiters):
+        """Report the concurrency limits of an ApiClient's endpoints"""
+        for name, limiter in limiters.items():
+            self.endpoint(name).limiter = limiter
+
+    def start_rows(self, kind, total=None):
+        self.rows.setdefault(kind, {"total": total, "created": 0, "failed": 0, "skipped": 0})
+
+    def record_row(self, kind, outcome, detail=None, index=None):
+        """Count a row as created, failed or skipped, printing early failure details.
+
+        Failed rows are also kept by index, since they have exhausted their
+        retries and will be missing from the database.
+        """
+        self.start_rows(kind)
+        self.rows[kind][outcome] += 1
+        if outcome == "failed" and self.keep_failed_rows:
+            self.failed_rows.setdefault(kind, []).append({"index": index, "error": (detail or "")[:200]})
+        if detail and outcome != "created":
+            logged = self.failures_logged.get(kind, 0)
+            if logged < FAILURE_LOG_LIMIT:
+                self.write_line(detail)
+            elif logged == FAILURE_LOG_LIMIT:
+                self.write_line(f"Further {kind} failures and skips are only counted in the summary")
+            self.failures_logged[kind] = logged + 1
+        self.progress()
+
+    def record_check(self, kind, **counts):
+        """Add read-back verification counts, such as users matched or rows missing, for one kind"""
+        checks = self.checks.setdefault(kind, dict.fromkeys(VERIFY_OUTCOMES, 0))
+        for outcome, count in counts.items():
+            checks[outcome] += count
+
+    def elapsed(self):
+        return (self.stopped or time.perf_counter()) - self.started
+
+    def stop(self):
+        """Freeze the elapsed time used for rates"""
+        self.stopped = time.perf_counter()
+
+    def write_line(self, text):
+        """Print a full line without leaving a half-drawn progress line behind"""
+        if self.tty and self.line_width:
+            self.stream.write("\r" + " " * self.line_width + "\r")
+            self.line_width = 0
+        print(f"[{self.label}] {text}" if self.label else text, file=self.stream)
+
+    def status_line(self):
+        elapsed = self.elapsed()
+        parts = []
+        for kind, rows in self.rows.items():
+            done = rows["created"] + rows["failed"] + rows["skipped"]
+            label = "queries" if kind == "query" else kind + "s"
+            parts.append(f"{label} {done}/{rows['total']}" if rows["total"] is not None else f"{label} {done}")
+        requests = sum(endpoint.latency.count for endpoint in self.endpoints.values())
+        failed = sum(
+            count for endpoint in self.endpoints.values()
+            for key, count in endpoint.status_classes().items() if key != "2xx"
+        )
+        parts.append(f"{requests / elapsed if elapsed else 0:.0f} req/s")
+        limits = [endpoint.limiter.limit for endpoint in self.endpoints.values() if endpoint.limiter]
+        if limits:
+            parts.append(f"concurrency {sum(int(limit) for limit in limits)}")
+        parts.append(f"{failed} failed requests")
+        label = f"[{self.label}] " if self.label else ""
+        return f"{label}[{elapsed:7.1f}s] " + "  ".join(parts)
+
+    def progress(self, final=False):
+        """Redraw the status line if PROGRESS_INTERVAL has passed"""
+        if not self.progress_enabled:
+            return
+        now = time.perf_counter()
+        interval = PROGRESS_INTERVAL if self.tty else PROGRESS_LOG_INTERVAL
+        if not final and now - self.last_progress < interval:
+            return
+        self.last_progress = now
+        line = self.status_line()
+        if self.tty:
+            self.stream.write("\r" + line.ljust(self.line_width) + ("\n" if final else ""))
+            self.stream.flush()
+            self.line_width = 0 if final else len(line)
+        else:
+            print(line, file=self.stream, flush=True)
+
+    def state(self):
+        """Return the raw counters as plain data, to merge across processes"""
+        return {
+            "rows": self.rows,
+            "failed_rows": self.failed_rows,
+            "checks": self.checks,
+            "endpoints": {
+                name: {
+                    "statuses": endpoint.statuses,
+                    "retries": endpoint.retries,
+                    "bytes_sent": endpoint.bytes_sent,
+                    "bytes_received": endpoint.bytes_received,
+                    "buckets": endpoint.latency.buckets,
+                    "total": endpoint.latency.total,
+                    "max": endpoint.latency.max,
+                    "concurrency": endpoint.limiter.to_dict() if endpoint.limiter else endpoint.concurrency,
+                }
+                for name, endpoint in self.endpoints.items()
+            },
+        }
+
+    def merge(self, state):
+        """Add the counters of another run, such as a shard, into these"""
+        for kind, rows in state["rows"].items():
+            if kind not in self.rows:
+                self.rows[kind] = dict(rows)
+                continue
+            mine = self.rows[kind]
+            for outcome in ("created", "failed", "skipped"):
+                mine[outcome] += rows[outcome]
+            mine["total"] = None if mine["total"] is None or rows["total"] is None else mine["total"] + rows["total"]
+        for kind, rows in state["failed_rows"].items():
+            self.failed_rows.setdefault(kind, []).extend(rows)
+        for kind, checks in state["checks"].items():
+            self.record_check(kind, **checks)
+
+        for name, other in state["endpoints"].items():
+            endpoint = self.endpoint(name)
+            for status, count in other["statuses"].items():
+                endpoint.statuses[status] = endpoint.statuses.get(status, 0) + count
+            endpoint.retries += other["retries"]
+            endpoint.bytes_sent += other["bytes_sent"]
+            endpoint.bytes_received += other["bytes_received"]
+            latency = endpoint.latency
+            for index, count in other["buckets"].items():
+                latency.buckets[index] = latency.buckets.get(index, 0) + count
+            latency.count += sum(other["buckets"].values())
+            latency.total += other["total"]
+            latency.max = max(latency.max, other["max"])
+            if other["concurrency"]:
+                # Limits of parallel shards add up to the load on the backend
+                mine = endpoint.concurrency or dict.fromkeys(other["concurrency"], 0)
+                endpoint.concurrency = {key: mine[key] + value for key, value in other["concurrency"].items()}
+
+    def to_dict(self):
+        elapsed = self.elapsed()
+        requests = sum(endpoint.latency.count for endpoint in self.endpoints.values())
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "requests": requests,
+            "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+            "rows": self.rows,
+            "failed_rows": self.failed_rows,
+            "checks": self.checks,
+            "endpoints": {name: endpoint.to_dict(elapsed) for name, endpoint in self.endpoints.items()},
+        }
+
+    def to_prometheus(self):
+        """Render the totals in the Prometheus text exposition format"""
+        prefix = METRICS_PREFIX
+        lines = [
+            f"# HELP {prefix}_requests_total Requests sent, by endpoint and status class",
+            f"# TYPE {prefix}_requests_total counter",
+        ]
+        for name, endpoint in self.endpoints.items():
+            for key, count in sorted(endpoint.status_classes().items()):
+                lines.append(f'{prefix}_requests_total{{endpoint="{name}",status_class="{key}"}} {count}')
+
+        lines += [
+            f"# HELP {prefix}_retries_total Requests that were retries of a 429, 5xx or timeout",
+            f"# TYPE {prefix}_retries_total counter",
+        ]
+        for name, endpoint in self.endpoints.items():
+            lines.append(f'{prefix}_retries_total{{endpoint="{name}"}} {endpoint.retries}')
+
+        lines += [
+            f"# HELP {prefix}_concurrency_limit Adaptive concurrency limit at the end of the run",
+            f"# TYPE {prefix}_concurrency_limit gauge",
+        ]
+        for name, endpoint in self.endpoints.items():
+            if endpoint.limiter:
+                lines.append(f'{prefix}_concurrency_limit{{endpoint="{name}"}} {int(endpoint.limiter.limit)}')
+            elif endpoint.concurrency:
+                lines.append(f'{prefix}_concurrency_limit{{endpoint="{name}"}} {endpoint.concurrency["final"]}')
+
+        lines += [
+            f"# HELP {prefix}_body_bytes_total Request and response body bytes, by endpoint",
+            f"# TYPE {prefix}_body_bytes_total counter",
+        ]
+        for name, endpoint in self.endpoints.items():
+            lines.append(f'{prefix}_body_bytes_total{{endpoint="{name}",direction="sent"}} {endpoint.bytes_sent}')
+            lines.append(
+                f'{prefix}_body_bytes_total{{endpoint="{name}",direction="received"}} {endpoint.bytes_received}'
+            )
+
+        lines += [
+            f"# HELP {prefix}_request_duration_seconds Request latency, by endpoint",
+            f"# TYPE {prefix}_request_duration_seconds histogram",
+        ]
+        for name, endpoint in self.endpoints.items():
+            histogram = endpoint.latency
+            for bound in PROMETHEUS_BUCKETS:
+                lines.append(
+                    f'{prefix}_request_duration_seconds_bucket{{endpoint="{name}",le="{bound}"}} '
+                    f"{histogram.count_below(bound)}"
+                )
+            lines.append(f'{prefix}_request_duration_seconds_bucket{{endpoint="{name}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{prefix}_request_duration_seconds_sum{{endpoint="{name}"}} {histogram.total:.6f}')
+            lines.append(f'{prefix}_request_duration_seconds_count{{endpoint="{name}"}} {histogram.count}')
+
+        lines += [
+            f"# HELP {prefix}_rows_total Rows processed, by kind and outcome",
+            f"# TYPE {prefix}_rows_total counter",
+        ]
+        for kind, rows in self.rows.items():
+            for outcome in ("created", "failed", "skipped"):
+                lines.append(f'{prefix}_rows_total{{kind="{kind}",outcome="{outcome}"}} {rows[outcome]}')
+
+        if self.checks:
+            lines += [
+                f"# HELP {prefix}_verified_total Users and rows found by read-back verification, by kind and outcome",
+                f"# TYPE {prefix}_verified_total counter",
+            ]
+            for kind, checks in self.checks.items():
+                for outcome, count in checks.items():
+                    lines.append(f'{prefix}_verified_total{{kind="{kind}",outcome="{outcome}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def print_table(self, endpoints=None):
+        """Print throughput and latency percentiles per endpoint"""
+        elapsed = self.elapsed()
+        for name in endpoints or [name for name, endpoint in self.endpoints.items() if endpoint.latency.count]:
+            endpoint = self.endpoint(name)
+            latency = endpoint.latency
+            self.write_line(
+                f"{name:>12}: {latency.count:>7} req  {latency.count / elapsed if elapsed else 0:>8.1f} req/s  "
+                f"p50 {latency.percentile(0.50) * 1000:.1f}ms  p95 {latency.percentile(0.95) * 1000:.1f}ms  "
+                f"p99 {latency.percentile(0.99) * 1000:.1f}ms  max {latency.max * 1000:.1f}ms"
+            )
+
+    def print_checks(self):
+        """Print the read-back verification outcome per kind"""
+        for kind, checks in self.checks.items():
+            self.write_line(
+                f"Verified {kind}s: {checks['matched']}/{checks['users']} users match, {checks['missing']} missing, "
+                f"{checks['duplicated']} duplicated, {checks['orphaned']} orphaned link rows, "
+                f"{checks['unexpected']} unexpected, {checks['unreadable']} users unreadable"
+            )
+
+    def print_failed_rows(self):
+        """Print the indexes of rows that failed permanently"""
+        for kind, rows in self.failed_rows.items():
+            indexes = ", ".join(str(row["index"]) for row in rows[:FAILED_ROWS_PRINTED])
+            more = f" and {len(rows) - FAILED_ROWS_PRINTED} more" if len(rows) > FAILED_ROWS_PRINTED else ""
+            self.write_line(f"{len(rows)} {kind} rows failed permanently: {indexes}{more}")
+
+    def write(self, summary_path=None, prometheus_path=None):
+        """Write the JSON summary and Prometheus text files that were asked for"""
+        if summary_path:
+            with open(summary_path, "w", encoding="utf-8") as file:
+                json.dump(self.to_dict(), file, indent=2)
+                file.write("\n")
+            print(f"Metrics summary written to {summary_path}")
+        if prometheus_path:
+            with open(prometheus_path, "w", encoding="utf-8") as file:
+                file.write(self.to_prometheus())
+            print(f"Prometheus metrics written to {prometheus_path}")
+
+# --- Async seeding engine ---
+
+class AdaptiveLimiter:
+    """Concurrency limit for one endpoint that adapts to how the backend copes.
+
+    Additive increase, multiplicative decrease: each healthy response raises
+    the limit by 1/limit, so it grows by one per window of responses, until
+    `maximum`. A 429, 5xx or timeout multiplies it by AIMD_DECREASE, at most
+    once per window, since the requests already in flight were sent under
+    the old limit. With maximum equal to initial the limit never grows.
+    """
+
+    def __init__(self, initial, maximum=None):
+        self.limit = float(initial)
+        self.maximum = max(initial, maximum or initial)
+        self.lowest = self.highest = self.limit
+        self.in_flight = 0
+        self.fastest = None
+        self.smoothed = None
+        self.last_decrease = 0.0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self):
+        """Wait for a free slot and return the time it was taken"""
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return time.perf_counter()
+
+    async def release(self, started, overloaded):
+        """Free a slot and adjust the limit from the request's outcome"""
+        now = time.perf_counter()
+        if overloaded:
+            if started >= self.last_decrease:
+                self.limit = max(1.0, self.limit * AIMD_DECREASE)
+                self.last_decrease = now
+        else:
+            latency = now - started
+            self.fastest = latency if self.fastest is None else min(self.fastest, latency)
+            self.smoothed = latency if self.smoothed is None else (
+                self.smoothed + AIMD_LATENCY_SMOOTHING * (latency - self.smoothed)
+            )
+            if self.smoothed <= AIMD_LATENCY_TOLERANCE * self.fastest:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        self.lowest = min(self.lowest, self.limit)
+        self.highest = max(self.highest, self.limit)
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def to_dict(self):
+        return {"final": int(self.limit), "lowest": int(self.lowest), "highest": int(self.highest)}
+
+def backoff_delay(attempt, retry_after=None, rng=random):
+    """Full-jitter exponential backoff, never shorter than a Retry-After in seconds"""
+    delay = rng.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, min(float(retry_after), RETRY_MAX_DELAY))
+    return delay
+
+class ApiClient:
+    """Shared HTTP session that enforces an adaptive concurrency limit per endpoint.
+
+    A 429, 5xx or timeout is retried up to `retries` times with jittered
+    exponential backoff, outside the endpoint's limit. Every attempt is
+    recorded in `metrics`: its status, body sizes and the latency measured
+    once a slot under the endpoint's limit has been taken.
+    """
+
+    def __init__(self, session, base_url, endpoint_limits, metrics=None, max_limits=None, retries=0):
+        self.session = session
+        self.base_url = base_url
+        self.retries = retries
+        # Seeded from the OS, so forked shards do not retry in lockstep
+        self.rng = random.Random()
+        self.limiters = {
+            endpoint: AdaptiveLimiter(limit, (max_limits or {}).get(endpoint))
+            for endpoint, limit in endpoint_limits.items()
+        }
+        self.metrics = metrics or Metrics(progress=False)
+
+    @property
+    def metrics(self):
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, metrics):
+        self._metrics = metrics
+        metrics.watch_limiters(self.limiters)
+
+    async def request(self, method, endpoint, payload=None, params=None, headers=None):
+        """Send a request to a named endpoint and return (status, body text).
+
+        Transport errors that are still failing after the last retry are raised.
+        """
+        path = ENDPOINTS[endpoint] if endpoint in ENDPOINTS else READ_ENDPOINTS[endpoint]
+        # Encoding the body here lets its size be counted
+        data = json.dumps(payload).encode() if payload is not None else None
+        if data is not None:
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+        limiter = self.limiters.get(endpoint)
+
+        for attempt in range(self.retries + 1):
+            started = await limiter.acquire() if limiter else time.perf_counter()
+            body, error, retry_after = b"", None, None
+            try:
+                async with self.session.request(
+                    method, self.base_url + path, data=data, params=params, headers=headers
+                ) as response:
+                    body = await response.read()
+                    status = response.status
+                    retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status, error = type(e).__name__, e
+            overloaded = error is not None or status == 429 or status >= 500
+            if limiter:
+                await limiter.release(started, overloaded)
+            self.metrics.record_request(
+                endpoint, status, time.perf_counter() - started, len(data or b""), len(body), attempt > 0
+            )
+            if not overloaded or attempt == self.retries:
+                break
+            await asyncio.sleep(backoff_delay(attempt, retry_after, self.rng))
+
+        if error is not None:
+            raise error
+        return status, body.decode("utf-8", "replace")
+
+    async def post(self, endpoint, payload, headers=None):
+        """POST a JSON payload to an endpoint and return (status, body text)"""
+        return await self.request("POST", endpoint, payload, headers=headers)
+
+class UserClient:
+    """A seeded user's identity and JWT on top of the shared connection pool.
+
+    Every user client sends through the same keep-alive connector, so switching
+    between users costs a header rather than a new TCP connection.
+    """
+
+    def __init__(self, api, user_id, email, token):
+        self.api = api
+        self.id = user_id
+        self.email = email
+        self.token = token
+        self.headers = {"Authorization": f"Bearer {token}"} if token else None
+
+    async def request(self, method, endpoint, payload=None, params=None):
+        """Send a request as this user, with its bearer token"""
+        return await self.api.request(method, endpoint, payload, params, self.headers)
+
+    async def post(self, endpoint, payload):
+        """POST as this user, sending its bearer token"""
+        return await self.api.post(endpoint, payload, headers=self.headers)
+
+async def run_phase(items, handler, concurrency):
+    """Run handler over items with at most `concurrency` rows in flight.
+
+    Workers pull from a shared iterator, so items are consumed lazily and, with
+    a concurrency of 1, in their original order.
+    """
+    iterator = iter(items)
+
+    async def worker():
+        for item in iterator:
+            await handler(item)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+async def create_user(client, user, token_cache=None, index=None):
+    """Sign up a user, falling back to login if they already exist.
+
+    A user with a valid cached token is returned without any network call.
+    """
+    cached = token_cache.get(user["email"]) if token_cache else None
+    if cached:
+        client.metrics.record_row("user", "created")
+        return UserClient(client, cached[0], user["email"], cached[1])
+
+    try:
+        status, text = await client.post("signup", {
+            "email": user["email"],
+            "password": user["password"],
+            "name": user.get("name", "")
+        })
+
+        user_id = token = None
+
+        if is_success(status):
+            user_id = extract_user_id_from_response(text)
+            token = extract_token_from_response(text)
+        else:
+            # If signup failed due to user already existing, try to login
+            status, text = await client.post("login", {
+                "email": user["email"],
+                "password": user["password"]
+            })
+
+            if is_success(status):
+                user_id = extract_user_id_from_response(text)
+                token = extract_token_from_response(text)
+            else:
+                client.metrics.record_row(
+                    "user", "failed", f"Failed to login user {user['email']}: {text}", index
+                )
+                return None
+
+        if user_id:
+            if token_cache and token:
+                token_cache.put(user["email"], user_id, token)
+            client.metrics.record_row("user", "created")
+            return UserClient(client, user_id, user["email"], token)
+        client.metrics.record_row("user", "failed", f"No user ID returned for {user['email']}", index)
+
+    except Exception as e:
+        client.metrics.record_row("user", "failed", f"Error processing user {user['email']}: {str(e)}", index)
+
+    return None
+
+async def create_users(client, users, count, concurrency, journal=None, token_cache=None):
+    """Create or log in (index, user) pairs, returning `count` clients by index.
+
+    Users that could not be created, or were not given, are left as None so
+    that rows referring to them by index can be skipped. Only users missing
+    from the token cache, or whose cached token is about to expire, cost an
+    auth request.
+    """
+    users = list(users)
+    results = [None] * count
+    reused = 0
+
+    async def handle(indexed_user):
+        nonlocal reused
+        index, user = indexed_user
+        if token_cache and token_cache.get(user["email"]):
+            reused += 1
+        results[index] = await create_user(client, user, token_cache, index)
+        if journal and results[index] and not journal.is_done("user", index):
+            journal.record("user", index, results[index].id)
+
+    client.metrics.start_rows("user", len(users))
+    if journal:
+        journal.load("user", count)
+    try:
+        await run_phase(users, handle, concurrency)
+    finally:
+        if token_cache:
+            token_cache.save()
+
+    if reused:
+        print(f"Reused cached tokens for {reused} users")
+    return results
+
+def pending(items, kind, count, journal):
+    """Pair items with their index, leaving out those the journal has done"""
+    done = journal.load(kind, count) if journal else 0
+    if done:
+        print(f"Resuming: {done} {kind} rows already created")
+    for item in items:
+        if not (journal and journal.is_done(kind, item["index"])):
+            yield item["index"], item
+
+async def create_posts(user_clients, posts, count, concurrency, metrics, journal=None, registry=None):
+    """Create posts, each sent as the user that owns it"""
+    print(f"\nCreating {count} posts...")
+    metrics.start_rows("post", count)
+
+    async def handle(indexed_post):
+        index, post = indexed_post
+        try:
+            user = user_clients[post["owner"]]
+            if user is None:
+                metrics.record_row("post", "skipped", f"Skipping post for missing user #{post['owner']}")
+                return
+
+            status, text = await user.post("add_post", {
+                "title": post["title"],
+                "content": post["content"],
+                "user_id": user.id
             })
-            
-            if response.status_code >= 200 and response.status_code < 300:
-                print(f"Created query for {query['department']}")
+
+            if is_success(status):
+                metrics.record_row("post", "created")
+                post_id = extract_entity_id_from_response(text, "post", "post_id")
+                if registry:
+                    registry.add(
+                        "post", post_id, owner=post["owner"],
+                        link=extract_entity_id_from_response(text, "postUser", "id") or -1
+                    )
+                if journal:
+                    journal.record("post", index, post_id)
             else:
-                print(f"Failed to create query: {response.text}")
-            
-            # Add a small delay
-            time.sleep(0.2)
-            
+                metrics.record_row("post", "failed", f"Failed to create post: {text}", index)
+
         except Exception as e:
-            print(f"Error creating query: {str(e)}")
-    
-    # --- Create messages ---
-    message_pairs = generate_message_pairs()
-    print(f"\nCreating message conversations...")
-    
-    for i, (initial_msg, response_msg) in enumerate(message_pairs):
+            metrics.record_row("post", "failed", f"Error creating post: {str(e)}", index)
+
+    await run_phase(pending(posts, "post", count, journal), handle, concurrency)
+
+async def create_queries(user_clients, queries, count, concurrency, metrics, journal=None):
+    """Create support queries, each filed as the user that owns it"""
+    print(f"\nCreating {count} queries...")
+    metrics.start_rows("query", count)
+
+    async def handle(indexed_query):
+        index, query = indexed_query
         try:
-            # Select random sender and receiver
-            sender = random.choice(user_ids)
-            receiver = random.choice([u for u in user_ids if u["id"] != sender["id"]])
-            
-            # Send initial message
-            send_msg_response = requests.post(f"{BASE_URL}/messages/send", json={
-                "sender_id": sender["id"],
-                "receiver_id": receiver["id"],
-                "content": initial_msg
+            user = user_clients[query["owner"]]
+            if user is None:
+                metrics.record_row("query", "skipped", f"Skipping query for missing user #{query['owner']}")
+                return
+
+            status, text = await user.post("add_query", {
+                "text": query["text"],
+                "department": query["department"],
+                "email": user.email
             })
-            
-            if send_msg_response.status_code >= 200 and send_msg_response.status_code < 300:
-                print(f"Sent message from {sender['email']} to {receiver['email']}")
-                
-                # Send response message (role reversal)
-                response = requests.post(f"{BASE_URL}/messages/send", json={
-                    "sender_id": receiver["id"],
-                    "receiver_id": sender["id"],
-                    "content": response_msg
+
+            if is_success(status):
+                metrics.record_row("query", "created")
+                if journal:
+                    journal.record("query", index)
+            else:
+                metrics.record_row("query", "failed", f"Failed to create query: {text}", index)
+
+        except Exception as e:
+            metrics.record_row("query", "failed", f"Error creating query: {str(e)}", index)
+
+    await run_phase(pending(queries, "query", count, journal), handle, concurrency)
+
+async def create_conversations(user_clients, conversations, count, concurrency, metrics, journal=None,
+                               registry=None):
+    """Send each conversation's messages in order, alternating sender and receiver.
+
+    The journal tracks message j of conversation i as message row
+    i * MAX_CONVERSATION_LENGTH + j, so a conversation that stopped partway
+    only resends the messages that are missing.
+    """
+    print(f"\nCreating {count} message conversations...")
+    metrics.start_rows("message")
+
+    if len(user_clients) < 2:
+        print("Need at least two users to send messages. Skipping conversations.")
+        return
+
+    done = journal.load("message", count * MAX_CONVERSATION_LENGTH) if journal else 0
+    if done:
+        print(f"Resuming: {done} message rows already created")
+
+    async def handle(indexed_conversation):
+        index, conversation = indexed_conversation
+        key = index * MAX_CONVERSATION_LENGTH
+        try:
+            sender = user_clients[conversation["sender"]]
+            receiver = user_clients[conversation["receiver"]]
+            if sender is None or receiver is None:
+                metrics.record_row("message", "skipped", "Skipping conversation with a missing user")
+                return
+            people = (conversation["sender"], conversation["receiver"])
+
+            # Each reply depends on the message before it, so a conversation is sent in order
+            for position, content in enumerate(conversation["messages"]):
+                key = index * MAX_CONVERSATION_LENGTH + position
+                if journal and journal.is_done("message", key):
+                    continue
+
+                author, recipient = (sender, receiver) if position % 2 == 0 else (receiver, sender)
+                status, text = await author.post("send_message", {
+                    "sender_id": author.id,
+                    "receiver_id": recipient.id,
+                    "content": content
                 })
-                
-                if response.status_code >= 200 and response.status_code < 300:
-                    print(f"Sent response message from {receiver['email']} to {sender['email']}")
+
+                if not is_success(status):
+                    metrics.record_row("message", "failed", f"Failed to send message {position + 1}: {text}", key)
+                    return
+                metrics.record_row("message", "created")
+                message_id = extract_entity_id_from_response(text, "messageData", "message_id")
+                if registry:
+                    registry.add(
+                        "message", message_id, owner=people[position % 2], peer=people[1 - position % 2],
+                        link=extract_entity_id_from_response(text, "messageUserData", "id") or -1
+                    )
+                if journal:
+                    journal.record("message", key, message_id)
+
+        except Exception as e:
+            metrics.record_row("message", "failed", f"Error creating message conversation: {str(e)}", key)
+
+    remaining = (
+        (conversation["index"], conversation) for conversation in conversations
+        if not (journal and journal.is_done(
+            "message", conversation["index"] * MAX_CONVERSATION_LENGTH + len(conversation["messages"]) - 1
+        ))
+    )
+    await run_phase(remaining, handle, concurrency)
+
+# --- Read-back verification ---
+
+def entity_hashes(packed):
+    """Return a 64-bit hash of each packed UUID.
+
+    Summed modulo 2**64 over what a user owns, they give a digest that does
+    not depend on order but changes with any missing, extra or repeated ID.
+    """
+    halves = np.frombuffer(np.ascontiguousarray(packed).tobytes(), dtype="<u8").reshape(-1, 2)
+    # splitmix64 finalizer over both halves
+    h = halves[:, 0] ^ (halves[:, 1] * np.uint64(0x9E3779B97F4A7C15))
+    h ^= h >> np.uint64(30)
+    h *= np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(27)
+    h *= np.uint64(0x94D049BB133111EB)
+    h ^= h >> np.uint64(31)
+    return h
+
+def owner_manifest(registry, kind):
+    """Return {user index: (entity count, digest)} over one kind's registered entities"""
+    rows = registry.rows(kind)
+    owners = np.asarray(rows["owner"])
+    hashes = entity_hashes(rows["id"])
+    order = np.argsort(owners, kind="stable")
+    users, starts, counts = np.unique(owners[order], return_index=True, return_counts=True)
+    digests = np.add.reduceat(hashes[order], starts) if len(starts) else hashes[:0]
+    return dict(zip(users.tolist(), zip(counts.tolist(), digests.tolist())))
+
+async def verify_entities(user_clients, registry, concurrency, metrics, manifest=None):
+    """Read back what each user owns through getDBData and compare it with the registry.
+
+    One nested select per user and kind fetches the user's link rows with
+    their entity. When the count and digest match the manifest the user is
+    done; otherwise the IDs are diffed against the registry to count missing
+    entities, link rows repeating an entity, link rows whose entity is gone
+    (half-inserts) and entities the registry does not know.
+    """
+    users = [(index, user) for index, user in enumerate(user_clients) if user]
+    print(f"\nVerifying what {len(users)} users own...")
+    manifest = manifest or {kind: owner_manifest(registry, kind) for kind in VERIFY_SELECTS}
+    # Each kind's positions sorted by owner, to find one user's entities on a mismatch
+    by_owner = {}
+    for kind in VERIFY_SELECTS:
+        owners = np.asarray(registry.rows(kind)["owner"])
+        order = np.argsort(owners, kind="stable")
+        by_owner[kind] = (order, owners[order])
+    metrics.start_rows("check", len(users) * len(VERIFY_SELECTS))
+
+    async def handle(item):
+        (index, user), kind = item
+        link_table, entity_table, foreign_key, id_column = VERIFY_SELECTS[kind]
+        try:
+            status, text = await user.post("db_data", {
+                "tables": [link_table, entity_table],
+                "columns": [[foreign_key, "id"], [id_column]]
+            })
+            data = json.loads(text).get("data") if is_success(status) else None
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, AttributeError) as e:
+            status, text, data = None, str(e), None
+        if data is None:
+            metrics.record_check(kind, users=1, unreadable=1)
+            metrics.record_row("check", "failed", f"Could not read the {kind}s of user #{index}: {text}", index)
+            return
+
+        links = (data[0].get(link_table) or []) if data else []
+        found = [link[entity_table][id_column] for link in links if link.get(entity_table)]
+        orphaned = len(links) - len(found)
+        count, digest = manifest[kind].get(index, (0, 0))
+        packed = np.frombuffer(b"".join(uuid.UUID(entity_id).bytes for entity_id in found), dtype="V16")
+        if not orphaned and len(found) == count and int(entity_hashes(packed).sum()) == digest:
+            metrics.record_check(kind, users=1, matched=1)
+            metrics.record_row("check", "created")
+            return
+
+        order, owners = by_owner[kind]
+        start, end = np.searchsorted(owners, [index, index + 1])
+        expected = collections.Counter(registry.entity_id(kind, position) for position in order[start:end].tolist())
+        found = collections.Counter(found)
+        counts = {
+            "missing": sum((expected - found).values()),
+            "duplicated": sum(found[entity_id] - expected[entity_id] for entity_id in found if entity_id in expected
+                              and found[entity_id] > expected[entity_id]),
+            "orphaned": orphaned,
+            "unexpected": sum(found[entity_id] for entity_id in found if entity_id not in expected),
+        }
+        metrics.record_check(kind, users=1, **counts)
+        problems = ", ".join(f"{count} {outcome}" for outcome, count in counts.items() if count)
+        metrics.record_row("check", "failed", f"User #{index} {kind}s: {problems}", index)
+
+    await run_phase(((user, kind) for user in users for kind in VERIFY_SELECTS), handle, concurrency)
+
+# --- Bulk COPY loading ---
+
+# Columns written for each table in backend/config/schema.sql, in load order.
+# Identity columns are left to their database defaults, and so is created_at
+# unless the scenario has a time spread.
+COPY_TABLES = {
+    "User": ("user_id", "mail", "pass"),
+    "Posts": ("post_id", "Title", "Content"),
+    "post-user": ("post", '"user"'),
+    "Query": ("query_id", "text", "department", "user_mail"),
+    "query-user": ('"user"', "query"),
+    "Message": ("message_id", "message", "seen"),
+    "message-user": ("sender", "receiver", "message"),
+}
+
+# Rows buffered per table before a write, to keep syscalls off the hot path
+COPY_BUFFER_ROWS = 10000
+
+# Work factor used by bcryptjs in authController.js
+BCRYPT_ROUNDS = 10
+
+COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+def copy_line(*values):
+    """Format one row in PostgreSQL COPY text format"""
+    return "\t".join(str(value).translate(COPY_ESCAPES) for value in values) + "\n"
+
+def copy_statement(table, source="STDIN", timestamped=False):
+    """Return the COPY statement that loads a table from `source`, with created_at when timestamped"""
+    columns = COPY_TABLES[table] + (("created_at",) if timestamped else ())
+    return f'COPY "{table}" ({", ".join(columns)}) FROM {source}'
+
+def uuid_stream(seed, stream):
+    """Yield reproducible client-side UUID4 strings for one entity type"""
+    rng = make_rng(seed, stream)
+    while True:
+        yield str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+def hash_passwords():
+    """Return a function that bcrypt-hashes a password once and reuses the hash.
+
+    Any valid hash of a password passes bcryptjs compare(), so synthetic users
+    sharing a password can share one hash instead of paying for one each.
+    """
+    try:
+        import bcrypt
+    except ImportError:
+        raise SystemExit("Bulk mode needs bcrypt to pre-hash passwords: pip install -r requirements-db.txt")
+
+    hashes = {}
+
+    def hash_password(password):
+        if password not in hashes:
+            salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+            hashes[password] = bcrypt.hashpw(password.encode(), salt).decode()
+        return hashes[password]
+
+    return hash_password
+
+def timestamp_stream(seed, stream, draw):
+    """Yield reproducible floats from `draw(rng, size)`, a batch per generator"""
+    for batch in itertools.count():
+        yield from draw(make_np_rng(seed, stream, batch), GENERATION_BATCH_SIZE).tolist()
+
+def generate_copy_rows(dataset, time_spread=None):
+    """Yield (table, link table, rows) for each table group in load order.
+
+    Each rows iterator yields (main lines, link lines) per generated item, so a
+    post and its post-user row are produced together with matching UUIDs.
+    With a time spread every row also gets a created_at, never before the
+    users it belongs to, and replies follow each other in order.
+    """
+    hash_password = hash_passwords()
+    seed, user_count = dataset.seed, dataset.user_count
+    user_uuids = [user_id for user_id, _ in zip(uuid_stream(seed, "user_ids"), range(user_count))]
+    user_times = np.zeros(user_count)
+
+    def created(stream):
+        """Yield a created_at tuple to append to each row, empty without a time spread"""
+        if not time_spread:
+            return itertools.repeat(())
+        return timestamp_stream(seed, f"{stream}_created", time_spread.sample)
+
+    def user_rows():
+        for index, (user_id, user, stamp) in enumerate(zip(user_uuids, dataset.users(), created("users"))):
+            if time_spread:
+                user_times[index] = stamp
+                stamp = (format_timestamp(stamp),)
+            yield copy_line(user_id, user["email"], hash_password(user["password"]), *stamp), ""
+
+    def owned_stamps(rows, stream):
+        """Pair each row with its created_at, moved after its owner's when earlier"""
+        for row, stamp in zip(rows, created(stream)):
+            if time_spread:
+                stamp = (format_timestamp(time_spread.after(stamp, user_times[row["owner"]])),)
+            yield row, stamp
+
+    def post_rows():
+        post_ids = uuid_stream(seed, "post_ids")
+        for (post, stamp), post_id in zip(owned_stamps(dataset.posts(), "posts"), post_ids):
+            yield (
+                copy_line(post_id, post["title"], post["content"], *stamp),
+                copy_line(post_id, user_uuids[post["owner"]], *stamp)
+            )
+
+    def query_rows():
+        emails = [user["email"] for user in dataset.users()]
+        query_ids = uuid_stream(seed, "query_ids")
+        for (query, stamp), query_id in zip(owned_stamps(dataset.queries(), "queries"), query_ids):
+            yield (
+                copy_line(query_id, query["text"], query["department"], emails[query["owner"]], *stamp),
+                copy_line(user_uuids[query["owner"]], query_id, *stamp)
+            )
+
+    def message_rows():
+        message_ids = uuid_stream(seed, "message_ids")
+        gaps = timestamp_stream(seed, "message_gaps", time_spread.gaps) if time_spread else None
+        for conversation, stamp in zip(dataset.message_pairs(), created("conversations")):
+            participants = (user_uuids[conversation["sender"]], user_uuids[conversation["receiver"]])
+            if time_spread:
+                stamp = time_spread.after(
+                    stamp, max(user_times[conversation["sender"]], user_times[conversation["receiver"]])
+                )
+            messages, links = [], []
+            for position, content in enumerate(conversation["messages"]):
+                message_id = next(message_ids)
+                author = participants[position % 2]
+                recipient = participants[1 - position % 2]
+                if time_spread:
+                    stamp += next(gaps) if position else 0.0
+                    created_at = (format_timestamp(stamp),)
                 else:
-                    print(f"Failed to send response message: {response.text}")
+                    created_at = ()
+                messages.append(copy_line(message_id, content, "false", *created_at))
+                links.append(copy_line(author, recipient, message_id, *created_at))
+            yield "".join(messages), "".join(links)
+
+    yield "User", None, user_rows()
+    yield "Posts", "post-user", post_rows()
+    if user_count:
+        yield "Query", "query-user", query_rows()
+    if user_count > 1:
+        yield "Message", "message-user", message_rows()
+
+def buffered_writes(rows, write_main, write_link):
+    """Feed rows to the writers in batches and return the number of main rows"""
+    count = 0
+    main_buffer, link_buffer = [], []
+
+    def flush():
+        nonlocal count
+        chunk = "".join(main_buffer)
+        # Escaping leaves a raw newline only at the end of each row
+        count += chunk.count("\n")
+        write_main(chunk)
+        write_link("".join(link_buffer))
+        main_buffer.clear()
+        link_buffer.clear()
+
+    for main, link in rows:
+        main_buffer.append(main)
+        link_buffer.append(link)
+        if len(main_buffer) >= COPY_BUFFER_ROWS:
+            flush()
+    flush()
+    return count
+
+def write_copy_files(out_dir, dataset, time_spread=None):
+    """Write one COPY file per table plus a load.sql script for psql"""
+    os.makedirs(out_dir, exist_ok=True)
+    load_script = ["BEGIN;"]
+
+    for table, link_table, rows in generate_copy_rows(dataset, time_spread):
+        started = time.perf_counter()
+        tables = [table] + ([link_table] if link_table else [])
+        with contextlib.ExitStack() as stack:
+            files = [
+                stack.enter_context(open(os.path.join(out_dir, f"{name}.copy"), "w", encoding="utf-8"))
+                for name in tables
+            ]
+            write_link = files[1].write if link_table else (lambda text: None)
+            count = buffered_writes(rows, files[0].write, write_link)
+        report_copy_rate(table, count, started)
+
+        for name in tables:
+            load_script.append(
+                "\\" + copy_statement(name, f"'{name}.copy'", bool(time_spread)).replace("COPY", "copy", 1)
+            )
+
+    load_script.append("COMMIT;")
+    with open(os.path.join(out_dir, "load.sql"), "w", encoding="utf-8") as file:
+        file.write("\n".join(load_script) + "\n")
+    print(f"\nLoad the files with: cd {out_dir} && psql \"$DATABASE_URL\" -f load.sql")
+
+def copy_to_postgres(dsn, dataset, time_spread=None):
+    """Stream every table into PostgreSQL with COPY in a single transaction.
+
+    Link rows are spooled to a temporary file while their parent table streams,
+    then copied once the parents exist, so generation stays single-pass.
+    """
+    try:
+        import psycopg
+    except ImportError:
+        raise SystemExit("Loading into PostgreSQL needs psycopg: pip install -r requirements-db.txt")
+
+    with psycopg.connect(dsn) as connection, connection.cursor() as cursor:
+        for table, link_table, rows in generate_copy_rows(dataset, time_spread):
+            started = time.perf_counter()
+            with tempfile.TemporaryFile("w+", encoding="utf-8") as spool:
+                with cursor.copy(copy_statement(table, timestamped=bool(time_spread))) as copy:
+                    count = buffered_writes(rows, copy.write, spool.write)
+                report_copy_rate(table, count, started)
+
+                if link_table:
+                    spool.seek(0)
+                    with cursor.copy(copy_statement(link_table, timestamped=bool(time_spread))) as copy:
+                        while chunk := spool.read(1 << 20):
+                            copy.write(chunk)
+
+def report_copy_rate(table, count, started):
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f"Wrote {count} {table} rows in {elapsed:.2f}s ({count / elapsed * 60:,.0f} rows/min)")
+
+def bulk_load(out_dir=None, dsn=None, user_count=None, post_count=None, query_count=None,
+              conversation_count=None, seed=None, snapshot_path=None, zipf_exponent=None,
+              mean_conversation_length=None, corpus="templates", scenario=None, run_id=None):
+    """Generate every schema.sql table directly as COPY input, bypassing the API.
+
+    When the scenario has a time spread, created_at is written too, also for
+    rows replayed from a snapshot. With a run ID the rows are tagged with it
+    and the run is recorded under DEFAULT_RUNS_DIR for teardown.
+    """
+    scenario = load_scenario(scenario)
+    dataset = open_dataset(
+        snapshot_path, user_count, post_count, query_count, conversation_count, seed,
+        zipf_exponent, mean_conversation_length, corpus=corpus, scenario=scenario, run_id=run_id
+    )
+    print(f"Starting bulk load with seed {dataset.seed}...")
+    if run_id:
+        write_run_info(os.path.join(DEFAULT_RUNS_DIR, run_id), run_id, seed=dataset.seed, target=dsn or out_dir)
+
+    if dsn:
+        copy_to_postgres(dsn, dataset, scenario.time_spread)
+    else:
+        write_copy_files(out_dir, dataset, scenario.time_spread)
+
+    print("\nBulk load complete!")
+
+# --- Teardown ---
+
+# A valid index whose first column is the given one, whatever it is called
+FK_INDEX_QUERY = """
+    SELECT 1 FROM pg_index i
+    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+    WHERE i.indrelid = %s::regclass AND a.attname = %s AND i.indisvalid
+"""
+
+def fk_index_statements(table, column):
+    """Return the DDL indexing one link table column, replacing an index a failed build left invalid"""
+    name = f"{table.replace('-', '_')}_{column}_idx"
+    return (
+        f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"',
+        f'CREATE INDEX CONCURRENTLY "{name}" ON "{table}" ("{column}")',
+    )
+
+def check_fk_indexes(connect, create=False):
+    """Find the link table foreign keys without a valid index, and index them or print the DDL that would.
+
+    Without those indexes every cascaded delete scans its link table.
+    """
+    with connect() as connection:
+        missing = [
+            (table, column) for table, columns in TEARDOWN_FK_INDEXES.items() for column in columns
+            if not connection.execute(FK_INDEX_QUERY, (f'"{table}"', column)).fetchone()
+        ]
+    if missing and not create:
+        print("These link table foreign keys have no valid index, so each cascaded delete scans the table.")
+        print("Pass --create-fk-indexes, or run:")
+        for table, column in missing:
+            print("    " + ";\n    ".join(fk_index_statements(table, column)) + ";")
+        return
+    for table, column in missing:
+        started = time.perf_counter()
+        with connect() as connection:
+            # CONCURRENTLY keeps the table writable, and cannot run inside a transaction
+            for statement in fk_index_statements(table, column):
+                connection.execute(statement)
+        print(f"Indexed {table}.{column} in {time.perf_counter() - started:.2f}s")
+
+def id_batches(registry, kind, *params):
+    """Yield the registered UUIDs of one kind TEARDOWN_BATCH_SIZE at a time, followed by `params`"""
+    rows = registry.rows(kind)
+    for start in range(0, len(rows), TEARDOWN_BATCH_SIZE):
+        yield [uuid.UUID(bytes=packed) for packed in rows["id"][start:start + TEARDOWN_BATCH_SIZE].tolist()], *params
+
+def id_ranges(connect, table, *params):
+    """Yield consecutive id ranges spanning a table TEARDOWN_RANGE_SIZE at a time, followed by `params`"""
+    with connect() as connection:
+        low, high = connection.execute(f'SELECT min(id), max(id) FROM "{table}"').fetchone()
+    if low is None:
+        return
+    for start in range(low, high + 1, TEARDOWN_RANGE_SIZE):
+        yield start, start + TEARDOWN_RANGE_SIZE, *params
+
+def delete_batches(connect, statement, batches, concurrency):
+    """Run `statement` once per batch of parameters over `concurrency` connections, returning rows deleted.
+
+    Each batch commits on its own, so locks are held briefly and an
+    interrupted teardown keeps what it already deleted.
+    """
+    lock = threading.Lock()
+    deleted = 0
+
+    def worker():
+        nonlocal deleted
+        with connect() as connection, connection.cursor() as cursor:
+            while True:
+                with lock:
+                    params = next(batches, None)
+                if params is None:
+                    return
+                cursor.execute(statement, params)
+                with lock:
+                    deleted += cursor.rowcount
+
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return deleted
+
+def teardown_plan(connect, run_id, registry=None):
+    """Return (table, DELETE statement, parameter batches) for each table a run is deleted from.
+
+    With a registry the run's own messages and posts are deleted by UUID.
+    Users are always found by the run's email subdomain and queries by its
+    tag, scanning those tables in id ranges, so users a registry missed go
+    with their queries; without a registry every table is scanned this
+    way. Either way only tagged rows match, so a registry shared with
+    untagged runs is safe to use.
+    """
+    marker = "%" + RUN_MARKER.format(run_id=run_id)
+    patterns = {table: marker for table in TEARDOWN_TABLES}
+    patterns["User"] = run_email("%@%", run_id)
+    plan = []
+    for table, (id_column, tag_column) in TEARDOWN_TABLES.items():
+        if registry and table in ("Message", "Posts"):
+            kind = {"Message": "message", "Posts": "post"}[table]
+            statement = f'DELETE FROM "{table}" WHERE {id_column} = ANY(%s) AND {tag_column} LIKE %s'
+            batches = id_batches(registry, kind, patterns[table])
+        else:
+            statement = f'DELETE FROM "{table}" WHERE id >= %s AND id < %s AND {tag_column} LIKE %s'
+            batches = id_ranges(connect, table, patterns[table])
+        plan.append((table, statement, batches))
+    return plan
+
+def teardown(dsn, run_id=None, registry_path=None, concurrency=DEFAULT_TEARDOWN_CONCURRENCY, by_tag=False,
+             create_fk_indexes=False, token_cache_path=DEFAULT_TOKEN_CACHE):
+    """Delete every row a tagged run created, straight from PostgreSQL.
+
+    Messages, posts, queries and users are deleted in that order in
+    concurrent batches, and the ON DELETE CASCADE foreign keys remove their
+    link rows. The run's registry, by default DEFAULT_RUNS_DIR/<run ID>,
+    says which messages and posts to delete; users and queries, and
+    without a registry or with `by_tag` every table, are scanned for the
+    run's email subdomain or tag instead, which also finds rows a registry
+    missed, such as those bulk loaded or seeded on other machines. Link
+    table foreign keys without a valid index are listed, or indexed first
+    with `create_fk_indexes`.
+    """
+    try:
+        import psycopg
+    except ImportError:
+        raise SystemExit("Teardown needs psycopg: pip install -r requirements-db.txt")
+
+    registry_path = registry_path or (os.path.join(DEFAULT_RUNS_DIR, run_id) if run_id else None)
+    run_info = read_run_info(registry_path) if registry_path else None
+    if run_info and run_id and run_info["run_id"] != run_id:
+        raise SystemExit(f"{registry_path} belongs to run {run_info['run_id']}, not {run_id}")
+    run_id = run_id or (run_info and run_info["run_id"])
+    if not run_id:
+        raise SystemExit(f"No run.json found in {registry_path}; pass the run's --run-id")
+    registry = None
+    if not by_tag and registry_path and os.path.exists(os.path.join(registry_path, "user.npy")):
+        registry = EntityRegistry.load(registry_path)
+
+    connect = functools.partial(psycopg.connect, dsn, autocommit=True)
+    check_fk_indexes(connect, create_fk_indexes)
+
+    if registry:
+        print(f"Tearing down run {run_id}: {registry.describe()} registered in {registry_path}")
+    else:
+        print(f"Tearing down run {run_id} by scanning for its tag")
+    total, started = 0, time.perf_counter()
+    try:
+        for table, statement, batches in teardown_plan(connect, run_id, registry):
+            table_started = time.perf_counter()
+            deleted = delete_batches(connect, statement, batches, concurrency)
+            total += deleted
+            elapsed = max(time.perf_counter() - table_started, 1e-9)
+            print(f"Deleted {deleted} {table} rows in {elapsed:.2f}s ({deleted / elapsed:,.0f} rows/s)")
+    finally:
+        if registry:
+            registry.close()
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f"\nDeleted {total} rows of run {run_id} in {elapsed:.2f}s ({total / elapsed:,.0f} rows/s), "
+          "plus their link rows")
+
+    if token_cache_path and os.path.exists(token_cache_path):
+        # The run's users are gone, so their cached tokens would only fail
+        token_cache = TokenCache(token_cache_path, BASE_URL)
+        token_cache.forget(lambda email: f"@{run_id}." in email)
+        token_cache.save()
+
+def bench_request(endpoint, rng, scenario=None):
+    """Return (method, endpoint, payload, params) for one benchmark request"""
+    if endpoint == "search":
+        return "GET", endpoint, None, {"query": rng.choice(load_scenario(scenario).search_terms)}
+    if endpoint == "db_data":
+        return "POST", endpoint, rng.choice(db_data_selects), None
+    return "POST", endpoint, {}, None
+
+def parse_bench_mix(value):
+    """Parse a `search=4,get_posts=2` style endpoint weight list"""
+    mix = {}
+    for part in value.split(","):
+        endpoint, _, weight = part.partition("=")
+        endpoint = endpoint.strip()
+        try:
+            mix[endpoint] = float(weight) if weight else 1.0
+        except ValueError:
+            mix[endpoint] = -1
+        if endpoint not in READ_ENDPOINTS or mix[endpoint] < 0:
+            raise argparse.ArgumentTypeError(
+                f"expected ENDPOINT=WEIGHT with ENDPOINT in {', '.join(READ_ENDPOINTS)}, got {part!r}"
+            )
+    if not sum(mix.values()):
+        raise argparse.ArgumentTypeError("at least one endpoint needs a positive weight")
+    return mix
+
+async def run_benchmark_async(base_url, mix, concurrency, duration, request_count, user_count, seed,
+                              token_cache=None, scenario=None):
+    """Drive the read endpoints with a weighted mix and return their metrics"""
+    rng = make_rng(seed, "bench")
+    endpoints = list(mix)
+    weights = [mix[endpoint] for endpoint in endpoints]
+
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=KEEPALIVE_TIMEOUT)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        client = ApiClient(session, base_url, {"signup": concurrency, "login": concurrency}, Metrics())
+
+        print("Authenticating benchmark users...")
+        user_clients = [
+            user for user in await create_users(
+                client, enumerate(generate_users(user_count, scenario)), user_count, concurrency,
+                token_cache=token_cache
+            )
+            if user and user.token
+        ]
+        client.metrics.progress(final=True)
+        if not user_clients:
+            print("No users could be authenticated. Exiting...")
+            return None
+
+        print(f"\nBenchmarking {', '.join(endpoints)} with {concurrency} concurrent requests...")
+        # Authentication is not part of the measurement
+        metrics = client.metrics = Metrics()
+        remaining = request_count
+        deadline = metrics.started + duration if duration else None
+
+        async def worker():
+            nonlocal remaining
+            while True:
+                if deadline and time.perf_counter() >= deadline:
+                    return
+                if remaining is not None:
+                    if remaining <= 0:
+                        return
+                    remaining -= 1
+
+                endpoint = rng.choices(endpoints, weights)[0]
+                method, endpoint, payload, params = bench_request(endpoint, rng, scenario)
+                user = rng.choice(user_clients)
+                with contextlib.suppress(aiohttp.ClientError, asyncio.TimeoutError):
+                    # Failures are already recorded by the client
+                    await user.request(method, endpoint, payload, params)
+                metrics.progress()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        metrics.stop()
+        metrics.progress(final=True)
+    return metrics
+
+def run_benchmark(base_url=BASE_URL, mix=None, concurrency=DEFAULT_CONCURRENCY, duration=None,
+                  request_count=None, user_count=None, seed=None, label=None, report_path=None,
+                  token_cache_path=DEFAULT_TOKEN_CACHE, mock_server=None, prometheus_path=None, scenario=None):
+    """Benchmark the read endpoints and write a JSON latency report.
+
+    Runs for `duration` seconds or `request_count` requests, whichever is
+    given; with neither it runs for DEFAULT_BENCH_DURATION seconds. With a
+    mock server, it is started in-process and benchmarked instead of base_url.
+    """
+    mix = mix or DEFAULT_BENCH_MIX
+    scenario = load_scenario(scenario)
+    user_count = scenario.count("users") if user_count is None else user_count
+    seed = random.randrange(2**32) if seed is None else seed
+    if duration is None and request_count is None:
+        duration = DEFAULT_BENCH_DURATION
+
+    # Mock tokens are signed with a per-process secret, so caching them is pointless
+    token_cache = TokenCache(token_cache_path, base_url) if token_cache_path and not mock_server else None
+    metrics = asyncio.run(run_against(base_url, mock_server, lambda url: run_benchmark_async(
+        url, mix, concurrency, duration, request_count, user_count, seed, token_cache, scenario
+    )))
+    if metrics is None:
+        return None
+
+    metrics.print_table(list(mix))
+    report = {
+        "label": label,
+        "base_url": base_url,
+        "seed": seed,
+        "concurrency": concurrency,
+        "mix": mix,
+        **metrics.to_dict(),
+    }
+    del report["rows"]
+
+    text = json.dumps(report, indent=2)
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+        print(f"\nBenchmark report written to {report_path}")
+    else:
+        print(text)
+    metrics.write(prometheus_path=prometheus_path)
+    return report
+
+def write_search_workload(path, post_count=None, user_count=None, seed=None,
+                          terms_per_bucket=SEARCH_TERMS_PER_BUCKET, scenario=None):
+    """Write the search terms and expected hit counts for a seeded search corpus"""
+    scenario = load_scenario(scenario)
+    user_count = scenario.count("users") if user_count is None else user_count
+    post_count = scenario.count("posts", user_count) if post_count is None else post_count
+    print(f"Indexing {post_count} search corpus posts with seed {seed}...")
+    started = time.perf_counter()
+    workload = build_search_workload(post_count, user_count, seed, terms_per_bucket, scenario)
+    for bucket, terms in workload["buckets"].items():
+        counts = [term["expected"] for term in terms]
+        print(f"{bucket:>12}: {len(terms)} terms matching {min(counts)}-{max(counts)} posts")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(workload, file, indent=2)
+        file.write("\n")
+    print(f"Search workload written to {path} in {time.perf_counter() - started:.1f}s")
+
+async def run_search_benchmark_async(base_url, workload, concurrency, duration, request_count, seed,
+                                     max_rows=SEARCH_MAX_ROWS):
+    """Search for each selectivity bucket's terms in turn, checking the result counts.
+
+    Returns {bucket: (metrics, checks)}, where checks counts the responses
+    whose number of posts did or did not match the expected count. A term
+    expected to match more than `max_rows` posts is expected to return
+    exactly `max_rows`, and its responses are also counted as capped.
+    """
+    rng = make_rng(seed, "search_bench")
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=KEEPALIVE_TIMEOUT)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    results = {}
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        # Searching needs no token, so no users are authenticated
+        client = ApiClient(session, base_url, {})
+        for bucket, terms in workload["buckets"].items():
+            print(f"\nSearching {len(terms)} {bucket} terms with {concurrency} concurrent requests...")
+            metrics = client.metrics = Metrics(label=bucket)
+            checks = {"matched": 0, "mismatched": 0, "capped": 0, "examples": []}
+            remaining = request_count
+            deadline = metrics.started + duration if duration else None
+
+            async def worker():
+                nonlocal remaining
+                while True:
+                    if deadline and time.perf_counter() >= deadline:
+                        return
+                    if remaining is not None:
+                        if remaining <= 0:
+                            return
+                        remaining -= 1
+
+                    term = rng.choice(terms)
+                    try:
+                        status, body = await client.request("GET", "search", params={"query": term["term"]})
+                    except (aiohttp.ClientError, asyncio.TimeoutError):
+                        continue
+                    if status == 200:
+                        found = len(json.loads(body))
+                        expected = min(term["expected"], max_rows)
+                        if term["expected"] > max_rows:
+                            checks["capped"] += 1
+                        if found == expected:
+                            checks["matched"] += 1
+                        else:
+                            checks["mismatched"] += 1
+                            if len(checks["examples"]) < FAILURE_LOG_LIMIT:
+                                checks["examples"].append({**term, "found": found})
+                                metrics.write_line(f"'{term['term']}' found {found} posts, expected {expected}")
+                    metrics.progress()
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            metrics.stop()
+            metrics.progress(final=True)
+            results[bucket] = (metrics, checks)
+    return results
+
+def run_search_benchmark(workload_path, base_url=BASE_URL, concurrency=DEFAULT_CONCURRENCY, duration=None,
+                         request_count=None, seed=None, label=None, report_path=None, mock_server=None,
+                         prometheus_path=None, max_rows=SEARCH_MAX_ROWS):
+    """Benchmark /posts/search per selectivity bucket and write a JSON report.
+
+    Each bucket runs for `duration` seconds or `request_count` requests; with
+    neither it sends SEARCH_BENCH_REQUESTS. Expected counts assume the posts
+    were seeded from the workload's search corpus with nothing else matching,
+    and are capped at the backend's `max_rows` response limit.
+    """
+    with open(workload_path, encoding="utf-8") as file:
+        workload = json.load(file)
+    seed = random.randrange(2**32) if seed is None else seed
+    if duration is None and request_count is None:
+        request_count = SEARCH_BENCH_REQUESTS
+
+    results = asyncio.run(run_against(base_url, mock_server, lambda url: run_search_benchmark_async(
+        url, workload, concurrency, duration, request_count, seed, max_rows
+    )))
+
+    print()
+    # One combined set of metrics, with an endpoint per bucket, for Prometheus
+    combined = Metrics(progress=False)
+    buckets = {}
+    for bucket, (metrics, checks) in results.items():
+        latency = metrics.endpoint("search").latency
+        capped = f", {checks['capped']} capped at {max_rows}" if checks["capped"] else ""
+        print(
+            f"{bucket:>12}: {latency.count:>7} req  p50 {latency.percentile(0.50) * 1000:.1f}ms  "
+            f"p95 {latency.percentile(0.95) * 1000:.1f}ms  p99 {latency.percentile(0.99) * 1000:.1f}ms  "
+            f"{checks['mismatched']} wrong counts{capped}"
+        )
+        state = metrics.state()
+        state["endpoints"] = {f"search_{bucket}": state["endpoints"].get("search", {})} if latency.count else {}
+        combined.merge(state)
+        expected = [term["expected"] for term in workload["buckets"][bucket]]
+        buckets[bucket] = {
+            "terms": len(expected),
+            "expected_hits": {"min": min(expected), "max": max(expected)},
+            **checks,
+            **metrics.to_dict()["endpoints"].get("search", {}),
+        }
+
+    report = {
+        "label": label,
+        "base_url": base_url,
+        "seed": seed,
+        "concurrency": concurrency,
+        "max_rows": max_rows,
+        "workload": {key: workload[key] for key in ("seed", "user_count", "post_count")},
+        "buckets": buckets,
+    }
+    text = json.dumps(report, indent=2)
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+        print(f"\nSearch benchmark report written to {report_path}")
+    else:
+        print(text)
+    combined.write(prometheus_path=prometheus_path)
+    return report
+
+# --- Live message soak test ---
+
+def process_memory():
+    """Return this process's resident memory in bytes, or its peak where only that is known"""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class LiveSoak:
+    """State of one soak test: open streams, messages in flight and what arrived.
+
+    Every message carries a marker naming the run and its sequence number, so
+    a delivery is matched to its send however the backend reorders them.
+    """
+
+    def __init__(self, run_id, heartbeat, metrics):
+        self.run_id = run_id
+        self.heartbeat = heartbeat
+        self.metrics = metrics
+        self.connected = {}
+        self.sent = {}
+        self.delivered = set()
+        self.down_at_send = set()
+        self.counts = dict.fromkeys(
+            ("sent", "send_failed", "delivered", "duplicates", "foreign", "error_frames", "disconnects", "late_gaps"), 0
+        )
+        self.delivery = LatencyHistogram()
+        self.gaps = LatencyHistogram()
+        self.memory = []
+
+    def marker(self, sequence):
+        return f"soak {self.run_id}:{sequence}"
+
+    def receive(self, data, now):
+        """Match one SSE data frame to the message it delivers"""
+        try:
+            event = json.loads(data)
+        except ValueError:
+            event = {"error": data}
+        if "error" in event:
+            self.counts["error_frames"] += 1
+            return
+        text = (event.get("message") or {}).get("message", "")
+        prefix = f"soak {self.run_id}:"
+        sequence = int(text[len(prefix):]) if text.startswith(prefix) else None
+        if sequence not in self.sent:
+            # Messages from other traffic or an earlier run
+            self.counts["foreign"] += 1
+        elif sequence in self.delivered:
+            self.counts["duplicates"] += 1
+        else:
+            self.delivered.add(sequence)
+            self.counts["delivered"] += 1
+            self.delivery.record(now - self.sent[sequence])
+
+    def missed(self):
+        return [sequence for sequence in self.sent if sequence not in self.delivered]
+
+async def hold_live_stream(session, base_url, user, soak, stop):
+    """Keep one user's /messages/get_live stream open until `stop`, reopening it when it drops"""
+    url = base_url + "/messages/get_live"
+    attempt = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            async with session.get(url, headers=user.headers) as response:
+                soak.metrics.record_request("get_live", response.status, time.perf_counter() - started)
+                if response.status != 200:
+                    raise aiohttp.ClientResponseError(
+                        response.request_info, (), status=response.status, message=await response.text()
+                    )
+                soak.connected[user.id] = True
+                attempt = 0
+                last_frame = time.perf_counter()
+                data = []
+                # A frame ends at a blank line; lines starting with ':' are heartbeats
+                async for line in response.content:
+                    line = line.decode("utf-8", "replace").rstrip("\r\n")
+                    now = time.perf_counter()
+                    if line.startswith("data:"):
+                        data.append(line[5:].lstrip())
+                    elif line == "" or line.startswith(":"):
+                        if line == "" and data:
+                            soak.receive("\n".join(data), now)
+                            data = []
+                        gap = now - last_frame
+                        soak.gaps.record(gap)
+                        if gap > soak.heartbeat * SOAK_HEARTBEAT_TOLERANCE:
+                            soak.counts["late_gaps"] += 1
+                        last_frame = now
+                    if stop.is_set():
+                        return
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if not isinstance(e, aiohttp.ClientResponseError):
+                soak.metrics.record_request("get_live", type(e).__name__, time.perf_counter() - started)
+        finally:
+            if soak.connected.pop(user.id, None) and not stop.is_set():
+                soak.counts["disconnects"] += 1
+        if not stop.is_set():
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+
+async def run_live_soak_async(base_url, streams, rate, duration, user_count, seed, heartbeat, concurrency,
+                              token_cache=None, scenario=None):
+    """Hold `streams` live message streams open while sending to them at `rate` per second"""
+    rng = make_rng(seed, "soak")
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=KEEPALIVE_TIMEOUT)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    # Streams stay open for the whole run, so they get their own unlimited pool
+    # and only time out when silent for well past a heartbeat
+    stream_connector = aiohttp.TCPConnector(limit=0)
+    stream_timeout = aiohttp.ClientTimeout(sock_connect=REQUEST_TIMEOUT, sock_read=heartbeat * 3)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session, \
+            aiohttp.ClientSession(connector=stream_connector, timeout=stream_timeout) as stream_session:
+        client = ApiClient(
+            session, base_url, {"signup": concurrency, "login": concurrency, "send_message": concurrency}, Metrics()
+        )
+        print("Authenticating soak test users...")
+        user_clients = [
+            user for user in await create_users(
+                client, enumerate(generate_users(user_count, scenario)), user_count, concurrency,
+                token_cache=token_cache
+            )
+            if user and user.token
+        ]
+        client.metrics.progress(final=True)
+        if len(user_clients) < 2:
+            print("At least two users must be authenticated to send messages. Exiting...")
+            return None
+        listeners = user_clients[:streams]
+
+        metrics = client.metrics = Metrics(progress=False)
+        soak = LiveSoak(f"{rng.getrandbits(32):08x}", heartbeat, metrics)
+        stop = asyncio.Event()
+        print(f"\nOpening {len(listeners)} live message streams...")
+        memory_before = process_memory()
+        holders = [
+            asyncio.create_task(hold_live_stream(stream_session, base_url, user, soak, stop)) for user in listeners
+        ]
+        opened = time.perf_counter()
+        while len(soak.connected) < len(listeners) and time.perf_counter() - opened < REQUEST_TIMEOUT:
+            await asyncio.sleep(0.1)
+        memory_open = process_memory()
+        print(f"{len(soak.connected)} streams open after {time.perf_counter() - opened:.1f}s")
+
+        async def send(sequence, sender, receiver):
+            if not soak.connected.get(receiver.id):
+                soak.down_at_send.add(sequence)
+            soak.sent[sequence] = time.perf_counter()
+            try:
+                status, body = await sender.post(
+                    "send_message", {"receiver_id": receiver.id, "content": soak.marker(sequence)}
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                status = None
+            if status == 200:
+                soak.counts["sent"] += 1
             else:
-                print(f"Failed to send initial message: {send_msg_response.text}")
-            
-            # Add a small delay
-            time.sleep(0.3)
-            
-        except Exception as e:
-            print(f"Error creating message conversation: {str(e)}")
-    
-    print("\nDatabase population complete!")
+                # Failed sends are not expected to arrive
+                soak.counts["send_failed"] += 1
+                soak.sent.pop(sequence, None)
+
+        print(f"Sending {rate:g} messages/s for {duration:g}s...")
+        sends = set()
+        started = time.perf_counter()
+        next_report = started + PROGRESS_LOG_INTERVAL
+        sequence = 0
+        while (now := time.perf_counter()) < started + duration:
+            # Sends are scheduled at the target rate however long responses take
+            due = int((now - started) * rate) + 1
+            while sequence < due:
+                receiver = rng.choice(listeners)
+                sender = rng.choice(user_clients)
+                while sender is receiver:
+                    sender = rng.choice(user_clients)
+                task = asyncio.create_task(send(sequence, sender, receiver))
+                sends.add(task)
+                task.add_done_callback(sends.discard)
+                sequence += 1
+            if now >= next_report:
+                soak.memory.append(process_memory())
+                metrics.write_line(
+                    f"[{now - started:7.1f}s] streams {len(soak.connected)}/{len(listeners)}  "
+                    f"sent {soak.counts['sent']}  delivered {soak.counts['delivered']}  "
+                    f"p99 {soak.delivery.percentile(0.99) * 1000:.1f}ms  disconnects {soak.counts['disconnects']}"
+                )
+                next_report += PROGRESS_LOG_INTERVAL
+            await asyncio.sleep(min(1 / rate, started + duration - now, 0.1))
+        send_seconds = time.perf_counter() - started
+        await asyncio.gather(*sends)
+
+        print("Waiting for late deliveries...")
+        drained = time.perf_counter()
+        while soak.missed() and time.perf_counter() - drained < SOAK_DRAIN_TIMEOUT:
+            await asyncio.sleep(0.1)
+        memory_end = process_memory()
+        stop.set()
+        for task in holders:
+            task.cancel()
+        await asyncio.gather(*holders, return_exceptions=True)
+        metrics.stop()
+
+    missed = soak.missed()
+    soak.counts["missed"] = len(missed)
+    soak.counts["missed_while_disconnected"] = len(soak.down_at_send.intersection(missed))
+    samples = [sample for sample in (memory_before, memory_open, *soak.memory, memory_end) if sample is not None]
+    memory = {}
+    if samples:
+        memory = {
+            "before_streams_mb": round(samples[0] / 2**20, 1),
+            "peak_mb": round(max(samples) / 2**20, 1),
+            "end_mb": round(samples[-1] / 2**20, 1),
+        }
+        if memory_before is not None and memory_open is not None and listeners:
+            memory["per_stream_kb"] = round((memory_open - memory_before) / len(listeners) / 1024, 1)
+    return {
+        "streams": len(listeners),
+        "target_rate": rate,
+        "achieved_rate": round((soak.counts["sent"] + soak.counts["send_failed"]) / send_seconds, 2),
+        **soak.counts,
+        "delivery_latency": soak.delivery.to_dict(),
+        "frame_gaps": soak.gaps.to_dict(),
+        "client_memory": memory,
+        "endpoints": {
+            name: endpoint.to_dict(metrics.elapsed())
+            for name, endpoint in metrics.endpoints.items() if endpoint.latency.count
+        },
+    }
+
+def run_live_soak(base_url=BASE_URL, streams=DEFAULT_SOAK_STREAMS, rate=DEFAULT_SOAK_RATE,
+                  duration=DEFAULT_SOAK_DURATION, user_count=None, seed=None, heartbeat=MOCK_HEARTBEAT_INTERVAL,
+                  concurrency=DEFAULT_CONCURRENCY, label=None, report_path=None,
+                  token_cache_path=DEFAULT_TOKEN_CACHE, mock_server=None, scenario=None):
+    """Soak test /messages/get_live fan-out and write a JSON report.
+
+    The first `streams` seeded users each hold a live stream open while
+    random seeded users send them messages at `rate` per second. The report
+    has the send-to-delivery latency, messages never delivered, gaps between
+    frames longer than the heartbeat allows, and this client's memory use.
+    """
+    scenario = load_scenario(scenario)
+    user_count = max(scenario.count("users") if user_count is None else user_count, streams)
+    seed = random.randrange(2**32) if seed is None else seed
+    token_cache = TokenCache(token_cache_path, base_url) if token_cache_path and not mock_server else None
+    result = asyncio.run(run_against(base_url, mock_server, lambda url: run_live_soak_async(
+        url, streams, rate, duration, user_count, seed, heartbeat, concurrency, token_cache, scenario
+    )))
+    if result is None:
+        return None
+
+    latency = result["delivery_latency"]
+    print(
+        f"\n{result['delivered']}/{result['sent']} messages delivered, {result['missed']} missed "
+        f"({result['missed_while_disconnected']} while the stream was down), {result['duplicates']} duplicates"
+    )
+    print(
+        f"Delivery latency p50 {latency['p50_ms']}ms  p95 {latency['p95_ms']}ms  p99 {latency['p99_ms']}ms  "
+        f"max {latency['max_ms']}ms"
+    )
+    print(
+        f"{result['disconnects']} disconnects, {result['late_gaps']} frame gaps over "
+        f"{heartbeat * SOAK_HEARTBEAT_TOLERANCE:g}s, longest {result['frame_gaps']['max_ms'] / 1000:.1f}s"
+    )
+    report = {"label": label, "base_url": base_url, "seed": seed, "heartbeat_s": heartbeat, **result}
+    text = json.dumps(report, indent=2)
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+        print(f"\nSoak test report written to {report_path}")
+    else:
+        print(text)
+    return report
+
+# --- Continuous traffic ---
+
+def parse_traffic_rates(value):
+    """Parse a `post=2,message=10` style list of arrivals per second"""
+    rates = {}
+    for part in value.split(","):
+        kind, _, rate = part.partition("=")
+        kind = kind.strip()
+        try:
+            rates[kind] = float(rate)
+        except ValueError:
+            rates[kind] = -1
+        if kind not in TRAFFIC_ENDPOINTS or rates[kind] < 0:
+            raise argparse.ArgumentTypeError(
+                f"expected KIND=RATE with KIND in {', '.join(TRAFFIC_ENDPOINTS)}, got {part!r}"
+            )
+    if not sum(rates.values()):
+        raise argparse.ArgumentTypeError("at least one kind needs a positive rate")
+    return rates
+
+def traffic_rows(kind, user_count, seed, scenario=None):
+    """Yield rows of one kind without end, from the same generators as seeding"""
+    endless = sys.maxsize
+    if kind == "post":
+        yield from generate_posts(endless, user_count, seed, scenario=scenario)
+    elif kind == "query":
+        yield from generate_queries(endless, user_count, seed, scenario=scenario)
+    else:
+        # Replies keep their place in the conversation, alternating authors
+        for conversation in generate_message_pairs(endless, user_count, seed, scenario=scenario):
+            people = (conversation["sender"], conversation["receiver"])
+            for position, content in enumerate(conversation["messages"]):
+                yield {"sender": people[position % 2], "receiver": people[1 - position % 2], "content": content}
+
+def traffic_request(kind, row, user_clients):
+    """Return (user, endpoint, payload) for one arrival, or None when its user is missing"""
+    if kind == "message":
+        sender, receiver = user_clients[row["sender"]], user_clients[row["receiver"]]
+        if sender is None or receiver is None:
+            return None
+        return sender, "send_message", {"sender_id": sender.id, "receiver_id": receiver.id, "content": row["content"]}
+    user = user_clients[row["owner"]]
+    if user is None:
+        return None
+    if kind == "post":
+        return user, "add_post", {"title": row["title"], "content": row["content"], "user_id": user.id}
+    return user, "add_query", {"text": row["text"], "department": row["department"], "email": user.email}
+
+class TrafficGenerator:
+    """Open-loop write traffic with Poisson arrivals following a daily curve.
+
+    Each kind's rate swings by `amplitude` around its mean on a cosine
+    peaking at `peak_hour` UTC; `day_length` seconds make up one day, so
+    a whole day can be replayed in minutes. Arrivals are drawn at the peak
+    rate and thinned to the curve. Every arrival is sent at its scheduled
+    time however many earlier requests are still waiting, and its latency is
+    measured from that time, so a slow backend shows up as latency instead of
+    as fewer requests (coordinated omission). Rows and users come from the
+    scenario.
+    """
+
+    def __init__(self, rates, amplitude=0.0, peak_hour=DEFAULT_DIURNAL_PEAK_HOUR, day_length=86400,
+                 seed=None, metrics=None, max_in_flight=TRAFFIC_MAX_IN_FLIGHT, scenario=None):
+        self.rates = rates
+        self.amplitude = amplitude
+        self.peak_hour = peak_hour
+        self.day_length = day_length
+        self.seed = seed
+        self.metrics = metrics or Metrics(progress=False, keep_failed_rows=False)
+        self.max_in_flight = max_in_flight
+        self.scenario = load_scenario(scenario)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.day_start = now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+        self.scheduled = dict.fromkeys(rates, 0)
+        self.dropped = dict.fromkeys(rates, 0)
+        self.latency = {kind: LatencyHistogram() for kind in rates}
+        self.in_flight = set()
+        self.started = None
+
+    def phase(self, elapsed):
+        """Angle of the daily curve `elapsed` seconds into the run"""
+        clock = self.day_start + elapsed * 86400 / self.day_length
+        return 2 * math.pi * (clock - self.peak_hour * 3600) / 86400
+
+    def rate(self, kind, elapsed):
+        return self.rates[kind] * (1 + self.amplitude * math.cos(self.phase(elapsed)))
+
+    def expected(self, kind, elapsed):
+        """Arrivals of `kind` the curve asks for in the first `elapsed` seconds"""
+        swing = (math.sin(self.phase(elapsed)) - math.sin(self.phase(0))) * self.day_length / (2 * math.pi)
+        return self.rates[kind] * (elapsed + self.amplitude * swing)
+
+    async def deliver(self, kind, row, scheduled, user_clients):
+        request = traffic_request(kind, row, user_clients)
+        if request is None:
+            self.metrics.record_row(kind, "skipped")
+            return
+        user, endpoint, payload = request
+        try:
+            status, text = await user.post(endpoint, payload)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status, text = None, f"{type(e).__name__}: {e}"
+        self.latency[kind].record(time.perf_counter() - scheduled)
+        if status is not None and is_success(status):
+            self.metrics.record_row(kind, "created")
+        else:
+            self.metrics.record_row(kind, "failed", f"Failed to send {kind}: {text}")
+
+    async def arrivals(self, kind, user_clients, duration):
+        """Dispatch one kind's arrivals on schedule until `duration` seconds have passed"""
+        rng = make_rng(self.seed, f"traffic_{kind}")
+        rows = traffic_rows(kind, len(user_clients), self.seed, self.scenario)
+        peak = self.rates[kind] * (1 + self.amplitude)
+        if not peak:
+            return
+        elapsed = 0.0
+        while True:
+            elapsed += rng.expovariate(peak)
+            if duration is not None and elapsed >= duration:
+                return
+            delay = self.started + elapsed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if rng.random() * peak >= self.rate(kind, elapsed):
+                continue
+            self.scheduled[kind] += 1
+            if len(self.in_flight) >= self.max_in_flight:
+                self.dropped[kind] += 1
+                continue
+            task = asyncio.create_task(self.deliver(kind, next(rows), self.started + elapsed, user_clients))
+            self.in_flight.add(task)
+            task.add_done_callback(self.in_flight.discard)
+
+    def report_lines(self, since=None):
+        """Return a line per kind comparing achieved with target rates.
+
+        `since` is the (elapsed, created, scheduled) state of an earlier
+        call, to report on the interval after it; returns the lines and the
+        state to pass next time.
+        """
+        elapsed = (self.metrics.stopped or time.perf_counter()) - self.started
+        state = {
+            kind: (elapsed, self.metrics.rows.get(kind, {}).get("created", 0), self.scheduled[kind])
+            for kind in self.rates
+        }
+        lines = []
+        for kind in self.rates:
+            start, created, scheduled = since[kind] if since else (0.0, 0, 0)
+            seconds = elapsed - start
+            if seconds <= 0:
+                continue
+            target = (self.expected(kind, elapsed) - self.expected(kind, start)) / seconds
+            rows = self.metrics.rows.get(kind, {})
+            latency = self.latency[kind]
+            lines.append(
+                f"{kind:>8}: target {target:8.2f}/s  scheduled {(self.scheduled[kind] - scheduled) / seconds:8.2f}/s  "
+                f"achieved {(state[kind][1] - created) / seconds:8.2f}/s  p50 {latency.percentile(0.50) * 1000:.1f}ms  "
+                f"p99 {latency.percentile(0.99) * 1000:.1f}ms  failed {rows.get('failed', 0)}  "
+                f"dropped {self.dropped[kind]}"
+            )
+        return lines, state
+
+    async def run(self, base_url, user_count, duration=None, concurrency=DEFAULT_CONCURRENCY, token_cache=None,
+                  report_interval=PROGRESS_LOG_INTERVAL):
+        connector = aiohttp.TCPConnector(limit=0, keepalive_timeout=KEEPALIVE_TIMEOUT)
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            # Only sign-in is limited; writes go out whenever they are due
+            client = ApiClient(session, base_url, {"signup": concurrency, "login": concurrency}, Metrics())
+            print("Authenticating traffic users...")
+            user_clients = await create_users(
+                client, enumerate(generate_users(user_count, self.scenario)), user_count, concurrency,
+                token_cache=token_cache
+            )
+            client.metrics.progress(final=True)
+            user_clients = [user if user and user.token else None for user in user_clients]
+            if not any(user_clients):
+                print("No users could be authenticated. Exiting...")
+                return
+
+            client.metrics = self.metrics
+            for kind in self.rates:
+                self.metrics.start_rows(kind)
+            rates = ", ".join(f"{kind} {rate:g}/s" for kind, rate in self.rates.items())
+            print(f"\nSending {rates} {f'for {duration:g}s' if duration else 'until interrupted'}...")
+            self.started = self.metrics.started = time.perf_counter()
+            schedulers = [
+                asyncio.create_task(self.arrivals(kind, user_clients, duration)) for kind in self.rates
+            ]
+            since = None
+            try:
+                while not all(task.done() for task in schedulers):
+                    await asyncio.wait(schedulers, timeout=report_interval)
+                    lines, since = self.report_lines(since)
+                    self.metrics.write_line(f"[{time.perf_counter() - self.started:9.1f}s]")
+                    for line in lines:
+                        self.metrics.write_line(line)
+                for task in schedulers:
+                    task.result()
+                # Rates are over the time arrivals were scheduled, not the final wait
+                self.metrics.stop()
+                if self.in_flight:
+                    print(f"Waiting for {len(self.in_flight)} requests in flight...")
+                    await asyncio.wait(self.in_flight, timeout=REQUEST_TIMEOUT)
+            finally:
+                # Requests cut short by an interrupt are neither successes nor failures
+                for task in (*schedulers, *self.in_flight):
+                    task.cancel()
+                if self.metrics.stopped is None:
+                    self.metrics.stop()
+
+def run_traffic(base_url=BASE_URL, rates=None, amplitude=None, peak_hour=None, day_length=86400, duration=None,
+                user_count=None, seed=None, concurrency=DEFAULT_CONCURRENCY, token_cache_path=DEFAULT_TOKEN_CACHE,
+                mock_server=None, summary_path=None, prometheus_path=None, scenario=None):
+    """Send open-loop write traffic until `duration` passes or the run is interrupted.
+
+    The daily curve defaults to the scenario's time spread, and is flat
+    without one.
+    """
+    scenario = load_scenario(scenario)
+    spread = scenario.time_spread
+    if amplitude is None:
+        amplitude = spread.diurnal_amplitude if spread else 0.0
+    if peak_hour is None:
+        peak_hour = spread.peak_hour if spread else DEFAULT_DIURNAL_PEAK_HOUR
+    user_count = scenario.count("users") if user_count is None else user_count
+    seed = random.randrange(2**32) if seed is None else seed
+    token_cache = TokenCache(token_cache_path, base_url) if token_cache_path and not mock_server else None
+    traffic = TrafficGenerator(
+        rates or DEFAULT_TRAFFIC_RATES, amplitude, peak_hour, day_length, seed, scenario=scenario
+    )
+    print(f"Starting continuous traffic with seed {seed}...")
+    try:
+        asyncio.run(run_against(base_url, mock_server, lambda url: traffic.run(
+            url, user_count, duration, concurrency, token_cache
+        )))
+    except KeyboardInterrupt:
+        print("\nInterrupted")
+    if traffic.started is None:
+        return traffic
+
+    print("\nWhole run:")
+    lines, _ = traffic.report_lines()
+    for line in lines:
+        print(line)
+    traffic.metrics.print_table([
+        endpoint for kind, endpoint in TRAFFIC_ENDPOINTS.items() if kind in traffic.rates
+    ])
+    traffic.metrics.write(summary_path, prometheus_path)
+    return traffic
+
+# --- Mock API server ---
+
+class MockApiServer:
+    """In-memory stand-in for the backend API, for offline client benchmarking.
+
+    Implements the auth, write and read endpoints the seeder and benchmark use
+    with the same response shapes as the Express controllers, including the
+    verifyToken check. Every request can be delayed by `latency` seconds plus
+    exponential `jitter`, and fails with a 500 or 429 at the given rates.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0,
+                 heartbeat=MOCK_HEARTBEAT_INTERVAL, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.heartbeat = heartbeat
+        self.rng = random.Random(seed)
+        self.secret = os.urandom(32)
+        self.runner = None
+
+        self.users = {}
+        self.users_by_id = {}
+        self.posts = []
+        self.post_users = []
+        self.queries = []
+        self.query_users = []
+        self.messages = {}
+        self.message_users = []
+        self.messages_by_user = {}
+        self.listeners = {}
+
+    # --- Tokens ---
+
+    def sign(self, user_id, email):
+        def encode(data):
+            return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+        now = int(time.time())
+        unsigned = encode({"alg": "HS256", "typ": "JWT"}) + "." + encode(
+            {"userId": user_id, "email": email, "iat": now, "exp": now + 7 * 24 * 3600}
+        )
+        signature = hmac.new(self.secret, unsigned.encode(), hashlib.sha256).digest()
+        return unsigned + "." + base64.urlsafe_b64encode(signature).rstrip(b"=").decode()
+
+    def verify(self, request):
+        """Return the token's user, or raise 401 like verifyToken"""
+        header = request.headers.get("Authorization", "")
+        token = header.split(" ")[1] if " " in header else request.query.get("token")
+        if not token:
+            raise web.HTTPUnauthorized(
+                text=json.dumps({"error": "Authentication required"}), content_type="application/json"
+            )
+        unsigned, _, signature = token.rpartition(".")
+        expected = base64.urlsafe_b64encode(
+            hmac.new(self.secret, unsigned.encode(), hashlib.sha256).digest()
+        ).rstrip(b"=").decode()
+        expires_at = jwt_expiry(token)
+        if not hmac.compare_digest(signature, expected) or not expires_at or expires_at < time.time():
+            raise web.HTTPUnauthorized(
+                text=json.dumps({"error": "Invalid or expired token"}), content_type="application/json"
+            )
+        payload = unsigned.split(".")[1]
+        return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+
+    # --- Request handling ---
+
+    @staticmethod
+    def now():
+        return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+    @web.middleware
+    async def inject_faults(self, request, handler):
+        # Read the body before the delay, so a client giving up meanwhile cannot fail the handler
+        await request.read()
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + (self.rng.expovariate(1 / self.jitter) if self.jitter else 0))
+        draw = self.rng.random()
+        if draw < self.error_rate:
+            return web.json_response({"error": "Injected failure"}, status=500)
+        if draw < self.error_rate + self.throttle_rate:
+            return web.json_response({"error": "Too many requests"}, status=429)
+        return await handler(request)
+
+    async def signup(self, request):
+        body = await request.json()
+        email = body.get("email")
+        if email in self.users:
+            return web.json_response({"error": "User with this email already exists"}, status=400)
+        user_id = str(uuid.uuid4())
+        user = {"user_id": user_id, "mail": email, "pass": body.get("password"), "created_at": self.now()}
+        self.users[email] = user
+        self.users_by_id[user_id] = user
+        return web.json_response({
+            "message": "User created successfully",
+            "token": self.sign(user_id, email),
+            "user": {"email": email, "user_id": user_id}
+        }, status=201)
+
+    async def login(self, request):
+        body = await request.json()
+        user = self.users.get(body.get("email"))
+        if not user or user["pass"] != body.get("password"):
+            return web.json_response({"error": "Invalid email or password"}, status=401)
+        return web.json_response({
+            "message": "Login successful",
+            "token": self.sign(user["user_id"], user["mail"]),
+            "user": {"email": user["mail"], "user_id": user["user_id"]}
+        })
+
+    async def add_post(self, request):
+        claims = self.verify(request)
+        body = await request.json()
+        errors = []
+        if len(body.get("title") or "") < 3:
+            errors.append({"path": ["title"], "message": "Title must be at least 3 characters long"})
+        if not body.get("content"):
+            errors.append({"path": ["content"], "message": "Content cannot be empty"})
+        if errors:
+            return web.json_response({"errors": errors}, status=400)
+        if claims["userId"] not in self.users_by_id:
+            return web.json_response({"error": "User not found."}, status=404)
+
+        post = {
+            "id": len(self.posts) + 1,
+            "post_id": str(uuid.uuid4()),
+            "created_at": self.now(),
+            "Title": body["title"],
+            "Content": body["content"],
+        }
+        post_user = {
+            "id": len(self.post_users) + 1,
+            "created_at": post["created_at"],
+            "post": post["post_id"],
+            "user": claims["userId"],
+        }
+        self.posts.append((post, body["title"].lower(), body["content"].lower()))
+        self.post_users.append(post_user)
+        return web.json_response({"message": "Post added successfully", "post": post, "postUser": post_user})
+
+    async def add_query(self, request):
+        claims = self.verify(request)
+        body = await request.json()
+        query = {
+            "id": len(self.queries) + 1,
+            "query_id": str(uuid.uuid4()),
+            "created_at": self.now(),
+            "text": body.get("text"),
+            "department": body.get("department"),
+            "user_mail": body.get("email"),
+        }
+        self.queries.append(query)
+        self.query_users.append({"user": claims["userId"], "query": query["query_id"]})
+        return web.json_response({"message": "Query added successfully"})
+
+    async def send_message(self, request):
+        claims = self.verify(request)
+        body = await request.json()
+        receiver_id = body.get("receiver_id")
+        if not body.get("content"):
+            return web.json_response(
+                {"errors": [{"path": ["content"], "message": "Message content cannot be empty"}]}, status=400
+            )
+        if claims["userId"] not in self.users_by_id:
+            return web.json_response({"error": "Sender not found."}, status=404)
+        if receiver_id not in self.users_by_id:
+            return web.json_response({"error": "Receiver not found."}, status=404)
+
+        message = {
+            "id": len(self.messages) + 1,
+            "message_id": str(uuid.uuid4()),
+            "created_at": self.now(),
+            "message": body["content"],
+            "seen": False,
+        }
+        message_user = {
+            "id": len(self.message_users) + 1,
+            "created_at": message["created_at"],
+            "sender": claims["userId"],
+            "reciver": receiver_id,
+            "message": message["message_id"],
+        }
+        self.messages[message["message_id"]] = message
+        self.message_users.append(message_user)
+        for user_id in {claims["userId"], receiver_id}:
+            self.messages_by_user.setdefault(user_id, []).append(message_user)
+
+        event = dict(message_user, message={
+            key: message[key] for key in ("message_id", "message", "seen", "created_at")
+        })
+        for queue in self.listeners.get(receiver_id, ()):
+            queue.put_nowait(event)
+
+        return web.json_response({
+            "message": "Message sent successfully",
+            "messageData": message,
+            "messageUserData": message_user,
+        })
+
+    async def get_posts(self, request):
+        self.verify(request)
+        latest = [post for post, _, _ in self.posts[-15:]][::-1]
+        return web.json_response([
+            {"Title": post["Title"], "Content": post["Content"], "created_at": post["created_at"]}
+            for post in latest
+        ])
+
+    async def search_posts(self, request):
+        query = request.query.get("query")
+        if not query:
+            return web.json_response({"error": "Search query is required"}, status=400)
+        # Like the ilike filter, this scans every post, and like PostgREST it returns at most max-rows
+        needle = query.lower()
+        found = (post for post, title, content in reversed(self.posts) if needle in title or needle in content)
+        return web.json_response(list(itertools.islice(found, SEARCH_MAX_ROWS)))
+
+    async def get_messages(self, request):
+        claims = self.verify(request)
+        user_id = claims["userId"]
+        if user_id not in self.users_by_id:
+            return web.json_response({"error": "User not found."}, status=404)
+        formatted = []
+        for link in self.messages_by_user.get(user_id, ()):
+            message = self.messages[link["message"]]
+            formatted.append({
+                "id": link["id"],
+                "sender": link["sender"],
+                "reciver": link["reciver"],
+                "created_at": link["created_at"],
+                "message": {"message": message["message"]},
+                "seen": message["seen"],
+                "message_id": message["message_id"],
+                "message_created_at": message["created_at"],
+            })
+        return web.json_response({"messages": formatted})
+
+    async def get_db_data(self, request):
+        """Answer the User -> link table -> entity nested selects from getDBData.js"""
+        claims = self.verify(request)
+        body = await request.json()
+        tables, columns = body.get("tables") or [], body.get("columns") or []
+        if len(tables) != 2 or len(columns) != 2 or tables[0] not in MOCK_LINK_TABLES:
+            return web.json_response({"error": "Unsupported select in mock server"}, status=400)
+
+        link_table, entity_table = tables
+        # The first link column is the foreign key hint pointing back at User
+        hint, link_columns = columns[0][0], columns[0][1:]
+        entity_key, links, entities = {
+            "post-user": ("post", self.post_users, {post["post_id"]: post for post, _, _ in self.posts}),
+            "message-user": ("message", self.message_users, self.messages),
+            "query-user": ("query", self.query_users, {query["query_id"]: query for query in self.queries}),
+        }[link_table]
+        rows = []
+        for link in links:
+            if link.get(hint) != claims["userId"]:
+                continue
+            entity = entities.get(link[entity_key])
+            row = {column: link.get(column) for column in link_columns}
+            if entity and "*" not in columns[1]:
+                entity = {column: entity.get(column) for column in columns[1]}
+            row[entity_table] = entity
+            rows.append(row)
+        return web.json_response({"message": "Data fetched successfully", "data": [{link_table: rows}]})
+
+    async def get_live(self, request):
+        claims = self.verify(request)
+        response = web.StreamResponse(headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        })
+        await response.prepare(request)
+        queue = asyncio.Queue()
+        self.listeners.setdefault(claims["userId"], set()).add(queue)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), self.heartbeat)
+                    await response.write(f"data: {json.dumps(event)}\n\n".encode())
+                except asyncio.TimeoutError:
+                    await response.write(b": heartbeat\n\n")
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            self.listeners[claims["userId"]].discard(queue)
+        return response
+
+    def app(self):
+        app = web.Application(middlewares=[self.inject_faults])
+        app.router.add_post("/api/auth/signup", self.signup)
+        app.router.add_post("/api/auth/login", self.login)
+        app.router.add_post("/api/posts/add_post", self.add_post)
+        app.router.add_post("/api/posts/get_posts", self.get_posts)
+        app.router.add_get("/api/posts/search", self.search_posts)
+        app.router.add_post("/api/query/add_query", self.add_query)
+        app.router.add_post("/api/messages/send", self.send_message)
+        app.router.add_post("/api/messages/get", self.get_messages)
+        app.router.add_get("/api/messages/get_live", self.get_live)
+        app.router.add_post("/api/agent/getDBData", self.get_db_data)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Start serving on the running event loop and return the API base URL"""
+        self.runner = web.AppRunner(self.app(), handle_signals=False)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        bound_port = self.runner.addresses[0][1]
+        return f"http://{host}:{bound_port}/api"
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+async def run_against(base_url, mock_server, main):
+    """Await main(base_url), first starting mock_server in-process when given"""
+    if mock_server is None:
+        return await main(base_url)
+    base_url = await mock_server.start()
+    print(f"Serving the mock API in-process at {base_url}")
+    try:
+        return await main(base_url)
+    finally:
+        await mock_server.stop()
+
+def serve_mock_api(host="127.0.0.1", port=8000, **options):
+    """Run the mock API server until interrupted"""
+    async def serve():
+        server = MockApiServer(**options)
+        base_url = await server.start(host, port)
+        print(f"Mock API listening on {base_url} (Ctrl+C to stop)")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+# --- Phase profiling ---
+
+class PhaseProfiler:
+    """cProfile, tracemalloc and stack samples around each seeding phase.
+
+    Each phase gets a cProfile dump and a text report of its slowest
+    functions and biggest allocation sites, with wall time split into CPU
+    time on the event loop thread and time spent waiting, mostly on the
+    network. A sampling thread records the event loop's stack every
+    PROFILE_SAMPLE_INTERVAL seconds into one collapsed-stack file, rooted at
+    the phase name, for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, out_dir, interval=PROFILE_SAMPLE_INTERVAL):
+        self.out_dir = out_dir
+        self.interval = interval
+        self.phases = {}
+        self.stacks = collections.Counter()
+        self.current = None
+        # Set once phases that normally overlap were run one after another to be profiled apart
+        self.serialized = False
+        self.thread_id = threading.get_ident()
+        self.stop_sampling = threading.Event()
+        self.sampler = None
+        os.makedirs(out_dir, exist_ok=True)
+
+    def sample(self):
+        """Sampling thread: count the profiled thread's stack under the current phase"""
+        while not self.stop_sampling.wait(self.interval):
+            phase = self.current
+            frame = sys._current_frames().get(self.thread_id)
+            if phase is None or frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            names.append(phase)
+            self.stacks[";".join(reversed(names))] += 1
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Profile the code run inside the block as phase `name`"""
+        if self.sampler is None:
+            tracemalloc.start(PROFILE_TRACEBACK_FRAMES)
+            self.sampler = threading.Thread(target=self.sample, name="stack-sampler", daemon=True)
+            self.sampler.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        profile = cProfile.Profile()
+        self.current = name
+        wall, cpu = time.perf_counter(), time.thread_time()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            self.current = None
+            current, peak = tracemalloc.get_traced_memory()
+            allocations = tracemalloc.take_snapshot().compare_to(before, "lineno")
+            self.phases[name] = {
+                "wall_s": round(wall, 3),
+                "cpu_s": round(cpu, 3),
+                "waiting_s": round(max(wall - cpu, 0.0), 3),
+                "cpu_share": round(cpu / wall, 3) if wall else 0.0,
+                "peak_traced_mb": round(peak / 1e6, 2),
+                "traced_mb": round(current / 1e6, 2),
+            }
+            self.write_phase(name, profile, allocations)
+
+    def write_phase(self, name, profile, allocations):
+        """Write a phase's cProfile dump and its text report"""
+        profile.dump_stats(os.path.join(self.out_dir, f"{name}.prof"))
+        report = io.StringIO()
+        summary = self.phases[name]
+        report.write(
+            f"Phase {name}: wall {summary['wall_s']:.3f}s, CPU {summary['cpu_s']:.3f}s "
+            f"({summary['cpu_share']:.0%}), waiting {summary['waiting_s']:.3f}s, "
+            f"peak traced memory {summary['peak_traced_mb']:.1f} MB\n\n"
+        )
+        stats = pstats.Stats(profile, stream=report).strip_dirs()
+        for order in ("cumulative", "tottime"):
+            report.write(f"Top {PROFILE_TOP_FUNCTIONS} functions by {order} time:\n")
+            stats.sort_stats(order).print_stats(PROFILE_TOP_FUNCTIONS)
+        report.write(f"Top {PROFILE_TOP_ALLOCATIONS} allocation sites by growth during the phase:\n")
+        for difference in allocations[:PROFILE_TOP_ALLOCATIONS]:
+            report.write(f"  {difference}\n")
+        with open(os.path.join(self.out_dir, f"{name}.txt"), "w", encoding="utf-8") as file:
+            file.write(report.getvalue())
+
+    def close(self):
+        """Stop sampling and write the collapsed stacks and a JSON summary of every phase"""
+        if self.sampler is not None:
+            self.stop_sampling.set()
+            self.sampler.join()
+            tracemalloc.stop()
+        with open(os.path.join(self.out_dir, "stacks.collapsed"), "w", encoding="utf-8") as file:
+            for stack, count in sorted(self.stacks.items()):
+                file.write(f"{stack} {count}\n")
+        with open(os.path.join(self.out_dir, "summary.json"), "w", encoding="utf-8") as file:
+            json.dump(
+                {"sample_interval_s": self.interval, "serialized_phases": self.serialized, "phases": self.phases},
+                file, indent=2
+            )
+            file.write("\n")
+
+    def print_table(self):
+        if self.serialized:
+            print(PROFILE_SERIALIZED_WARNING)
+        for name, summary in self.phases.items():
+            print(
+                f"{name:>12}: wall {summary['wall_s']:8.2f}s  CPU {summary['cpu_s']:8.2f}s "
+                f"({summary['cpu_share']:4.0%})  waiting {summary['waiting_s']:8.2f}s  "
+                f"peak {summary['peak_traced_mb']:8.1f} MB"
+            )
+        print(f"Profiles written to {self.out_dir}")
+
+# --- Main execution function ---
+
+async def populate_database_async(base_url, endpoint_limits, dataset, journal=None, token_cache=None,
+                                  max_limits=None, retries=DEFAULT_RETRIES, metrics=None, registry=None,
+                                  verify=False, profiler=None):
+    """Seed every phase, running rows within a phase concurrently.
+
+    The IDs of created users, posts and messages are added to `registry`;
+    with `verify`, what each of the dataset's users owns is then read back
+    and compared with it. With a profiler each phase is profiled on its own,
+    so posts, queries and messages run one after another instead of
+    overlapping.
+    """
+    metrics = metrics or Metrics()
+    phase = profiler.phase if profiler else (lambda name: contextlib.nullcontext())
+    if dataset.shard:
+        index, count = dataset.shard
+        metrics.write_line(f"Seeding shard {index} of {count} with seed {dataset.seed}...")
+    else:
+        print(f"Starting database population with seed {dataset.seed}...")
+
+    # One keep-alive pool shared by every user client, sized for the highest limits
+    max_limits = max_limits or endpoint_limits
+    connector = aiohttp.TCPConnector(
+        limit=sum(max(endpoint_limits[name], max_limits.get(name, 0)) for name in endpoint_limits),
+        keepalive_timeout=KEEPALIVE_TIMEOUT
+    )
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        client = ApiClient(session, base_url, endpoint_limits, metrics, max_limits, retries)
+
+        # --- Create users ---
+        print("\nCreating users...")
+        with phase("users"):
+            user_clients = await create_users(
+                client, shard_users(dataset), dataset.user_count, endpoint_limits["signup"], journal, token_cache
+            )
+        metrics.progress(final=True)
+        if dataset.shard:
+            # Shards only know how many rows they own once they have sent them
+            for kind in ("post", "query", "message"):
+                metrics.start_rows(kind)
+
+        found = sum(1 for user in user_clients if user)
+        if registry:
+            # Every user is signed in again on each run; those who were not keep their earlier rows
+            registry.update_owners("user", ((index, user.id) for index, user in enumerate(user_clients) if user))
+        if not found:
+            print("No users created or found. Exiting...")
+            return metrics
+
+        print(f"Created/found {found} users")
+
+        # Posts, queries and messages only depend on users, so they can overlap.
+        # Generators are consumed lazily, so memory stays flat at any count.
+        phases = {
+            "posts": create_posts(
+                user_clients, dataset.posts(), dataset.post_count, endpoint_limits["add_post"], metrics, journal,
+                registry
+            ),
+            "queries": create_queries(
+                user_clients, dataset.queries(), dataset.query_count, endpoint_limits["add_query"], metrics, journal
+            ),
+            "messages": create_conversations(
+                user_clients, dataset.message_pairs(), dataset.conversation_count,
+                endpoint_limits["send_message"], metrics, journal, registry
+            ),
+        }
+        if max(endpoint_limits.values()) == 1 or profiler:
+            # Sequential mode keeps the original one-request-at-a-time order
+            if max(endpoint_limits.values()) > 1:
+                profiler.serialized = True
+                metrics.write_line(PROFILE_SERIALIZED_WARNING)
+            for name, rows in phases.items():
+                with phase(name):
+                    await rows
+        else:
+            await asyncio.gather(*phases.values())
+
+        if verify:
+            metrics.progress(final=True)
+            # A shard checks only its own users, as the others' rows are in their registries
+            with phase("verification"):
+                await verify_entities(
+                    [user if not dataset.shard or index % dataset.shard[1] == dataset.shard[0] else None
+                     for index, user in enumerate(user_clients)],
+                    registry, max(endpoint_limits.values()), metrics
+                )
+        metrics.stop()
+        metrics.progress(final=True)
+
+    metrics.write_line("Shard complete!" if dataset.shard else "\nDatabase population complete!")
+    return metrics
+
+def run_seed(base_url, limits, max_limits, retries, dataset_options, snapshot_path=None, journal_path=None,
+             token_cache_path=None, mock_server=None, shard=None, label=None, registry_path=None, verify=False,
+             profile_path=None):
+    """Seed one shard, or the whole dataset without one, and return its metrics.
+
+    With a registry path, the IDs of created entities are saved there,
+    added to those saved by earlier runs. With a profile path, per-phase
+    profiles are written to that directory.
+    """
+    journal = SeedJournal(journal_path) if journal_path else None
+    # Mock tokens are signed with a per-process secret, so caching them is pointless
+    token_cache = TokenCache(token_cache_path, base_url) if token_cache_path and not mock_server else None
+    registry = EntityRegistry(os.path.dirname(os.path.abspath(registry_path)) if registry_path else None)
+    if registry_path and os.path.isdir(registry_path):
+        registry.extend(EntityRegistry.load(registry_path))
+    profiler = PhaseProfiler(profile_path) if profile_path else None
+    try:
+        seed = dataset_options["seed"]
+        if journal:
+            seed = journal.resolve_seed(SnapshotDataset(snapshot_path).seed if snapshot_path else seed)
+            journal.check_run_id(dataset_options["run_id"])
+        dataset = open_dataset(snapshot_path, **dict(dataset_options, seed=seed), shard=shard)
+        registry.details["user_count"] = dataset.user_count
+        if not snapshot_path:
+            registry.details["scenario"] = scenario_source(dataset.scenario.name)
+        metrics = Metrics(label=label)
+        return asyncio.run(run_against(base_url, mock_server, lambda url: populate_database_async(
+            url, limits, dataset, journal, token_cache, max_limits, retries, metrics, registry, verify, profiler
+        )))
+    finally:
+        if profiler:
+            profiler.close()
+            if not label:
+                profiler.print_table()
+        if journal:
+            journal.close()
+        if registry_path:
+            registry.save(registry_path)
+            if not label:
+                print(f"Registered {registry.describe()} in {registry_path}")
+        registry.close()
+
+def seed_shard_worker(options):
+    """Process pool entry point: seed one shard and return its metrics state"""
+    return run_seed(**options).state()
+
+def shard_path(path, index, count):
+    """Give each local shard its own journal or token cache file"""
+    if not path:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.shard{index}-of-{count}{extension}"
+
+def seed_local_shards(shards, options):
+    """Seed every shard in its own forked process and merge their metrics"""
+    seed = options["dataset_options"]["seed"]
+    if options["snapshot_path"]:
+        seed = SnapshotDataset(options["snapshot_path"]).seed if seed is None else seed
+    elif seed is None and not options["journal_path"]:
+        seed = random.randrange(2**32)
+    if options["journal_path"]:
+        # Every shard has to agree on the seed, resumed or new
+        for index in range(shards):
+            journal = SeedJournal(shard_path(options["journal_path"], index, shards))
+            seed = journal.resolve_seed(seed)
+            journal.check_run_id(options["dataset_options"]["run_id"])
+            journal.close()
+    print(f"Seeding {shards} shards in parallel with seed {seed}...")
+
+    metrics = Metrics(progress=False)
+    context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+    with concurrent.futures.ProcessPoolExecutor(shards, mp_context=context) as pool:
+        futures = [
+            pool.submit(seed_shard_worker, dict(
+                options,
+                dataset_options=dict(options["dataset_options"], seed=seed),
+                journal_path=shard_path(options["journal_path"], index, shards),
+                token_cache_path=shard_path(options["token_cache_path"], index, shards),
+                registry_path=shard_path(options["registry_path"], index, shards),
+                profile_path=shard_path(options["profile_path"], index, shards),
+                shard=(index, shards),
+                label=f"shard {index}/{shards}",
+            ))
+            for index in range(shards)
+        ]
+        for future in futures:
+            metrics.merge(future.result())
+    metrics.stop()
+    print(f"\nAll {shards} shards complete!")
+
+    if options["registry_path"]:
+        # Shards keep their own registries to resume from; the merged one is rebuilt
+        registry = EntityRegistry(os.path.dirname(os.path.abspath(options["registry_path"])))
+        for index in range(shards):
+            registry.extend(EntityRegistry.load(shard_path(options["registry_path"], index, shards)))
+        registry.save(options["registry_path"])
+        print(f"Registered {registry.describe()} in {options['registry_path']}")
+        registry.close()
+    return metrics
+
+def populate_database(base_url=BASE_URL, concurrency=DEFAULT_CONCURRENCY, endpoint_limits=None,
+                      user_count=None, post_count=None, query_count=None, conversation_count=None, seed=None,
+                      journal_path=None, token_cache_path=DEFAULT_TOKEN_CACHE, snapshot_path=None,
+                      zipf_exponent=None, mean_conversation_length=None, mock_server=None, summary_path=None,
+                      prometheus_path=None, max_concurrency=None, retries=DEFAULT_RETRIES, shards=1,
+                      shard_index=None, corpus="templates", registry_path=None, verify=False, scenario=None,
+                      profile_path=None, run_id=None):
+    """Populate the database with test data.
+
+    The same seed, counts and scenario always produce the same dataset; counts
+    left as None come from the scenario. Without a seed a random one is
+    picked and printed so the run can be reproduced. With a
+    journal, entities created by an earlier run are skipped and the journal's
+    seed is reused. With a snapshot, its rows are replayed instead of generated.
+    With a mock server, it is started in-process and seeded instead of base_url.
+    Request metrics can be written as a JSON summary and a Prometheus file.
+
+    Each endpoint starts at its concurrency and adapts between 1 and
+    max_concurrency, by default DEFAULT_CONCURRENCY_HEADROOM times the start;
+    a concurrency of 1 stays sequential. Failed requests are retried up to
+    `retries` times and rows that still fail are listed at the end.
+
+    With `shards` and a `shard_index`, only that shard's users and the posts,
+    queries and conversations they own are seeded, so separate machines can
+    split one dataset. Without an index every shard runs locally in its own
+    process, each with its own journal and token cache file, and their
+    metrics are merged. Either way the rows are exactly the unsharded ones.
+
+    With a registry path, the IDs of every created user, post and message are
+    saved there as packed arrays for later phases. With `verify`, each user's
+    posts and messages are read back through getDBData at the end and
+    compared with what was registered.
+
+    With a profile path, each phase runs under cProfile and tracemalloc and
+    its report is written there, with a collapsed-stack file of the whole
+    run; local shards write theirs next to it.
+
+    With a run ID, every row is tagged with it so `teardown` can delete the
+    run later. The registry then defaults to DEFAULT_RUNS_DIR/<run ID>,
+    where run.json records the run before anything is sent.
+    """
+    if run_id:
+        registry_path = registry_path or os.path.join(DEFAULT_RUNS_DIR, run_id)
+        run_scenario = load_scenario(scenario)
+        if snapshot_path:
+            run_user_count = SnapshotDataset(snapshot_path).user_count
+        else:
+            run_user_count = run_scenario.count("users") if user_count is None else user_count
+        write_run_info(
+            registry_path, run_id, base_url=None if mock_server else base_url,
+            scenario=scenario_source(run_scenario.name), user_count=run_user_count
+        )
+    limits = {endpoint: concurrency for endpoint in ENDPOINTS}
+    limits.update(endpoint_limits or {})
+    if max(limits.values()) == 1:
+        max_limits = limits
+    else:
+        max_limits = {
+            endpoint: max_concurrency or limit * DEFAULT_CONCURRENCY_HEADROOM for endpoint, limit in limits.items()
+        }
+    options = {
+        "base_url": base_url,
+        "limits": limits,
+        "max_limits": max_limits,
+        "retries": retries,
+        "dataset_options": {
+            "user_count": user_count,
+            "post_count": post_count,
+            "query_count": query_count,
+            "conversation_count": conversation_count,
+            "seed": seed,
+            "zipf_exponent": zipf_exponent,
+            "mean_conversation_length": mean_conversation_length,
+            "corpus": corpus,
+            "scenario": scenario,
+            "run_id": run_id,
+        },
+        "snapshot_path": snapshot_path,
+        "journal_path": journal_path,
+        "token_cache_path": token_cache_path,
+        "registry_path": registry_path,
+        "mock_server": mock_server,
+        "verify": verify,
+        "profile_path": profile_path,
+    }
+    if shards > 1 and shard_index is None:
+        metrics = seed_local_shards(shards, options)
+    else:
+        metrics = run_seed(**options, shard=(shard_index, shards) if shards > 1 else None)
+
+    metrics.print_table()
+    metrics.print_checks()
+    metrics.print_failed_rows()
+    metrics.write(summary_path, prometheus_path)
+
+def run_verify(registry_path, base_url=BASE_URL, concurrency=DEFAULT_CONCURRENCY, snapshot_path=None,
+               token_cache_path=DEFAULT_TOKEN_CACHE, summary_path=None, prometheus_path=None, scenario=None,
+               mock_server=None):
+    """Verify a seeded database against the registry and manifest saved by `seed --registry` or `--run-id`.
+
+    Every user owning a registered entity is checked, and those the
+    registry has no user row for are reported missing. The comparison data
+    is regenerated from the scenario the run recorded; a different
+    `scenario` is an error. With a mock server, it is started in-process and
+    verified instead of base_url.
+    """
+    registry = EntityRegistry.load(registry_path)
+    manifest = EntityRegistry.load_manifest(registry_path)
+    run_info = read_run_info(registry_path) or {}
+    recorded = registry.details.get("scenario") or run_info.get("scenario")
+    if scenario and recorded and scenario_source(scenario) != scenario_source(recorded):
+        raise SystemExit(f"{registry_path} was seeded with scenario {recorded}, not {scenario}")
+    scenario = scenario or recorded
+
+    # Shards and reruns may lack the user row of someone who owns rows
+    owners = set(registry.rows("message")["peer"].tolist())
+    for kind in REGISTRY_COLUMNS:
+        owners.update(registry.rows(kind)["owner"].tolist())
+    for users in (manifest or {}).values():
+        owners.update(users)
+    owners.discard(-1)
+    if not owners:
+        raise SystemExit(f"Nothing is registered in {registry_path}")
+    user_count = max(registry.details.get("user_count", 0), run_info.get("user_count", 0), max(owners) + 1)
+    unregistered = sorted(owners - set(registry.rows("user")["owner"].tolist()))
+    people = SnapshotDataset(snapshot_path).users() if snapshot_path else generate_users(user_count, scenario)
+    if run_info:
+        # A tagged run signed its users up on the run's email subdomain
+        people = (dict(user, email=run_email(user["email"], run_info["run_id"])) for user in people)
+    token_cache = TokenCache(token_cache_path, base_url) if token_cache_path else None
+    metrics = Metrics()
+
+    async def verify(url):
+        connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=KEEPALIVE_TIMEOUT)
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            client = ApiClient(session, url, {"signup": concurrency, "login": concurrency}, metrics)
+            print("Authenticating registered users...")
+            user_clients = await create_users(
+                client, ((index, user) for index, user in enumerate(people) if index in owners), user_count,
+                concurrency, token_cache=token_cache
+            )
+            metrics.progress(final=True)
+            await verify_entities(user_clients, registry, concurrency, metrics, manifest)
+            metrics.record_check("user", users=len(owners), matched=len(owners) - len(unregistered),
+                                 missing=len(unregistered))
+            for index in unregistered:
+                metrics.record_row("check", "failed", f"User #{index} owns rows but is not registered", index)
+            metrics.progress(final=True)
+
+    try:
+        asyncio.run(run_against(base_url, mock_server, verify))
+    finally:
+        registry.close()
+    metrics.stop()
+    metrics.print_table()
+    metrics.print_checks()
+    metrics.print_failed_rows()
+    metrics.write(summary_path, prometheus_path)
+    return metrics
+
+def parse_endpoint_limit(value):
+    """Parse an `endpoint=N` command line override"""
+    endpoint, _, limit = value.partition("=")
+    if endpoint not in ENDPOINTS or not limit.isdigit() or int(limit) < 1:
+        raise argparse.ArgumentTypeError(
+            f"expected ENDPOINT=N with ENDPOINT in {', '.join(ENDPOINTS)}, got {value!r}"
+        )
+    return endpoint, int(limit)
+
+def add_token_cache_arguments(parser):
+    """Add the options controlling the on-disk JWT cache"""
+    parser.add_argument(
+        "--token-cache", metavar="FILE", default=DEFAULT_TOKEN_CACHE,
+        help="cache of user IDs and JWTs reused until they expire (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--no-token-cache", dest="token_cache", action="store_const", const=None,
+        help="always authenticate every user over the network"
+    )
+
+def add_scenario_argument(parser, default=DEFAULT_SCENARIO):
+    parser.add_argument(
+        "--scenario", metavar="NAME|FILE",
+        help=f"dataset profile: one of {', '.join(builtin_scenarios())}, or a JSON or TOML scenario file "
+             f"(default: {default})"
+    )
+
+def add_dataset_arguments(parser):
+    """Add the dataset size and seed options shared by every generating command"""
+    add_scenario_argument(parser)
+    parser.add_argument("--users", type=int, help="users to create (default: from the scenario)")
+    parser.add_argument("--posts", type=int, help="posts to create (default: from the scenario)")
+    parser.add_argument("--queries", type=int, help="queries to create (default: from the scenario)")
+    parser.add_argument(
+        "--conversations", type=int, help="message conversations to create (default: from the scenario)"
+    )
+    parser.add_argument("--seed", type=int, help="random seed, so a run can be reproduced exactly")
+    parser.add_argument(
+        "--zipf-exponent", type=float,
+        help="power-law skew of who takes part in conversations; 0 is uniform (default: from the scenario)"
+    )
+    parser.add_argument(
+        "--mean-conversation-length", type=float,
+        help=f"average messages per conversation, at least 2 and capped at {MAX_CONVERSATION_LENGTH} "
+             "(default: from the scenario)"
+    )
+    parser.add_argument(
+        "--corpus", choices=POST_CORPORA, default="templates",
+        help="post text: the topic templates, or a synthetic corpus with Zipf vocabulary and "
+             "log-normal lengths for search benchmarks (default: %(default)s)"
+    )
+
+def add_snapshot_argument(parser):
+    parser.add_argument(
+        "--snapshot", metavar="FILE",
+        help="replay rows from a snapshot file; its counts and seed replace the dataset options"
+    )
+
+def add_metrics_arguments(parser, summary=True):
+    """Add the options exporting request metrics at the end of a run"""
+    if summary:
+        parser.add_argument(
+            "--metrics", metavar="FILE",
+            help="write a JSON summary of per-endpoint requests, status classes, bytes and latency"
+        )
+    parser.add_argument(
+        "--prometheus", metavar="FILE", help="write the same metrics in the Prometheus text format"
+    )
+
+def parse_shards(value):
+    """Parse a shard count, where `auto` means one per CPU core"""
+    if value == "auto":
+        return os.cpu_count() or 1
+    if not value.isdigit() or int(value) < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive shard count or 'auto', got {value!r}")
+    return int(value)
+
+def parse_run_id(value):
+    """Parse a run ID, which has to work as an email subdomain and inside a LIKE pattern"""
+    allowed = set(string.ascii_lowercase + string.digits + "-")
+    if not 0 < len(value) <= MAX_RUN_ID_LENGTH or not set(value) <= allowed or "-" in (value[0], value[-1]):
+        raise argparse.ArgumentTypeError(
+            f"expected up to {MAX_RUN_ID_LENGTH} lowercase letters, digits and inner hyphens, got {value!r}"
+        )
+    return value
+
+def add_run_id_argument(parser):
+    parser.add_argument(
+        "--run-id", type=parse_run_id, metavar="ID",
+        help="tag every row with this run ID so `teardown` can delete the run later"
+    )
+
+def add_mock_arguments(parser, standalone=False):
+    """Add the mock API server options; `--mock` runs one in-process"""
+    if not standalone:
+        parser.add_argument(
+            "--mock", action="store_true",
+            help="run against an in-process mock API instead of --base-url, for offline benchmarking"
+        )
+    parser.add_argument(
+        "--mock-latency-ms", type=float, default=0.0, help="fixed delay added to every mock response"
+    )
+    parser.add_argument(
+        "--mock-jitter-ms", type=float, default=0.0, help="mean of an exponential delay added on top"
+    )
+    parser.add_argument(
+        "--mock-error-rate", type=float, default=0.0, help="fraction of mock requests failing with 500"
+    )
+    parser.add_argument(
+        "--mock-throttle-rate", type=float, default=0.0, help="fraction of mock requests failing with 429"
+    )
+    parser.add_argument(
+        "--mock-heartbeat", type=float, default=MOCK_HEARTBEAT_INTERVAL,
+        help="seconds between SSE heartbeats on /messages/get_live (default: %(default)s)"
+    )
+
+def mock_server_options(args):
+    """Return the MockApiServer keyword arguments given on the command line"""
+    return {
+        "latency": args.mock_latency_ms / 1000,
+        "jitter": args.mock_jitter_ms / 1000,
+        "error_rate": args.mock_error_rate,
+        "throttle_rate": args.mock_throttle_rate,
+        "heartbeat": args.mock_heartbeat,
+        "seed": getattr(args, "seed", None),
+    }
+
+COMMANDS = (
+    "seed", "verify", "bulk", "teardown", "bench", "soak", "traffic", "snapshot", "search-workload", "mock-server"
+)
+
+def parse_args(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Seeding through the API stays the default when no command is given
+    if not argv or argv[0] not in COMMANDS and argv[0] not in ("-h", "--help"):
+        argv.insert(0, "seed")
+
+    parser = argparse.ArgumentParser(description="Populate the WebPilot database with test data")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="create data through the REST API (default)")
+    seed_parser.add_argument("--base-url", default=BASE_URL, help="API base URL (default: %(default)s)")
+    seed_parser.add_argument(
+        "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+        help="requests in flight per endpoint; 1 sends everything sequentially (default: %(default)s)"
+    )
+    seed_parser.add_argument(
+        "--endpoint-concurrency", type=parse_endpoint_limit, action="append", default=[],
+        metavar="ENDPOINT=N", help="override the concurrency of one endpoint, may be repeated"
+    )
+    seed_parser.add_argument(
+        "--max-concurrency", type=int,
+        help="ceiling each endpoint's adaptive concurrency can grow to; equal to --concurrency keeps it "
+             f"from growing (default: {DEFAULT_CONCURRENCY_HEADROOM}x the starting concurrency)"
+    )
+    seed_parser.add_argument(
+        "--shards", type=parse_shards, default=1,
+        help="split users and the rows they own into N shards; without --shard-index every shard runs "
+             "locally in its own process, and 'auto' uses one per CPU core"
+    )
+    seed_parser.add_argument(
+        "--shard-index", type=int, help="seed only shard I of --shards, for splitting a run across machines"
+    )
+    seed_parser.add_argument(
+        "--retries", type=int, default=DEFAULT_RETRIES,
+        help="retries of a request failing with 429, 5xx or a timeout (default: %(default)s)"
+    )
+    add_dataset_arguments(seed_parser)
+    add_snapshot_argument(seed_parser)
+    seed_parser.add_argument(
+        "--journal", metavar="FILE",
+        help="SQLite progress journal; rerunning with the same file resumes instead of starting over"
+    )
+    seed_parser.add_argument(
+        "--registry", metavar="DIR",
+        help="save the IDs of created users, posts and messages in DIR, adding to those already there"
+    )
+    seed_parser.add_argument(
+        "--verify", action="store_true",
+        help="read back each user's posts and messages at the end and compare them with what was created"
+    )
+    seed_parser.add_argument(
+        "--profile", metavar="DIR",
+        help="profile each phase with cProfile and tracemalloc, writing per-phase reports and a collapsed-stack "
+             "file for flame graphs to DIR; posts, queries and messages then run one after another"
+    )
+    add_run_id_argument(seed_parser)
+    add_token_cache_arguments(seed_parser)
+    add_metrics_arguments(seed_parser)
+    add_mock_arguments(seed_parser)
+
+    verify_parser = commands.add_parser(
+        "verify", help="read back what each user owns and compare it with a saved --registry"
+    )
+    verify_parser.add_argument("--base-url", default=BASE_URL, help="API base URL (default: %(default)s)")
+    verify_parser.add_argument("--registry", metavar="DIR", required=True, help="registry saved by seed --registry")
+    verify_parser.add_argument(
+        "--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="requests in flight (default: %(default)s)"
+    )
+    add_snapshot_argument(verify_parser)
+    add_scenario_argument(verify_parser, default="the one the registry recorded")
+    add_token_cache_arguments(verify_parser)
+    add_metrics_arguments(verify_parser)
+
+    bulk_parser = commands.add_parser("bulk", help="write rows directly as PostgreSQL COPY input")
+    target = bulk_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out", metavar="DIR", help="write one COPY file per table and a load.sql script")
+    target.add_argument("--dsn", help="stream straight into this PostgreSQL database")
+    add_dataset_arguments(bulk_parser)
+    add_snapshot_argument(bulk_parser)
+    add_run_id_argument(bulk_parser)
+
+    teardown_parser = commands.add_parser(
+        "teardown", help="delete every row of a --run-id tagged run straight from PostgreSQL"
+    )
+    teardown_parser.add_argument("--dsn", required=True, help="PostgreSQL database the run was seeded into")
+    run = teardown_parser.add_mutually_exclusive_group(required=True)
+    run.add_argument(
+        "--run-id", type=parse_run_id, metavar="ID",
+        help=f"run to delete, using its registry in {DEFAULT_RUNS_DIR}/ID when there is one"
+    )
+    run.add_argument("--registry", metavar="DIR", help="registry of the run to delete, holding its run.json")
+    teardown_parser.add_argument(
+        "--concurrency", type=int, default=DEFAULT_TEARDOWN_CONCURRENCY,
+        help="connections deleting batches in parallel (default: %(default)s)"
+    )
+    teardown_parser.add_argument(
+        "--by-tag", action="store_true",
+        help="scan every table for the run's tag instead of deleting the registered IDs; also finds rows "
+             "bulk loaded or seeded on other machines"
+    )
+    teardown_parser.add_argument(
+        "--create-fk-indexes", action="store_true",
+        help="index the link table foreign keys that have no valid index, so cascades do not scan the link "
+             "tables; without it the missing indexes are only listed"
+    )
+    add_token_cache_arguments(teardown_parser)
+
+    snapshot_parser = commands.add_parser("snapshot", help="export a generated dataset to a snapshot file")
+    snapshot_parser.add_argument("--out", metavar="FILE", required=True, help="snapshot file to write")
+    add_dataset_arguments(snapshot_parser)
+
+    workload_parser = commands.add_parser(
+        "search-workload", help="pick search terms by selectivity for a seeded --corpus search dataset"
+    )
+    workload_parser.add_argument("--out", metavar="FILE", required=True, help="workload file to write")
+    workload_parser.add_argument(
+        "--terms-per-bucket", type=int, default=SEARCH_TERMS_PER_BUCKET,
+        help="search terms per selectivity bucket (default: %(default)s)"
+    )
+    # The workload always describes the search corpus, so only the options shaping it are taken
+    add_scenario_argument(workload_parser)
+    workload_parser.add_argument(
+        "--users", type=int, help="users the corpus was seeded with (default: from the scenario)"
+    )
+    workload_parser.add_argument(
+        "--posts", type=int, help="posts the corpus was seeded with (default: from the scenario)"
+    )
+    workload_parser.add_argument("--seed", type=int, help="seed the corpus was seeded with")
+
+    bench_parser = commands.add_parser("bench", help="measure read endpoint latency after seeding")
+    bench_parser.add_argument("--base-url", default=BASE_URL, help="API base URL (default: %(default)s)")
+    bench_parser.add_argument(
+        "--mix", type=parse_bench_mix, default=None, metavar="ENDPOINT=WEIGHT,...",
+        help=f"weighted endpoint mix (default: {','.join(f'{k}={v}' for k, v in DEFAULT_BENCH_MIX.items())})"
+    )
+    bench_parser.add_argument(
+        "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+        help="requests in flight (default: %(default)s)"
+    )
+    budget = bench_parser.add_mutually_exclusive_group()
+    budget.add_argument(
+        "--duration", type=float,
+        help=f"seconds to run, or per bucket with --search-workload (default: {DEFAULT_BENCH_DURATION} for the mix)"
+    )
+    budget.add_argument(
+        "--requests", type=int,
+        help=f"total requests to send, or per bucket with --search-workload (default: the mix runs for "
+             f"{DEFAULT_BENCH_DURATION} seconds; --search-workload sends {SEARCH_BENCH_REQUESTS} per bucket)"
+    )
+    bench_parser.add_argument(
+        "--search-workload", metavar="FILE",
+        help="benchmark /posts/search per selectivity bucket with the terms in FILE instead of the mix, "
+             "checking the number of posts found"
+    )
+    bench_parser.add_argument(
+        "--max-rows", type=int, default=SEARCH_MAX_ROWS,
+        help="most rows the backend returns per response, PostgREST's max-rows; --search-workload expects "
+             "no more posts than this (default: %(default)s)"
+    )
+    bench_parser.add_argument(
+        "--users", type=int, help="seeded users to send requests as (default: from the scenario)"
+    )
+    add_scenario_argument(bench_parser)
+    bench_parser.add_argument("--seed", type=int, help="random seed for the request sequence")
+    bench_parser.add_argument("--label", help="name for this run, such as the backend version under test")
+    bench_parser.add_argument("--report", metavar="FILE", help="write the JSON report here instead of stdout")
+    add_token_cache_arguments(bench_parser)
+    add_metrics_arguments(bench_parser, summary=False)
+    add_mock_arguments(bench_parser)
+
+    soak_parser = commands.add_parser("soak", help="soak test live message streams after seeding")
+    soak_parser.add_argument("--base-url", default=BASE_URL, help="API base URL (default: %(default)s)")
+    soak_parser.add_argument(
+        "--streams", type=int, default=DEFAULT_SOAK_STREAMS,
+        help="seeded users holding a /messages/get_live stream open (default: %(default)s)"
+    )
+    soak_parser.add_argument(
+        "--rate", type=float, default=DEFAULT_SOAK_RATE,
+        help="messages sent to the streaming users per second (default: %(default)s)"
+    )
+    soak_parser.add_argument(
+        "--duration", type=float, default=DEFAULT_SOAK_DURATION, help="seconds to send for (default: %(default)s)"
+    )
+    soak_parser.add_argument(
+        "--heartbeat", type=float, default=MOCK_HEARTBEAT_INTERVAL,
+        help="seconds between the backend's stream heartbeats; with --mock, --mock-heartbeat is used "
+             "(default: %(default)s)"
+    )
+    soak_parser.add_argument(
+        "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+        help="sign-in and send requests in flight (default: %(default)s)"
+    )
+    soak_parser.add_argument(
+        "--users", type=int, help="seeded users to send messages as, at least --streams (default: from the scenario)"
+    )
+    add_scenario_argument(soak_parser)
+    soak_parser.add_argument("--seed", type=int, help="random seed for senders and receivers")
+    soak_parser.add_argument("--label", help="name for this run, such as the backend version under test")
+    soak_parser.add_argument("--report", metavar="FILE", help="write the JSON report here instead of stdout")
+    add_token_cache_arguments(soak_parser)
+    add_mock_arguments(soak_parser)
+
+    traffic_parser = commands.add_parser("traffic", help="send continuous open-loop write traffic")
+    traffic_parser.add_argument("--base-url", default=BASE_URL, help="API base URL (default: %(default)s)")
+    traffic_parser.add_argument(
+        "--rates", type=parse_traffic_rates, default=None, metavar="KIND=RATE,...",
+        help="mean arrivals per second of each kind "
+             f"(default: {','.join(f'{k}={v:g}' for k, v in DEFAULT_TRAFFIC_RATES.items())})"
+    )
+    traffic_parser.add_argument(
+        "--diurnal-amplitude", type=float,
+        help="relative daily swing of the rates, from 0 for flat traffic to 1 for none at the quietest hour "
+             "(default: the scenario's time spread, or 0)"
+    )
+    traffic_parser.add_argument(
+        "--peak-hour", type=float,
+        help=f"UTC hour of the daily peak (default: the scenario's time spread, or {DEFAULT_DIURNAL_PEAK_HOUR})"
+    )
+    traffic_parser.add_argument(
+        "--day-length", type=float, default=86400,
+        help="seconds one day of the curve takes, to replay a day faster (default: %(default)s)"
+    )
+    traffic_parser.add_argument("--duration", type=float, help="seconds to run (default: until interrupted)")
+    traffic_parser.add_argument(
+        "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+        help="sign-in requests in flight; writes are never held back (default: %(default)s)"
+    )
+    traffic_parser.add_argument("--users", type=int, help="seeded users to send as (default: from the scenario)")
+    add_scenario_argument(traffic_parser)
+    traffic_parser.add_argument("--seed", type=int, help="random seed for arrivals and row content")
+    add_token_cache_arguments(traffic_parser)
+    add_metrics_arguments(traffic_parser)
+    add_mock_arguments(traffic_parser)
+
+    mock_parser = commands.add_parser("mock-server", help="serve an in-memory mock of the API")
+    mock_parser.add_argument("--host", default="127.0.0.1", help="interface to bind (default: %(default)s)")
+    mock_parser.add_argument("--port", type=int, default=8000, help="port to listen on (default: %(default)s)")
+    add_mock_arguments(mock_parser, standalone=True)
+
+    args = parser.parse_args(argv)
+    if getattr(args, "concurrency", 1) < 1:
+        parser.error("--concurrency must be at least 1")
+    if (getattr(args, "max_concurrency", None) or 1) < 1 or getattr(args, "retries", 0) < 0:
+        parser.error("--max-concurrency must be at least 1 and --retries cannot be negative")
+    if min(getattr(args, name, None) or 0 for name in ("users", "posts", "queries", "conversations")) < 0:
+        parser.error("counts cannot be negative")
+    if (getattr(args, "zipf_exponent", None) or 0) < 0:
+        parser.error("--zipf-exponent cannot be negative")
+    if (getattr(args, "mean_conversation_length", None) or 2) < 2:
+        parser.error("--mean-conversation-length must be at least 2")
+    if min(getattr(args, "mock_latency_ms", 0), getattr(args, "mock_jitter_ms", 0)) < 0:
+        parser.error("mock delays cannot be negative")
+    if not 0 <= getattr(args, "mock_error_rate", 0) + getattr(args, "mock_throttle_rate", 0) <= 1:
+        parser.error("mock error and throttle rates must be fractions adding up to at most 1")
+    if getattr(args, "mock_heartbeat", 1) <= 0:
+        parser.error("--mock-heartbeat must be positive")
+    if min(getattr(args, name, 1) for name in ("streams", "rate", "heartbeat")) <= 0:
+        parser.error("--streams, --rate and --heartbeat must be positive")
+    if args.command in ("soak", "traffic") and (args.duration or 1) <= 0:
+        parser.error("--duration must be positive")
+    if not 0 <= (getattr(args, "diurnal_amplitude", None) or 0) <= 1:
+        parser.error("--diurnal-amplitude must be between 0 and 1")
+    if getattr(args, "day_length", 1) <= 0:
+        parser.error("--day-length must be positive")
+    if getattr(args, "verify", False) and args.journal and not (args.registry or args.run_id):
+        parser.error(
+            "--verify with --journal needs --registry or --run-id, so rows created by earlier runs are known"
+        )
+    if getattr(args, "max_rows", 1) < 1:
+        parser.error("--max-rows must be at least 1")
+    if getattr(args, "terms_per_bucket", 1) < 1:
+        parser.error("--terms-per-bucket must be at least 1")
+    if args.command == "search-workload" and args.seed is None:
+        parser.error("search-workload needs the --seed the search corpus was seeded with")
+    if getattr(args, "shard_index", None) is not None:
+        if not 0 <= args.shard_index < args.shards:
+            parser.error("--shard-index must be between 0 and --shards - 1")
+        if args.seed is None and args.snapshot is None:
+            parser.error("--shard-index needs --seed or --snapshot so that every machine seeds the same dataset")
+    return args
+
+def dataset_options(args):
+    """Return the generated dataset keyword arguments given on the command line"""
+    return {
+        "user_count": args.users,
+        "post_count": args.posts,
+        "query_count": args.queries,
+        "conversation_count": args.conversations,
+        "seed": args.seed,
+        "zipf_exponent": args.zipf_exponent,
+        "mean_conversation_length": args.mean_conversation_length,
+        "corpus": args.corpus,
+        "scenario": args.scenario,
+    }
 
 if __name__ == "__main__":
-    populate_database()
\ No newline at end of file
+    args = parse_args()
+    if args.command == "bulk":
+        bulk_load(args.out, args.dsn, snapshot_path=args.snapshot, run_id=args.run_id, **dataset_options(args))
+    elif args.command == "teardown":
+        teardown(
+            args.dsn, args.run_id, args.registry, args.concurrency, args.by_tag, args.create_fk_indexes,
+            args.token_cache
+        )
+    elif args.command == "snapshot":
+        write_snapshot(args.out, GeneratedDataset(**dataset_options(args)))
+    elif args.command == "verify":
+        run_verify(
+            args.registry, args.base_url, args.concurrency, args.snapshot, args.token_cache, args.metrics,
+            args.prometheus, args.scenario
+        )
+    elif args.command == "search-workload":
+        write_search_workload(args.out, args.posts, args.users, args.seed, args.terms_per_bucket, args.scenario)
+    elif args.command == "mock-server":
+        serve_mock_api(args.host, args.port, **mock_server_options(args))
+    elif args.command == "soak":
+        run_live_soak(
+            args.base_url, args.streams, args.rate, args.duration, args.users, args.seed,
+            args.mock_heartbeat if args.mock else args.heartbeat, args.concurrency, args.label, args.report,
+            args.token_cache, MockApiServer(**mock_server_options(args)) if args.mock else None, args.scenario
+        )
+    elif args.command == "traffic":
+        run_traffic(
+            args.base_url, args.rates, args.diurnal_amplitude, args.peak_hour, args.day_length, args.duration,
+            args.users, args.seed, args.concurrency, args.token_cache,
+            MockApiServer(**mock_server_options(args)) if args.mock else None, args.metrics, args.prometheus,
+            args.scenario
+        )
+    elif args.command == "bench" and args.search_workload:
+        run_search_benchmark(
+            args.search_workload, args.base_url, args.concurrency, args.duration, args.requests,
+            args.seed, args.label, args.report, MockApiServer(**mock_server_options(args)) if args.mock else None,
+            args.prometheus, args.max_rows
+        )
+    elif args.command == "bench":
+        run_benchmark(
+            args.base_url, args.mix, args.concurrency, args.duration, args.requests,
+            args.users, args.seed, args.label, args.report, args.token_cache,
+            MockApiServer(**mock_server_options(args)) if args.mock else None, args.prometheus, args.scenario
+        )
+    else:
+        populate_database(
+            args.base_url, args.concurrency, dict(args.endpoint_concurrency),
+            journal_path=args.journal, token_cache_path=args.token_cache, snapshot_path=args.snapshot,
+            mock_server=MockApiServer(**mock_server_options(args)) if args.mock else None,
+            summary_path=args.metrics, prometheus_path=args.prometheus, max_concurrency=args.max_concurrency,
+            retries=args.retries, shards=args.shards, shard_index=args.shard_index, registry_path=args.registry,
+            verify=args.verify, profile_path=args.profile, run_id=args.run_id, **dataset_options(args)
+        )
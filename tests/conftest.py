@@ -0,0 +1,35 @@
+import os
+import sys
+
+# populate_database.py is a script at the repository root, not an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import populate_database as seed  # noqa: E402
+
+# A dataset small enough to seed through the in-process mock in well under a second
+SMALL_DATASET = {"user_count": 6, "post_count": 40, "query_count": 10, "conversation_count": 10, "seed": 7}
+
+
+def seed_mock(mock, **options):
+    """Seed `mock` in-process, without touching the token cache in the working directory"""
+    options = {**SMALL_DATASET, "concurrency": 4, "token_cache_path": None, **options}
+    seed.populate_database(mock_server=mock, **options)
+
+
+def mock_contents(mock):
+    """Everything the mock holds, as multisets that do not depend on the order rows arrived in"""
+    mail = {user_id: user["mail"] for user_id, user in mock.users_by_id.items()}
+    posts = {post["post_id"]: post for post, _, _ in mock.posts}
+    return {
+        "users": sorted(mock.users),
+        "posts": sorted(
+            (mail[link["user"]], posts[link["post"]]["Title"], posts[link["post"]]["Content"])
+            for link in mock.post_users
+        ),
+        "queries": sorted((query["user_mail"], query["text"], query["department"]) for query in mock.queries),
+        "messages": sorted(
+            # The mock keeps the backend's spelling of the receiver column
+            (mail[link["sender"]], mail[link["reciver"]], mock.messages[link["message"]]["message"])
+            for link in mock.message_users
+        ),
+    }
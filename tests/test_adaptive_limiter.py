@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+import populate_database as seed
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(seed.time, "perf_counter", clock)
+    return clock
+
+
+@pytest.fixture
+def loop():
+    # The limiter's condition binds to the first event loop that waits on it,
+    # so every response of a test runs on that test's loop
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def respond(loop, limiter, clock, latency=0.01, overloaded=False, started=None):
+    """Release one slot for a request that took `latency` seconds"""
+    async def run():
+        start = await limiter.acquire() if started is None else started
+        clock.now += latency
+        await limiter.release(start, overloaded)
+    loop.run_until_complete(run())
+
+
+def test_grows_by_one_per_window_of_healthy_responses(loop, clock):
+    limiter = seed.AdaptiveLimiter(4, 100)
+    for _ in range(4):
+        respond(loop, limiter, clock)
+    assert 4.9 < limiter.limit <= 5
+    for _ in range(5 + 6 + 7):
+        respond(loop, limiter, clock)
+    assert int(limiter.limit) == 7
+
+
+def test_never_grows_past_maximum(loop, clock):
+    limiter = seed.AdaptiveLimiter(2, 3)
+    for _ in range(50):
+        respond(loop, limiter, clock)
+    assert limiter.limit == 3
+    fixed = seed.AdaptiveLimiter(4, 4)
+    for _ in range(50):
+        respond(loop, fixed, clock)
+    assert fixed.limit == 4
+
+
+def test_decreases_at_most_once_per_window(loop, clock):
+    limiter = seed.AdaptiveLimiter(16)
+    # Three requests sent under the old limit all fail
+    started = clock.now
+    for _ in range(3):
+        limiter.in_flight += 1
+        respond(loop, limiter, clock, overloaded=True, started=started)
+    assert limiter.limit == 16 * seed.AIMD_DECREASE
+    # One sent after the cut fails too, and cuts again
+    limiter.in_flight += 1
+    respond(loop, limiter, clock, overloaded=True, started=clock.now)
+    assert limiter.limit == 16 * seed.AIMD_DECREASE ** 2
+    assert limiter.to_dict() == {"final": 4, "lowest": 4, "highest": 16}
+
+
+def test_never_drops_below_one(loop, clock):
+    limiter = seed.AdaptiveLimiter(2)
+    for _ in range(10):
+        limiter.in_flight += 1
+        respond(loop, limiter, clock, overloaded=True, started=clock.now)
+    assert limiter.limit == 1
+
+
+def test_holds_while_latency_is_high(loop, clock):
+    limiter = seed.AdaptiveLimiter(4, 100)
+    respond(loop, limiter, clock, latency=0.01)
+    grown = limiter.limit
+    # Smoothed latency climbs past the tolerance and growth stops
+    for _ in range(40):
+        respond(loop, limiter, clock, latency=0.01 * seed.AIMD_LATENCY_TOLERANCE * 4)
+    held = limiter.limit
+    for _ in range(10):
+        respond(loop, limiter, clock, latency=0.01 * seed.AIMD_LATENCY_TOLERANCE * 4)
+    assert limiter.limit == held
+    assert held < grown + 40 / grown
+
+
+def test_acquire_waits_for_a_free_slot(clock):
+    async def run():
+        limiter = seed.AdaptiveLimiter(2)
+        first, second = await limiter.acquire(), await limiter.acquire()
+        third = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not third.done()
+        await limiter.release(first, False)
+        await asyncio.wait_for(third, 1)
+        assert limiter.in_flight == 2
+        await limiter.release(second, False)
+    asyncio.run(run())
@@ -0,0 +1,75 @@
+import sqlite3
+
+import pytest
+
+import populate_database as seed
+from conftest import SMALL_DATASET, mock_contents, seed_mock
+
+
+def expected_messages():
+    dataset = seed.GeneratedDataset(**SMALL_DATASET)
+    return sum(len(conversation["messages"]) for conversation in dataset.message_pairs())
+
+
+def test_resume_after_partial_failure_creates_every_row_once(tmp_path):
+    journal = str(tmp_path / "seed.db")
+    mock = seed.MockApiServer(error_rate=0.3, seed=1)
+    seed_mock(mock, journal_path=journal, retries=0)
+    partial = mock_contents(mock)
+    assert len(partial["posts"]) < SMALL_DATASET["post_count"]
+
+    # The resumed run is given no seed, so it has to take the journal's
+    mock.error_rate = 0.0
+    seed_mock(mock, journal_path=journal, retries=0, seed=None)
+    contents = mock_contents(mock)
+
+    assert len(contents["users"]) == SMALL_DATASET["user_count"]
+    assert len(contents["posts"]) == SMALL_DATASET["post_count"]
+    assert len(contents["queries"]) == SMALL_DATASET["query_count"]
+    assert len(contents["messages"]) == expected_messages()
+    # Rows that made it the first time were not sent again
+    assert set(partial["posts"]) <= set(contents["posts"])
+
+    reference = seed.MockApiServer()
+    seed_mock(reference)
+    assert contents == mock_contents(reference)
+
+    with sqlite3.connect(journal) as connection:
+        done = dict(connection.execute("SELECT kind, count(*) FROM entities GROUP BY kind"))
+    assert done["post"] == SMALL_DATASET["post_count"]
+    assert done["query"] == SMALL_DATASET["query_count"]
+
+
+def test_rerun_of_finished_journal_sends_nothing(tmp_path):
+    journal = str(tmp_path / "seed.db")
+    mock = seed.MockApiServer()
+    seed_mock(mock, journal_path=journal)
+    before = mock_contents(mock)
+    seed_mock(mock, journal_path=journal)
+    assert mock_contents(mock) == before
+
+
+def test_journal_keeps_its_seed(tmp_path):
+    journal = seed.SeedJournal(str(tmp_path / "seed.db"))
+    try:
+        assert journal.resolve_seed(11) == 11
+        assert journal.resolve_seed(None) == 11
+        with pytest.raises(SystemExit, match="seed 11, not 12"):
+            journal.resolve_seed(12)
+    finally:
+        journal.close()
+
+
+def test_done_bitmap_tracks_recorded_indexes(tmp_path):
+    journal = seed.SeedJournal(str(tmp_path / "seed.db"))
+    try:
+        for index in (0, 9, 17):
+            journal.record("post", index, f"id-{index}")
+        assert journal.load("post", 20) == 3
+        assert [index for index in range(20) if journal.is_done("post", index)] == [0, 9, 17]
+        # Indexes past the loaded count are not done, whatever the journal holds
+        assert journal.load("post", 10) == 2
+        assert not journal.is_done("post", 17)
+        assert not journal.is_done("query", 0)
+    finally:
+        journal.close()
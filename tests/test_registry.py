@@ -0,0 +1,136 @@
+import os
+import uuid
+
+import numpy as np
+import pytest
+
+import populate_database as seed
+from conftest import SMALL_DATASET, seed_mock
+
+
+@pytest.fixture
+def small_memory(monkeypatch):
+    # Spill to memory-mapped files after a few thousand rows instead of a million
+    monkeypatch.setattr(seed, "REGISTRY_MEMORY_ROWS", 2048)
+
+
+def fill(registry, kind, count, owners=7):
+    ids = [str(uuid.uuid4()) for _ in range(count)]
+    for position, entity_id in enumerate(ids):
+        registry.add(kind, entity_id, owner=position % owners, link=position)
+    return ids
+
+
+def test_spills_past_memory_rows_and_keeps_every_row(tmp_path, small_memory):
+    registry = seed.EntityRegistry(str(tmp_path))
+    try:
+        ids = fill(registry, "post", 10000)
+        assert registry.spilled is not None
+        assert isinstance(registry.arrays["post"], np.memmap)
+        assert list(registry.uuids("post")) == ids
+        assert registry.entity_id("post", 9999) == ids[9999]
+        assert registry.rows("post")["owner"][:8].tolist() == [0, 1, 2, 3, 4, 5, 6, 0]
+        spilled = registry.spilled
+    finally:
+        registry.close()
+    assert not os.path.exists(spilled)
+
+
+def test_save_and_load_round_trip(tmp_path, small_memory):
+    registry = seed.EntityRegistry(str(tmp_path))
+    post_ids = fill(registry, "post", 5000)
+    user_ids = fill(registry, "user", 7)
+    registry.save(str(tmp_path / "saved"))
+    manifest = seed.owner_manifest(registry, "post")
+    registry.close()
+
+    loaded = seed.EntityRegistry.load(str(tmp_path / "saved"))
+    try:
+        assert list(loaded.uuids("post")) == post_ids
+        assert list(loaded.uuids("user")) == user_ids
+        assert loaded.counts["message"] == 0
+        assert seed.EntityRegistry.load_manifest(str(tmp_path / "saved"))["post"] == manifest
+    finally:
+        loaded.close()
+
+
+def test_extend_merges_past_memory_rows(tmp_path, small_memory):
+    first, second = seed.EntityRegistry(str(tmp_path)), seed.EntityRegistry(str(tmp_path))
+    first_ids, second_ids = fill(first, "message", 1500), fill(second, "message", 1500)
+    first.save(str(tmp_path / "first"))
+    second.save(str(tmp_path / "second"))
+    first.close()
+    second.close()
+
+    merged = seed.EntityRegistry(str(tmp_path))
+    try:
+        for directory in ("first", "second"):
+            merged.extend(seed.EntityRegistry.load(str(tmp_path / directory)))
+        assert merged.spilled is not None
+        assert list(merged.uuids("message")) == first_ids + second_ids
+    finally:
+        merged.close()
+
+
+def test_extend_keeps_one_id_per_user_index(tmp_path):
+    registry = seed.EntityRegistry(str(tmp_path))
+    other = seed.EntityRegistry(str(tmp_path))
+    try:
+        registry.add("user", uuid.uuid4(), owner=0)
+        # A shard also signs in the receivers of its messages, and may sign one in twice
+        receiver = uuid.uuid4()
+        other.add("user", uuid.uuid4(), owner=0)
+        other.add("user", receiver, owner=1)
+        other.add("user", receiver, owner=1)
+        registry.extend(other)
+        assert registry.rows("user")["owner"].tolist() == [0, 1]
+        assert registry.entity_id("user", 1) == str(receiver)
+    finally:
+        registry.close()
+        other.close()
+
+
+def test_rejects_ids_that_are_not_uuids(tmp_path):
+    registry = seed.EntityRegistry(str(tmp_path))
+    try:
+        assert registry.add("post", "42", owner=0) is None
+        assert registry.counts["post"] == 0
+    finally:
+        registry.close()
+
+
+def test_seeding_twice_adds_to_the_registry(tmp_path):
+    mock = seed.MockApiServer()
+    path = str(tmp_path / "registry")
+    seed_mock(mock, registry_path=path)
+    seed_mock(mock, registry_path=path, seed=8)
+    registry = seed.EntityRegistry.load(path)
+    try:
+        assert registry.counts["post"] == 2 * SMALL_DATASET["post_count"] == len(mock.posts)
+        # Users are signed in again on each run, so they are registered once
+        assert registry.counts["user"] == SMALL_DATASET["user_count"]
+    finally:
+        registry.close()
+
+
+def registered_users(path):
+    registry = seed.EntityRegistry.load(path)
+    try:
+        rows = registry.rows("user")
+        return {owner: registry.entity_id("user", position) for position, owner in enumerate(rows["owner"].tolist())}
+    finally:
+        registry.close()
+
+
+def test_rerun_keeps_users_that_fail_to_sign_in(tmp_path):
+    mock = seed.MockApiServer(seed=3)
+    path = str(tmp_path / "registry")
+    seed_mock(mock, registry_path=path)
+    users = registered_users(path)
+    assert len(users) == SMALL_DATASET["user_count"]
+
+    # Half the sign-ins fail, then all of them
+    for error_rate in (0.5, 1.0):
+        mock.error_rate = error_rate
+        seed_mock(mock, registry_path=path, retries=0)
+        assert registered_users(path) == users
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+import populate_database as seed
+
+
+def write(path, spec):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def in_tmp(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_builtin_name_resolves_to_scenario_dir():
+    assert seed.scenario_path("smoke") == seed.os.path.join(seed.SCENARIO_DIR, "smoke.json")
+
+
+@pytest.mark.parametrize("source", ["sub/my.json", "./sub/my.json"])
+def test_relative_path_resolves_against_cwd(in_tmp, source):
+    path = write(in_tmp / "sub" / "my.json", {"counts": {"posts": 3}})
+    assert seed.scenario_path(source) == str(path)
+    assert seed.read_scenario(source)["counts"]["posts"] == 3
+
+
+def test_missing_file_names_the_resolved_path(in_tmp):
+    with pytest.raises(SystemExit, match=str(in_tmp / "nope.json")):
+        seed.scenario_path("nope.json")
+
+
+def test_extends_merges_top_level_tables(in_tmp):
+    write(in_tmp / "sub" / "base.json", {"extends": "smoke", "counts": {"users": 7}, "social": {"zipf_exponent": 2}})
+    write(in_tmp / "sub" / "nested" / "child.json", {"extends": "../base.json", "counts": {"posts": 9}})
+
+    spec = seed.read_scenario("sub/nested/child.json")
+
+    # Each level only overrides the keys it names
+    assert spec["counts"] == {"users": 7, "posts": 9, "queries": 4, "conversations": 4}
+    assert spec["social"]["zipf_exponent"] == 2
+    assert spec["social"]["mean_conversation_length"] == 2
+    # Untouched tables come from default
+    assert spec["users"] == seed.read_scenario("default")["users"]
+
+
+def test_extends_cycle_is_rejected(in_tmp):
+    write(in_tmp / "a.json", {"extends": "b.json"})
+    write(in_tmp / "b.json", {"extends": "a.json"})
+    with pytest.raises(SystemExit, match="extends itself"):
+        seed.read_scenario("a.json")
+
+
+def test_vocabulary_file_is_relative_to_scenario(in_tmp):
+    (in_tmp / "sub").mkdir()
+    (in_tmp / "sub" / "topics.txt").write_text("alpha\nbeta\n", encoding="utf-8")
+    write(in_tmp / "sub" / "my.json", {"vocabularies": {"query_topics": {"file": "topics.txt"}}})
+    scenario = seed.Scenario(seed.read_scenario("sub/my.json"), "sub/my.json")
+    assert list(scenario.vocabulary("query_topics")) == ["alpha", "beta"]
@@ -0,0 +1,45 @@
+import pytest
+
+import populate_database as seed
+from conftest import SMALL_DATASET, mock_contents, seed_mock
+
+DATASET = {"user_count": 50, "post_count": 3000, "query_count": 400, "conversation_count": 500, "seed": 9}
+
+
+def by_index(rows):
+    return {row["index"]: row for row in rows}
+
+
+@pytest.mark.parametrize("scenario", ["default", "hot-users"])
+@pytest.mark.parametrize("count", [2, 3, 7])
+def test_shard_rows_partition_the_unsharded_rows(scenario, count):
+    whole = seed.GeneratedDataset(**DATASET, scenario=scenario)
+    shards = [seed.GeneratedDataset(**DATASET, scenario=scenario, shard=(index, count)) for index in range(count)]
+    for rows in ("posts", "queries", "message_pairs"):
+        expected = by_index(getattr(whole, rows)())
+        union = {}
+        for index, shard in enumerate(shards):
+            for row in getattr(shard, rows)():
+                owner = row["owner"] if "owner" in row else row["sender"]
+                assert owner % count == index
+                assert row["index"] not in union
+                union[row["index"]] = row
+        assert union == expected
+
+
+def test_sharded_seeding_matches_a_single_run():
+    sharded = seed.MockApiServer()
+    for index in range(3):
+        seed_mock(sharded, shards=3, shard_index=index)
+    single = seed.MockApiServer()
+    seed_mock(single)
+    assert mock_contents(sharded) == mock_contents(single)
+    assert len(mock_contents(single)["posts"]) == SMALL_DATASET["post_count"]
+
+
+def test_shard_users_include_conversation_receivers():
+    dataset = seed.GeneratedDataset(**DATASET, shard=(1, 4))
+    needed = {index for index, _ in seed.shard_users(dataset)}
+    assert set(range(1, 50, 4)) <= needed
+    for batch in dataset.participants():
+        assert set(batch["receiver"].tolist()) <= needed
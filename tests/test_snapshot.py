@@ -0,0 +1,65 @@
+import pytest
+
+import populate_database as seed
+
+DATASET = {
+    "user_count": 30, "post_count": 200, "query_count": 50, "conversation_count": 60, "seed": 3,
+    "scenario": "hot-users",
+}
+
+
+def rows(dataset):
+    return {
+        "users": list(dataset.users()),
+        "posts": list(dataset.posts()),
+        "queries": list(dataset.queries()),
+        "conversations": list(dataset.message_pairs()),
+    }
+
+
+@pytest.fixture(scope="module")
+def snapshot(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("snapshot") / "data.wps")
+    seed.write_snapshot(path, seed.GeneratedDataset(**DATASET))
+    return path
+
+
+def test_replay_equals_generation(snapshot):
+    replayed = seed.SnapshotDataset(snapshot)
+    generated = seed.GeneratedDataset(**DATASET)
+    assert replayed.seed == generated.seed
+    assert (replayed.user_count, replayed.post_count, replayed.query_count, replayed.conversation_count) == (
+        generated.user_count, generated.post_count, generated.query_count, generated.conversation_count
+    )
+    assert replayed.header["version"] == seed.SNAPSHOT_VERSION
+    assert replayed.header["scenario"] == "hot-users"
+    assert rows(replayed) == rows(generated)
+
+
+def test_sharded_replay_equals_sharded_generation(snapshot):
+    for index in range(3):
+        shard = (index, 3)
+        assert rows(seed.SnapshotDataset(snapshot, shard)) == rows(seed.GeneratedDataset(**DATASET, shard=shard))
+
+
+def test_text_survives_escaping(tmp_path):
+    # Multi-byte and control characters must round-trip through the offsets and UTF-8 data
+    dataset = seed.GeneratedDataset(**DATASET)
+    odd = "naïve\ttab\nnewline ☃ \\ \"quoted\""
+    dataset.users = lambda: ({"email": f"u{index}@example.com", "password": odd, "name": odd} for index in range(30))
+    path = str(tmp_path / "odd.wps")
+    seed.write_snapshot(path, dataset)
+    assert {user["name"] for user in seed.SnapshotDataset(path).users()} == {odd}
+
+
+def test_open_dataset_rejects_another_seed(snapshot):
+    with pytest.raises(SystemExit, match="seed 3, not 4"):
+        seed.open_dataset(snapshot, seed=4)
+
+
+def test_truncated_snapshot_is_rejected(snapshot, tmp_path):
+    path = tmp_path / "truncated.wps"
+    with open(snapshot, "rb") as file:
+        path.write_bytes(file.read()[:-16])
+    with pytest.raises(SystemExit):
+        seed.SnapshotDataset(str(path))
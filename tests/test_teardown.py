@@ -0,0 +1,54 @@
+import uuid
+
+import populate_database as seed
+
+
+class FakeConnection:
+    """Answers the min(id), max(id) query id_ranges opens a connection for"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement):
+        return self
+
+    def fetchone(self):
+        return 1, 2 * seed.TEARDOWN_RANGE_SIZE
+
+
+def plan(registry=None):
+    return {
+        table: (statement, list(batches))
+        for table, statement, batches in seed.teardown_plan(FakeConnection, "ci-42", registry)
+    }
+
+
+def test_registry_users_and_queries_are_swept_by_subdomain_and_tag():
+    registry = seed.EntityRegistry()
+    registry.add("user", uuid.uuid4(), owner=0)
+    registry.add("post", uuid.uuid4(), owner=0)
+    registry.add("message", uuid.uuid4(), owner=0, peer=1)
+    tables = plan(registry)
+
+    for table in ("Message", "Posts"):
+        statement, batches = tables[table]
+        assert "ANY(%s)" in statement
+        assert len(batches) == 1 and len(batches[0][0]) == 1
+    statement, batches = tables["User"]
+    assert "id >= %s" in statement and "mail LIKE" in statement
+    assert [batch[2] for batch in batches] == [seed.run_email("%@%", "ci-42")] * 2
+    statement, batches = tables["Query"]
+    assert "id >= %s" in statement and "text LIKE" in statement
+    assert batches[0][2] == "%" + seed.RUN_MARKER.format(run_id="ci-42")
+    registry.close()
+
+
+def test_without_registry_every_table_is_scanned():
+    for statement, batches in plan().values():
+        assert "id >= %s" in statement
+        assert [batch[:2] for batch in batches] == [
+            (1, 1 + seed.TEARDOWN_RANGE_SIZE), (1 + seed.TEARDOWN_RANGE_SIZE, 1 + 2 * seed.TEARDOWN_RANGE_SIZE)
+        ]
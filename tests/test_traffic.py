@@ -0,0 +1,19 @@
+import datetime
+
+import pytest
+
+import populate_database as seed
+
+
+def test_curve_peaks_at_the_utc_peak_hour(monkeypatch):
+    # A local zone far from UTC would shift a curve anchored on local time
+    monkeypatch.setenv("TZ", "Pacific/Kiritimati")
+    seed.time.tzset()
+    try:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        generator = seed.TrafficGenerator({"post": 1.0}, amplitude=1.0, peak_hour=now.hour + now.minute / 60)
+    finally:
+        monkeypatch.undo()
+        seed.time.tzset()
+    assert generator.rate("post", 0) == pytest.approx(2.0, abs=1e-3)
+    assert generator.rate("post", 12 * 3600) == pytest.approx(0.0, abs=1e-3)
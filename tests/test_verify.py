@@ -0,0 +1,106 @@
+import collections
+import json
+
+import numpy as np
+import pytest
+
+import populate_database as seed
+from conftest import SMALL_DATASET, seed_mock
+
+
+def seeded(tmp_path):
+    mock = seed.MockApiServer()
+    path = str(tmp_path / "registry")
+    seed_mock(mock, registry_path=path)
+    return mock, path
+
+
+def verify(mock, path):
+    return seed.run_verify(path, concurrency=4, token_cache_path=None, mock_server=mock).checks
+
+
+def test_untouched_seed_verifies(tmp_path):
+    mock, path = seeded(tmp_path)
+    checks = verify(mock, path)
+    for kind in seed.VERIFY_SELECTS:
+        assert checks[kind]["matched"] == checks[kind]["users"] == SMALL_DATASET["user_count"]
+
+
+def drop_user_rows(path, owners):
+    """Save the registry at `path` again without the user rows of `owners`"""
+    registry = seed.EntityRegistry()
+    registry.extend(seed.EntityRegistry.load(path))
+    users = registry.rows("user")
+    kept = users[~np.isin(users["owner"], owners)]
+    registry.arrays["user"][:len(kept)] = kept
+    registry.counts["user"] = len(kept)
+    registry.save(path)
+    registry.close()
+
+
+def test_owners_without_user_rows_are_missing(tmp_path):
+    mock, path = seeded(tmp_path)
+    drop_user_rows(path, [1, 4])
+    checks = verify(mock, path)
+    assert checks["user"]["missing"] == 2
+    assert checks["user"]["users"] == SMALL_DATASET["user_count"]
+    # Their posts and messages are still read back
+    for kind in seed.VERIFY_SELECTS:
+        assert checks[kind]["matched"] == checks[kind]["users"] == SMALL_DATASET["user_count"]
+
+
+def test_verifies_entities_when_no_user_rows_are_left(tmp_path):
+    mock, path = seeded(tmp_path)
+    drop_user_rows(path, list(range(SMALL_DATASET["user_count"])))
+    checks = verify(mock, path)
+    assert checks["user"]["missing"] == SMALL_DATASET["user_count"]
+    assert checks["post"]["matched"] == SMALL_DATASET["user_count"]
+
+
+def test_defaults_to_the_recorded_scenario(tmp_path):
+    scenario = tmp_path / "other.json"
+    scenario.write_text(json.dumps({"synthetic_user": {
+        "email": "other.user{index}@example.com", "password": "OtherUser123!", "name": "Other User {index}"
+    }}), encoding="utf-8")
+    mock = seed.MockApiServer()
+    path = str(tmp_path / "registry")
+    seed_mock(mock, registry_path=path, scenario=str(scenario))
+
+    checks = verify(mock, path)
+    assert checks["post"]["matched"] == SMALL_DATASET["user_count"]
+    assert seed.run_verify(path, concurrency=4, token_cache_path=None, mock_server=mock,
+                           scenario=str(scenario)).checks["post"]["matched"] == SMALL_DATASET["user_count"]
+    with pytest.raises(SystemExit, match="other.json"):
+        seed.run_verify(path, concurrency=4, token_cache_path=None, mock_server=mock, scenario="default")
+
+
+def test_detects_missing_duplicated_orphaned_and_unexpected_posts(tmp_path):
+    mock, path = seeded(tmp_path)
+    links = collections.defaultdict(list)
+    for link in mock.post_users:
+        links[link["user"]].append(link)
+    # Four users with at least two posts each get one kind of damage apiece
+    missing, duplicated, orphaned, unexpected = [user for user, owned in links.items() if len(owned) >= 2][:4]
+
+    mock.post_users.remove(links[missing][0])
+    mock.post_users.append(dict(links[duplicated][0]))
+    gone = links[orphaned][0]["post"]
+    mock.posts = [row for row in mock.posts if row[0]["post_id"] != gone]
+    mock.post_users.append(dict(links[missing][1], user=unexpected))
+
+    checks = verify(mock, path)["post"]
+    assert checks["users"] == SMALL_DATASET["user_count"]
+    assert checks["matched"] == SMALL_DATASET["user_count"] - 4
+    # The orphaned user's post is gone, so it is also missing
+    assert (checks["missing"], checks["duplicated"], checks["orphaned"], checks["unexpected"]) == (2, 1, 1, 1)
+    assert verify(mock, path)["message"]["matched"] == SMALL_DATASET["user_count"]
+
+
+def test_digest_ignores_order_but_not_repeats():
+    ids = np.frombuffer(np.random.default_rng(1).bytes(16 * 100), dtype="V16")
+    hashes = seed.entity_hashes(ids)
+    shuffled = seed.entity_hashes(ids[np.random.default_rng(2).permutation(100)])
+    assert int(hashes.sum()) == int(shuffled.sum())
+    assert int(seed.entity_hashes(np.concatenate([ids, ids[:1]])).sum()) != int(hashes.sum())
+    assert int(hashes[1:].sum()) != int(hashes.sum())
+    assert len(set(hashes.tolist())) == 100